@@ -0,0 +1,102 @@
+// AGENTICUM G5 — Warm Lighthouse Accessibility Worker
+// Langlebiger Prozess: startet Chromium einmal (Remote-Debugging-Port) und
+// auditiert Jobs aus stdin (NDJSON: {"id", "url"}) nacheinander im selben
+// Browser. Ergebnisse gehen als NDJSON ({"id", "score", "failures"} oder
+// {"id", "error"}) nach stdout. Chromium wird nach MAX_JOBS Audits oder
+// nach einem Absturz neu gestartet.
+import readline from "node:readline";
+import * as chromeLauncher from "chrome-launcher";
+import lighthouse from "lighthouse";
+
+const MAX_JOBS = Number(process.env.A11Y_WORKER_MAX_JOBS || 100);
+const CHROME_FLAGS = [
+  "--headless=new",
+  "--no-sandbox",
+  "--disable-gpu",
+  "--disable-dev-shm-usage",
+  "--disable-extensions",
+];
+
+let chrome = null;
+let jobsOnChrome = 0;
+
+async function ensureChrome() {
+  if (chrome && jobsOnChrome < MAX_JOBS) return chrome;
+  await killChrome();
+  chrome = await chromeLauncher.launch({
+    chromePath: process.env.CHROME_PATH || undefined,
+    chromeFlags: CHROME_FLAGS,
+  });
+  jobsOnChrome = 0;
+  return chrome;
+}
+
+async function killChrome() {
+  if (!chrome) return;
+  try {
+    await chrome.kill();
+  } catch {
+    // Prozess ist bereits weg
+  }
+  chrome = null;
+}
+
+function send(message) {
+  process.stdout.write(JSON.stringify(message) + "\n");
+}
+
+async function audit(job) {
+  const { port } = await ensureChrome();
+  jobsOnChrome += 1;
+  const result = await lighthouse(
+    job.url,
+    { port, output: "json", logLevel: "error", onlyCategories: ["accessibility"] },
+  );
+  const lhr = result.lhr;
+  const category = lhr.categories.accessibility;
+  const weights = new Map(category.auditRefs.map((ref) => [ref.id, ref.weight]));
+  const failures = Object.values(lhr.audits)
+    .filter((a) => a.score === 0 && (weights.get(a.id) || 0) > 0)
+    .map((a) => a.title);
+  return { score: (category.score ?? 0) * 100, failures };
+}
+
+// Jobs strikt nacheinander: ein Lighthouse-Run pro Browser gleichzeitig
+let queue = Promise.resolve();
+
+const input = readline.createInterface({ input: process.stdin });
+input.on("line", (line) => {
+  if (!line.trim()) return;
+  let job;
+  try {
+    job = JSON.parse(line);
+  } catch (err) {
+    send({ id: null, error: `Invalid job: ${err.message}` });
+    return;
+  }
+  queue = queue.then(async () => {
+    try {
+      send({ id: job.id, ...(await audit(job)) });
+    } catch (err) {
+      await killChrome();
+      send({ id: job.id, error: String(err && err.message ? err.message : err) });
+    }
+  });
+});
+
+input.on("close", async () => {
+  await queue;
+  await killChrome();
+  process.exit(0);
+});
+
+for (const signal of ["SIGTERM", "SIGINT"]) {
+  process.on(signal, async () => {
+    await killChrome();
+    process.exit(0);
+  });
+}
+
+ensureChrome()
+  .then(() => send({ id: null, ready: true }))
+  .catch((err) => send({ id: null, error: `Chrome launch failed: ${err.message}` }));
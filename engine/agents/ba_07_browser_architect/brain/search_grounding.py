@@ -4,6 +4,8 @@ Ermöglicht ba07 während der Browser-Session zu googlen via Sub-Agent.
 """
 from google.adk import Agent
 
+from engine.core.single_flight import SingleFlight, flight_key, normalize_prompt
+
 try:
     from google.adk.tools import google_search
 except ImportError:
@@ -32,4 +34,22 @@ search_agent = Agent(
     tools=search_tools,
 )
 
-search_enricher_tool = AgentTool(agent=search_agent)
+_enricher_flight = SingleFlight("ba07_search_enricher")
+
+
+class CoalescingAgentTool(AgentTool):
+    """
+    AgentTool, bei dem gleichzeitige Aufrufe mit identischen Args einen
+    Sub-Agent-Run teilen. State-/Artifact-Deltas landen dabei nur im
+    ToolContext des ersten Aufrufers.
+    """
+
+    async def run_async(self, *, args, tool_context):
+        normalized = {k: normalize_prompt(v) if isinstance(v, str) else v for k, v in args.items()}
+        key = flight_key(self.agent.name, getattr(self.agent, "model", ""), normalized)
+        return await _enricher_flight.do(
+            key, lambda: super(CoalescingAgentTool, self).run_async(args=args, tool_context=tool_context)
+        )
+
+
+search_enricher_tool = CoalescingAgentTool(agent=search_agent)
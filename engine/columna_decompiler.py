@@ -1,19 +1,26 @@
 import asyncio
+import contextlib
+import itertools
+import json
+import math
+import os
 import time
-from typing import Optional, List
+from typing import Iterable, Optional, List, Tuple
 from fastapi import APIRouter, HTTPException
-from playwright.async_api import async_playwright
-from bs4 import BeautifulSoup
-import vertexai
-from vertexai.language_models import TextEmbeddingModel
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel
 from google.cloud import firestore
 from google.cloud.firestore_v1.vector import Vector
 
-from engine.config import PROJECT_ID, REGION
-import vertexai
+from engine.config import PROJECT_ID
+from engine.core.html_skeleton import extract_skeleton, extract_skeleton_and_hash, iter_sections
+from engine.core.chunking import iter_chunks
+from engine.services.browser_pool import browser_pool, BrowserPoolSaturated
+from engine.services.fingerprint_store import fingerprint_store, normalize_url, content_fingerprint
+from engine.services.embedding_service import embedding_service
+from engine.services.competitor_index import competitor_mirror
 
 _db = None
-_embedding_model = None
 
 def get_db():
     global _db
@@ -22,132 +29,439 @@ def get_db():
         _db = firestore.Client(project=PROJECT_ID)
     return _db
 
-def get_embedding_model():
-    global _embedding_model
-    if _embedding_model is None:
-        from vertexai.language_models import TextEmbeddingModel
-        vertexai.init(project=PROJECT_ID, location=REGION)
-        _embedding_model = TextEmbeddingModel.from_pretrained("text-embedding-004")
-    return _embedding_model
-
 router = APIRouter()
 
+# Chunked Embeddings: ganzes Dokument in heading-ausgerichteten Fenstern statt raw_text[:8000]
+CHUNKED_EMBEDDINGS = os.getenv("COLUMNA_CHUNKED_EMBEDDINGS", "true").lower() == "true"
+CHUNK_EMBED_GROUP = int(os.getenv("COLUMNA_CHUNK_EMBED_GROUP", str(embedding_service.max_batch)))
+# Text-Auszug im Intel-Dokument für den lexikalischen (BM25) Teil der Counter-Strike-Suche
+TEXT_EXCERPT_CHARS = int(os.getenv("COLUMNA_TEXT_EXCERPT_CHARS", "4000"))
+
+async def fetch_competitor_page(url: str) -> dict:
+    """
+    Lädt die Seite über den warmen Chromium-Pool (JS-Rendering Support) und blockiert Media.
+    Gibt HTML plus die HTTP-Validatoren (ETag / Last-Modified) des Dokuments zurück.
+    """
+    try:
+        async with browser_pool.lease_page() as page:
+            # Performance-Hack: Bilder und CSS blockieren, wir brauchen nur den Text/DOM
+            await page.route("**/*", lambda route: route.abort()
+                if route.request.resource_type in ["image", "media", "font", "stylesheet"]
+                else route.continue_()
+            )
+
+            try:
+                # Wait-until 'domcontentloaded' ist schneller als 'networkidle'
+                response = await page.goto(url, wait_until="domcontentloaded", timeout=15000)
+                html = await page.content()
+                headers = response.headers if response else {}
+                return {
+                    "html": html,
+                    "etag": headers.get("etag"),
+                    "last_modified": headers.get("last-modified"),
+                }
+            except Exception as e:
+                raise HTTPException(status_code=400, detail=f"Scraping failed: {str(e)}")
+    except BrowserPoolSaturated as e:
+        raise HTTPException(status_code=503, detail=f"Columna browser pool busy: {str(e)}")
+
 async def fetch_competitor_dom(url: str) -> str:
-    """Lädt die Seite asynchron via Playwright (JS-Rendering Support) und blockiert Media."""
-    async with async_playwright() as p:
-        # Headless=True für Speed. Chromium ist der Goldstandard für Scraping.
-        browser = await p.chromium.launch(headless=True)
-        page = await browser.new_page()
-        
-        # Performance-Hack: Bilder und CSS blockieren, wir brauchen nur den Text/DOM
-        await page.route("**/*", lambda route: route.abort() 
-            if route.request.resource_type in ["image", "media", "font", "stylesheet"] 
-            else route.continue_()
-        )
-        
-        try:
-            # Wait-until 'domcontentloaded' ist schneller als 'networkidle'
-            await page.goto(url, wait_until="domcontentloaded", timeout=15000)
-            html = await page.content()
-            return html
-        except Exception as e:
-            raise HTTPException(status_code=400, detail=f"Scraping failed: {str(e)}")
-        finally:
-            await browser.close()
+    page = await fetch_competitor_page(url)
+    return page["html"]
 
 def extract_pillar_skeleton(html: str) -> dict:
-    """Extrahiert die Core-SEO-Architektur mit BeautifulSoup."""
-    soup = BeautifulSoup(html, 'html.parser')
-    
-    # H1 bis H3 Hierarchie extrahieren
-    headings = []
-    for tag in soup.find_all(['h1', 'h2', 'h3']):
-        headings.append({"level": tag.name, "text": tag.get_text(strip=True)})
-        
-    # Body Text (für Embeddings)
-    # Entferne Script/Style Tags vor dem Text-Extract
-    for script in soup(["script", "style", "nav", "footer"]):
-        script.decompose()
-    
-    main_text = soup.get_text(separator=' ', strip=True)
-    
-    # Optional: Finde ausgehende Links (Wen verlinken sie als Autorität?)
-    outbound_links = [a['href'] for a in soup.find_all('a', href=True) if a['href'].startswith('http')]
-
-    return {
-        "headings": headings,
-        "content_length": len(main_text),
-        "raw_text": main_text[:8000], # Limit für das Embedding Modell
-        "outbound_links": list(set(outbound_links))[:10]
-    }
+    """Extrahiert die Core-SEO-Architektur (Single-Pass, siehe engine/core/html_skeleton.py)."""
+    return extract_skeleton(html)
 
-@router.post("/columna/decompile")
-async def decompile_competitor(url: str, competitor_name: str, session_id: Optional[str] = None):
-    """
-    API Endpunkt: Zieht die Seite, berechnet Embeddings und speichert
-    sie via SwarmBus für den gesamten Swarm.
-    """
-    run_id = session_id or f"columna_{int(time.time())}"
-    
-    # --- SWARM BUS INITIALIZATION ---
+def _new_swarm_bus(run_id: str):
+    """SwarmBus mit Mock-Context für Router ohne ADK-Invocation."""
     from engine.swarm.swarm_bus import SwarmBus
-    from engine.swarm.entities import CompetitorIntelEntity, CompetitorProfile
     from google.adk.sessions import Session
     from unittest.mock import MagicMock
-    
+
     mock_session = Session(app_name="agenticum_g5", user_id="swarm_internal", session_id=run_id)
     mock_ctx = MagicMock()
     mock_ctx.session = mock_session
-    bus = SwarmBus(mock_ctx)
-
-    # 1. HTML via Playwright ziehen
-    html_content = await fetch_competitor_dom(url)
-    
-    # 2. Skelett extrahieren
-    skeleton = extract_pillar_skeleton(html_content)
-    
-    # 3. Vertex AI Embedding generieren
-    model = get_embedding_model()
-    embeddings = model.get_embeddings([skeleton["raw_text"]])
-    vector_values = embeddings[0].values
-    
-    # 4. In SwarmBus schreiben
-    profile = CompetitorProfile(
+    return SwarmBus(mock_ctx)
+
+def _build_profile(url: str, skeleton: dict):
+    from engine.swarm.entities import CompetitorProfile
+    return CompetitorProfile(
         url=url,
         threat_score=80, # Base threat for direct competitors
-        value_props=skeleton.get("headings", []),
+        value_props=[h["text"] for h in skeleton.get("headings", [])],
         tech_stack=skeleton.get("outbound_links", [])
     )
-    
+
+def _write_intel(bus, profiles: list, urls: List[str]):
+    from engine.swarm.entities import CompetitorIntelEntity
     bus.write_intel(CompetitorIntelEntity(
-        competitors=[profile],
+        competitors=profiles,
         counter_strike_angle="Analyze gaps in their SEO skeleton and H1-H3 hierarchy.",
-        grounding_sources=[url]
+        grounding_sources=urls
     ))
-    
-    # Vector DB + OS Sync
-    db = get_db()
-    
-    # 5. Persist to 'competitor_intel' for OS Dashboard (Maximum Excellence Sync)
-    intel_data = {
+
+async def _embed_text(text: str) -> list:
+    """Vertex AI Embedding über den Micro-Batching Service (gebündelt mit parallelen Requests)."""
+    return await embedding_service.embed(text)
+
+def _build_intel_record(url: str, competitor_name: str, skeleton: dict, vector_values: Optional[list], run_id: str) -> dict:
+    return {
         "url": url,
         "name": competitor_name,
         "threat_score": 85,  # Real AI-driven threat assessment placeholder
         "skeleton": skeleton.get("headings", []),
-        "status": "archived", # Analysis complete
+        "text_excerpt": skeleton.get("raw_text", "")[:TEXT_EXCERPT_CHARS],
+        # "processing": Platzhalter ohne Vektor, solange die Chunks geschrieben werden
+        "status": "archived" if vector_values is not None else "processing", # Analysis complete
         "timestamp": firestore.SERVER_TIMESTAMP,
         "run_id": run_id,
-        "embedding_field": Vector(vector_values)
+        "embedding_field": Vector(vector_values) if vector_values is not None else None
     }
-    
-    db.collection("competitor_intel").add(intel_data)
 
-    await bus.persist()
-    
+class _StageLimits:
+    """Getrennte Semaphoren pro Pipeline-Stufe (siehe Batch-Endpunkt)."""
+    def __init__(self, fetch: int, parse: int, embed: int, persist: int):
+        self.fetch = asyncio.Semaphore(fetch)
+        self.parse = asyncio.Semaphore(parse)
+        self.embed = asyncio.Semaphore(embed)
+        self.persist = asyncio.Semaphore(persist)
+
+def _stage(limits: Optional[_StageLimits], name: str):
+    return getattr(limits, name) if limits else contextlib.nullcontext()
+
+def _persist_intel(intel_data: dict, doc_ref=None) -> str:
+    """Persist to 'competitor_intel' for OS Dashboard (Maximum Excellence Sync)."""
+    if doc_ref is None:
+        _, doc_ref = get_db().collection("competitor_intel").add(intel_data)
+    else:
+        doc_ref.set(intel_data)
+    return doc_ref.id
+
+def _persist_chunks(doc_ref, chunks: List[dict], vectors: List[list], meta: dict) -> List[str]:
+    """Eine Chunk-Gruppe als Firestore-Batch nach competitor_intel/{id}/chunks schreiben; gibt die Chunk-IDs zurück."""
+    batch = get_db().batch()
+    records = []
+    for chunk, vector in zip(chunks, vectors):
+        record = {
+            **meta,
+            "index": chunk["index"],
+            "heading": chunk["heading"],
+            "level": chunk["level"],
+            "text": chunk["text"],
+        }
+        records.append((f"{chunk['index']:05d}", record, vector))
+        batch.set(doc_ref.collection("chunks").document(records[-1][0]), {
+            **record,
+            "timestamp": firestore.SERVER_TIMESTAMP,
+            "embedding_field": Vector(vector),
+        })
+    batch.commit()
+    for chunk_id, record, vector in records:
+        competitor_mirror.record_chunk(doc_ref.id, chunk_id, {**record, "embedding_field": vector})
+    return [chunk_id for chunk_id, _, _ in records]
+
+def _discard_document(doc_ref, chunk_ids: List[str]):
+    """Räumt ein abgebrochenes Chunked-Dokument ab: Chunks + Platzhalter in Firestore und im Spiegel."""
+    db = get_db()
+    for start in range(0, len(chunk_ids), 400):  # Firestore-Batch: max. 500 Operationen
+        batch = db.batch()
+        for chunk_id in chunk_ids[start:start + 400]:
+            batch.delete(doc_ref.collection("chunks").document(chunk_id))
+        batch.commit()
+    doc_ref.delete()
+    competitor_mirror.forget_document(doc_ref.id, chunk_ids)
+
+async def _embed_chunks(
+    doc_ref,
+    sections: Iterable[dict],
+    meta: dict,
+    limits: Optional[_StageLimits],
+    written: List[str],
+) -> Tuple[Optional[list], int]:
+    """
+    Streamt heading-ausgerichtete Chunks gruppenweise durch Embedding + Batch-Write.
+    `sections` ist ein Generator (iter_sections): jede Gruppe wird im Thread aus dem
+    Parser gezogen, nur sie liegt im Speicher. Der Dokument-Vektor wird laufend als
+    längengewichteter Mittelwert gepoolt und am Ende L2-normalisiert. Geschriebene
+    Chunk-IDs landen in `written`, damit ein Abbruch sie wieder entfernen kann.
+    """
+    pooled, total_chunks = None, 0
+    chunks = iter_chunks(sections)
+
+    async def flush(group: List[dict]):
+        nonlocal pooled, total_chunks
+        async with _stage(limits, "embed"):
+            vectors = await embedding_service.embed_many([c["text"] for c in group])
+        async with _stage(limits, "persist"):
+            written.extend(await asyncio.to_thread(_persist_chunks, doc_ref, group, vectors, meta))
+        for chunk, vector in zip(group, vectors):
+            weight = len(chunk["text"])
+            if pooled is None:
+                pooled = [0.0] * len(vector)
+            for i, value in enumerate(vector):
+                pooled[i] += weight * value
+        total_chunks += len(group)
+
+    while True:
+        async with _stage(limits, "parse"):
+            group = await asyncio.to_thread(lambda: list(itertools.islice(chunks, CHUNK_EMBED_GROUP)))
+        if not group:
+            break
+        await flush(group)
+
+    if pooled is None:
+        return None, 0
+    norm = math.sqrt(sum(v * v for v in pooled)) or 1.0
+    return [v / norm for v in pooled], total_chunks
+
+def _public_intel(intel_data: dict) -> dict:
+    """JSON-taugliche Sicht auf einen Intel-Record (ohne Vector/Sentinel/Text-Auszug)."""
+    return {k: v for k, v in intel_data.items() if k not in ("embedding_field", "timestamp", "text_excerpt")}
+
+def _unchanged_result(fingerprint: dict) -> dict:
+    from engine.swarm.entities import CompetitorProfile
+    return {
+        "status": "unchanged",
+        "doc_id": fingerprint.get("doc_id"),
+        "intel": fingerprint.get("intel", {}),
+        "data_points_extracted": len(fingerprint.get("intel", {}).get("skeleton", [])),
+        "profile": CompetitorProfile(**fingerprint["profile"]) if fingerprint.get("profile") else None,
+    }
+
+async def _run_pipeline(
+    url: str,
+    competitor_name: str,
+    run_id: str,
+    limits: Optional[_StageLimits] = None,
+    force: bool = False,
+    progress: Optional[dict] = None,
+    chunked: Optional[bool] = None,
+) -> dict:
+    """
+    fetch → parse → embed → persist für eine URL, mit Change-Detection:
+    unveränderte Seiten (304 oder identischer Text-Hash) liefern die gecachte Intel.
+    Im Chunked-Modus wird das ganze Dokument (statt nur raw_text[:8000]) embedded.
+    """
+    progress = progress if progress is not None else {}
+    chunked = CHUNKED_EMBEDDINGS if chunked is None else chunked
+    embedding_mode = "chunked" if chunked else "single"
+    normalized_url = normalize_url(url)
+
+    progress["stage"] = "fingerprint"
+    fingerprint = None if force else await fingerprint_store.get(normalized_url)
+    if fingerprint and fingerprint.get("embedding_mode", "single") != embedding_mode:
+        fingerprint = None
+    if fingerprint and fingerprint.get("intel"):
+        not_modified, etag, last_modified = await fingerprint_store.probe_not_modified(url, fingerprint)
+        if not_modified:
+            fingerprint_store.hits_conditional += 1
+            await fingerprint_store.touch(normalized_url, etag, last_modified)
+            return _unchanged_result(fingerprint)
+
+    progress["stage"] = "fetch"
+    async with _stage(limits, "fetch"):
+        page = await fetch_competitor_page(url)
+
+    progress["stage"] = "parse"
+    html = page.pop("html")
+    async with _stage(limits, "parse"):
+        skeleton, text_sha256 = await asyncio.to_thread(extract_skeleton_and_hash, html)
+    if not chunked:
+        del html
+    text_hash = content_fingerprint(skeleton, text_sha256)
+
+    if fingerprint and fingerprint.get("intel") and fingerprint.get("text_hash") == text_hash:
+        fingerprint_store.hits_content += 1
+        await fingerprint_store.touch(normalized_url, page["etag"], page["last_modified"])
+        return _unchanged_result(fingerprint)
+    fingerprint_store.misses += 1
+
+    progress["stage"] = "embed"
+    doc_ref, vector_values, chunk_count, written = None, None, 0, []
+    try:
+        if chunked:
+            # Eltern-Dokument zuerst (Platzhalter ohne Vektor), damit nie Chunks ohne Parent existieren
+            doc_ref = get_db().collection("competitor_intel").document()
+            async with _stage(limits, "persist"):
+                await asyncio.to_thread(_persist_intel, _build_intel_record(url, competitor_name, skeleton, None, run_id), doc_ref)
+            chunk_meta = {"competitor_id": doc_ref.id, "name": competitor_name, "url": url, "run_id": run_id}
+            # Abschnitte erst jetzt (nach der Change-Detection) lazy aus dem HTML erzeugen
+            vector_values, chunk_count = await _embed_chunks(doc_ref, iter_sections(html), chunk_meta, limits, written)
+            del html
+        if vector_values is None:
+            async with _stage(limits, "embed"):
+                vector_values = await _embed_text(skeleton["raw_text"])
+
+        progress["stage"] = "persist"
+        intel_data = _build_intel_record(url, competitor_name, skeleton, vector_values, run_id)
+        if chunk_count:
+            intel_data.update({"embedding_mode": "chunked", "chunk_count": chunk_count})
+        async with _stage(limits, "persist"):
+            doc_id = await asyncio.to_thread(_persist_intel, intel_data, doc_ref)
+    except BaseException:
+        # Auch bei Abbruch (Deadline, Client weg): keine verwaisten Chunks/Platzhalter zurücklassen
+        if doc_ref is not None:
+            try:
+                await asyncio.to_thread(_discard_document, doc_ref, written)
+            except Exception as e:
+                print(f"WARNING: Columna cleanup of {doc_ref.id} ({len(written)} chunks) failed: {e}")
+        raise
+
+    profile = _build_profile(url, skeleton)
+    async with _stage(limits, "persist"):
+        competitor_mirror.record_document(doc_id, {**intel_data, "embedding_field": vector_values})
+        await fingerprint_store.put(normalized_url, {
+            "url": url,
+            "embedding_mode": embedding_mode,
+            "text_hash": text_hash,
+            "etag": page["etag"],
+            "last_modified": page["last_modified"],
+            "doc_id": doc_id,
+            "intel": _public_intel(intel_data),
+            "profile": profile.model_dump(),
+        })
+
     return {
         "status": "success",
-        "message": f"Competitor '{competitor_name}' decompiled and synchronized to SwarmBus.",
-        "run_id": run_id,
+        "doc_id": doc_id,
+        "intel": intel_data,
         "data_points_extracted": len(skeleton["headings"]),
-        "intel": intel_data
+        "profile": profile,
     }
+
+@router.post("/columna/decompile")
+async def decompile_competitor(
+    url: str,
+    competitor_name: str,
+    session_id: Optional[str] = None,
+    force: bool = False,
+    chunked: Optional[bool] = None,
+):
+    """
+    API Endpunkt: Zieht die Seite, berechnet Embeddings und speichert
+    sie via SwarmBus für den gesamten Swarm. Unveränderte Seiten werden
+    nicht neu embedded (force=True erzwingt die volle Pipeline).
+    """
+    run_id = session_id or f"columna_{int(time.time())}"
+    bus = _new_swarm_bus(run_id)
+
+    result = await _run_pipeline(url, competitor_name, run_id, force=force, chunked=chunked)
+
+    if result["profile"] is not None:
+        _write_intel(bus, [result["profile"]], [url])
+    await bus.persist()
+
+    if result["status"] == "unchanged":
+        message = f"Competitor '{competitor_name}' unchanged since last decompile. Returning cached intel."
+    else:
+        message = f"Competitor '{competitor_name}' decompiled and synchronized to SwarmBus."
+    return {
+        "status": result["status"],
+        "message": message,
+        "run_id": run_id,
+        "data_points_extracted": result["data_points_extracted"],
+        "intel": result["intel"]
+    }
+
+
+# ── BATCH DECOMPILE ───────────────────────────────────────────────────────────
+# Getrennte Limits pro Pipeline-Stufe: Fetch ist durch den Browser-Pool begrenzt,
+# Parse ist CPU-gebunden, Embed/Persist durch Vertex- bzw. Firestore-Quotas.
+BATCH_MAX_TARGETS = int(os.getenv("COLUMNA_BATCH_MAX_TARGETS", "500"))
+FETCH_CONCURRENCY = int(os.getenv("COLUMNA_BATCH_FETCH_CONCURRENCY", str(browser_pool.size * browser_pool.pages_per_browser)))
+PARSE_CONCURRENCY = int(os.getenv("COLUMNA_BATCH_PARSE_CONCURRENCY", "4"))
+EMBED_CONCURRENCY = int(os.getenv("COLUMNA_BATCH_EMBED_CONCURRENCY", "4"))
+PERSIST_CONCURRENCY = int(os.getenv("COLUMNA_BATCH_PERSIST_CONCURRENCY", "8"))
+
+class DecompileTarget(BaseModel):
+    url: str
+    competitor_name: str
+
+class BatchDecompileRequest(BaseModel):
+    targets: List[DecompileTarget]
+    session_id: Optional[str] = None
+    force: bool = False
+    chunked: Optional[bool] = None
+
+async def _decompile_one(
+    index: int,
+    target: DecompileTarget,
+    run_id: str,
+    limits: _StageLimits,
+    force: bool,
+    chunked: Optional[bool],
+) -> dict:
+    """Eine URL durch die Pipeline. Fehler werden als Ergebnis gemeldet, nicht geworfen."""
+    progress = {"stage": "fingerprint"}
+    started = time.perf_counter()
+    result = {"index": index, "url": target.url, "competitor_name": target.competitor_name}
+    try:
+        outcome = await _run_pipeline(target.url, target.competitor_name, run_id, limits, force, progress, chunked)
+        intel = outcome["intel"]
+        result.update({
+            "status": outcome["status"],
+            "doc_id": outcome["doc_id"],
+            "data_points_extracted": outcome["data_points_extracted"],
+            "intel": _public_intel(intel) if "embedding_field" in intel else intel,
+            "_profile": outcome["profile"],
+        })
+    except HTTPException as e:
+        result.update({"status": "error", "stage": progress["stage"], "error": e.detail})
+    except Exception as e:
+        result.update({"status": "error", "stage": progress["stage"], "error": str(e)})
+    result["duration_ms"] = round((time.perf_counter() - started) * 1000, 1)
+    return result
+
+@router.post("/columna/decompile/batch")
+async def decompile_competitor_batch(req: BatchDecompileRequest):
+    """
+    Batch-Endpunkt: Dekompiliert eine Competitor-Liste nebenläufig und streamt
+    jedes Ergebnis als NDJSON-Zeile, sobald es fertig ist. Die letzte Zeile ist ein Summary.
+    """
+    if not req.targets:
+        raise HTTPException(status_code=400, detail="No targets provided.")
+    if len(req.targets) > BATCH_MAX_TARGETS:
+        raise HTTPException(status_code=400, detail=f"Too many targets ({len(req.targets)} > {BATCH_MAX_TARGETS}).")
+
+    run_id = req.session_id or f"columna_batch_{int(time.time())}"
+
+    async def stream_results():
+        limits = _StageLimits(FETCH_CONCURRENCY, PARSE_CONCURRENCY, EMBED_CONCURRENCY, PERSIST_CONCURRENCY)
+        tasks = [
+            asyncio.create_task(_decompile_one(i, target, run_id, limits, req.force, req.chunked))
+            for i, target in enumerate(req.targets)
+        ]
+        profiles, urls, failed, unchanged = [], [], 0, 0
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                result = await next_done
+                profile = result.pop("_profile", None)
+                if result["status"] == "error":
+                    failed += 1
+                elif profile is not None:
+                    profiles.append(profile)
+                    urls.append(result["url"])
+                if result["status"] == "unchanged":
+                    unchanged += 1
+                yield json.dumps(result, default=str) + "\n"
+
+            if profiles:
+                bus = _new_swarm_bus(run_id)
+                _write_intel(bus, profiles, urls)
+                await bus.persist()
+
+            yield json.dumps({
+                "status": "complete",
+                "run_id": run_id,
+                "total": len(tasks),
+                "succeeded": len(tasks) - failed,
+                "unchanged": unchanged,
+                "failed": failed,
+            }) + "\n"
+        finally:
+            # Client-Abbruch: offene Stufen nicht weiterlaufen lassen
+            for task in tasks:
+                task.cancel()
+
+    return StreamingResponse(stream_results(), media_type="application/x-ndjson")
@@ -0,0 +1,276 @@
+"""
+AGENTICUM G5 — Streaming Compliance Transformer
+================================================
+Ein Durchlauf über das Advertorial-HTML, chunkweise: injiziert AI-Act-Meta,
+JSON-LD (vor </head>) und den Footer-Disclaimer (vor </body>) und sammelt im
+selben Pass die SEO-Metriken — H1-Anzahl, Keyword-Treffer nur im sichtbaren
+Text, Heading-Outline. Es wird nie mehr als ein Chunk plus ein kleiner
+Übertrag (unvollständiger Tag / Entity) im Speicher gehalten.
+"""
+import html as html_lib
+import re
+from datetime import datetime
+from typing import Iterable, Iterator, List, Optional, Tuple
+
+CHUNK_SIZE = 64 * 1024
+MIN_KEYWORD_HITS = 3
+
+# Inhalt dieser Elemente ist nicht sichtbar
+_INVISIBLE_TAGS = {"head", "script", "style", "noscript", "template", "title"}
+# Raw-Text-Elemente: bis zum schließenden Tag nicht nach Tags parsen
+_RAW_TEXT_TAGS = {"script", "style"}
+# Im <head> erlaubte Tags; jeder andere öffnende Tag (oder <body>) schließt einen offenen <head> implizit
+_HEAD_TAGS = {"base", "link", "meta", "noscript", "script", "style", "template", "title"}
+# Grenzen dieser Tags trennen keine Wörter (alle anderen fügen ein Leerzeichen ein)
+_INLINE_TAGS = {"a", "abbr", "b", "bdi", "bdo", "cite", "code", "data", "dfn", "em", "i", "kbd", "mark",
+                "q", "s", "samp", "small", "span", "strong", "sub", "sup", "time", "u", "var"}
+_TAG_NAME = re.compile(r"</?([a-zA-Z][a-zA-Z0-9-]*)")
+_WHITESPACE = re.compile(r"\s+")
+_RAW_TEXT_END = {tag: re.compile(f"</{tag}", re.IGNORECASE) for tag in _RAW_TEXT_TAGS}
+
+
+def ai_act_meta() -> str:
+    return f"""
+    <meta name="generator" content="AGENTICUM G5 AI">
+    <meta name="ai-generated" content="true">
+    <meta name="ai-model" content="Gemini 1.5 Pro">
+    <meta name="robots" content="index, follow">
+    <script type="application/ld+json">
+    {{
+      "@context": "https://schema.org",
+      "@type": "CreativeWork",
+      "author": {{ "@type": "Organization", "name": "AGENTICUM G5" }},
+      "contentRating": "AI-Generated",
+      "sdPublisher": {{ "@type": "SoftwareApplication", "name": "Gemini 1.5 Pro" }},
+      "dateCreated": "{datetime.now().isoformat()}"
+    }}
+    </script>
+    <!-- Zero-Cookie Default: No third-party trackers before consent -->
+    """
+
+
+DISCLAIMER = """
+    <footer class="ai-act-disclaimer" style="font-size: 0.8rem; color: #666; padding: 20px; text-align: center; border-top: 1px solid #eee;">
+        Transparenzhinweis (EU AI Act): Dieser Artikel wurde durch die AGENTICUM AI
+        (Modell: Gemini 1.5) zur thematischen Unterstützung generiert und von
+        unserer Redaktion geprüft.
+    </footer>
+    """
+
+
+class ComplianceTransformer:
+    """
+    feed(chunk) → transformierter Output-Teil, close() → Rest; Metriken danach in .metrics.
+    """
+
+    def __init__(self, keyword: Optional[str] = None):
+        self.keyword = " ".join((keyword or "").casefold().split())
+        self._carry = ""
+        self._raw_text_tag: Optional[str] = None
+        self._open_invisible: List[str] = []
+        self._heading: Optional[dict] = None
+        self._head_injected = False
+        self._body_injected = False
+        self._keyword_tail = ""
+        self._last_was_space = True
+        self.h1_count = 0
+        self.keyword_hits = 0
+        self.outline: List[dict] = []
+
+    # ── Sichtbarer Text ──
+    def _visible(self, text: str):
+        text = _WHITESPACE.sub(" ", html_lib.unescape(text))
+        if not text or (text == " " and self._last_was_space):
+            return
+        if self._last_was_space and text.startswith(" "):
+            text = text[1:]
+        self._last_was_space = text.endswith(" ")
+        if self._heading is not None:
+            self._heading["text"] += text
+        if self.keyword:
+            self._count_keyword(text.casefold())
+
+    def _word_break(self):
+        if not self._last_was_space:
+            self._visible(" ")
+
+    def _count_keyword(self, text: str):
+        # Treffer über Chunk-/Tag-Grenzen: Übertrag der letzten len(keyword)-1 Zeichen,
+        # aber nie Teile eines bereits gezählten Treffers
+        window = self._keyword_tail + text
+        self.keyword_hits += window.count(self.keyword)
+        last = window.rfind(self.keyword)
+        counted_until = last + len(self.keyword) if last >= 0 else 0
+        self._keyword_tail = window[max(counted_until, len(window) - len(self.keyword) + 1):]
+
+    # ── Tags ──
+    def _tag(self, raw: str) -> str:
+        """Verarbeitet einen vollständigen Tag; gibt den Output (ggf. mit Injektion davor) zurück."""
+        match = _TAG_NAME.match(raw)
+        if not match:
+            return raw
+        name = match.group(1).lower()
+        closing = raw.startswith("</")
+        prefix = ""
+
+        if closing:
+            if name == "head" and not self._head_injected:
+                prefix = ai_act_meta() + "\n"
+                self._head_injected = True
+            elif name == "body" and not self._body_injected:
+                prefix = DISCLAIMER + "\n"
+                self._body_injected = True
+            if name in self._open_invisible:
+                index = len(self._open_invisible) - 1 - self._open_invisible[::-1].index(name)
+                del self._open_invisible[index:]
+            if self._heading is not None and name == self._heading["tag"]:
+                self._close_heading()
+        else:
+            self_closing = raw.endswith("/>")
+            if self._open_invisible and self._open_invisible[-1] == "head" and name not in _HEAD_TAGS:
+                # </head> ausgelassen (HTML erlaubt das): Head endet vor diesem Tag
+                self._open_invisible.pop()
+                if not self._head_injected:
+                    prefix = ai_act_meta() + "\n"
+                    self._head_injected = True
+            if name in _INVISIBLE_TAGS and not self_closing:
+                self._open_invisible.append(name)
+                if name in _RAW_TEXT_TAGS:
+                    self._raw_text_tag = name
+            if name in ("h1", "h2", "h3", "h4", "h5", "h6") and not self._open_invisible:
+                if self._heading is not None:
+                    self._close_heading()
+                self._heading = {"tag": name, "text": ""}
+                if name == "h1":
+                    self.h1_count += 1
+
+        if name not in _INLINE_TAGS:
+            self._word_break()
+        return prefix + raw
+
+    def _close_heading(self):
+        heading, self._heading = self._heading, None
+        self.outline.append({"level": int(heading["tag"][1]), "text": heading["text"].strip()})
+
+    # ── Scanner ──
+    def feed(self, chunk: str) -> str:
+        buffer = self._carry + chunk
+        self._carry = ""
+        out = []
+        position = 0
+        length = len(buffer)
+        while position < length:
+            if self._raw_text_tag:
+                match = _RAW_TEXT_END[self._raw_text_tag].search(buffer, position)
+                end = match.start() if match else -1
+                if end < 0:
+                    # Schließenden Tag ggf. über die Chunk-Grenze hinweg suchen
+                    safe = max(position, length - len(self._raw_text_tag) - 2)
+                    out.append(buffer[position:safe])
+                    self._carry = buffer[safe:]
+                    return "".join(out)
+                out.append(buffer[position:end])
+                self._raw_text_tag = None
+                position = end
+                continue
+
+            lt = buffer.find("<", position)
+            if lt < 0:
+                text = buffer[position:]
+                # Unvollständige Entity (&amp ohne ;) in den nächsten Chunk tragen
+                amp = text.rfind("&")
+                if amp >= 0 and ";" not in text[amp:] and len(text) - amp < 32:
+                    self._carry = text[amp:]
+                    text = text[:amp]
+                out.append(text)
+                if not self._open_invisible:
+                    self._visible(text)
+                break
+
+            if lt > position:
+                text = buffer[position:lt]
+                out.append(text)
+                if not self._open_invisible:
+                    self._visible(text)
+
+            if lt + 1 >= length:
+                self._carry = buffer[lt:]
+                break
+            if not (buffer[lt + 1].isascii() and buffer[lt + 1].isalpha()) and buffer[lt + 1] not in "/!?":
+                # "<" ohne Tag-Anfang (z.B. "a < b") ist Text, wie im HTML-Tokenizer
+                out.append("<")
+                if not self._open_invisible:
+                    self._visible("<")
+                position = lt + 1
+                continue
+
+            if buffer.startswith("<!--", lt):
+                end = buffer.find("-->", lt + 4)
+                if end < 0:
+                    self._carry = buffer[lt:]
+                    break
+                out.append(buffer[lt:end + 3])
+                position = end + 3
+                continue
+
+            gt = buffer.find(">", lt + 1)
+            if gt < 0:
+                self._carry = buffer[lt:]
+                break
+            out.append(self._tag(buffer[lt:gt + 1]))
+            position = gt + 1
+        return "".join(out)
+
+    def close(self) -> str:
+        out = self._carry
+        self._carry = ""
+        if out and not self._open_invisible and not self._raw_text_tag:
+            self._visible(out)
+        if self._heading is not None:
+            self._close_heading()
+        if not self._body_injected:
+            out += DISCLAIMER
+            self._body_injected = True
+        return out
+
+    @property
+    def metrics(self) -> dict:
+        return {
+            "h1_count": self.h1_count,
+            "keyword_hits": self.keyword_hits,
+            "outline": [f"H{h['level']}: {h['text']}" for h in self.outline],
+            "ai_act_meta_injected": self._head_injected,
+        }
+
+
+def transform_stream(chunks: Iterable[str], transformer: ComplianceTransformer) -> Iterator[str]:
+    for chunk in chunks:
+        piece = transformer.feed(chunk)
+        if piece:
+            yield piece
+    tail = transformer.close()
+    if tail:
+        yield tail
+
+
+def iter_chunks(text: str, chunk_size: int = CHUNK_SIZE) -> Iterator[str]:
+    for start in range(0, len(text), chunk_size):
+        yield text[start:start + chunk_size]
+
+
+def seo_issues(metrics: dict, keyword: Optional[str]) -> List[str]:
+    issues = []
+    if metrics["h1_count"] == 0:
+        issues.append("Missing H1 heading – Semantic failure.")
+    if keyword and metrics["keyword_hits"] < MIN_KEYWORD_HITS:
+        issues.append(f"Keyword '{keyword}' density too low ({metrics['keyword_hits']} found) – Quality gate failure.")
+    return issues
+
+
+def transform_compliance_html(html: str, keyword: Optional[str] = None, chunk_size: int = CHUNK_SIZE) -> Tuple[str, dict]:
+    """Injektion + SEO-Report in einem Pass: (compliant_html, {passed, issues, metrics})."""
+    transformer = ComplianceTransformer(keyword)
+    compliant_html = "".join(transform_stream(iter_chunks(html, chunk_size), transformer))
+    metrics = transformer.metrics
+    issues = seo_issues(metrics, keyword)
+    return compliant_html, {"passed": not issues, "issues": issues, "metrics": metrics}
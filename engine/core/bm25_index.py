@@ -0,0 +1,104 @@
+"""
+AGENTICUM G5 — In-Process BM25 Index
+=====================================
+Invertierter Index (Term → {Key: tf}) mit Okapi-BM25-Scoring.
+Upserts/Removes sind inkrementell, damit der Competitor-Spiegel neue Intel
+sofort lexikalisch findbar macht. Thread-safe wie VectorIndex.
+"""
+import math
+import re
+import threading
+from collections import Counter
+from typing import Dict, List, Optional, Tuple
+
+from engine.core.vector_index import Filters, matches_filters
+
+_TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+STOPWORDS = frozenset("""
+a an and are as at be by for from how in is it of on or that the this to was what when with your you
+der die das den dem des ein eine einer eines und oder mit für von zu zum zur im in ist sind auf aus
+bei wie was wir sie es nicht auch als an am
+""".split())
+
+
+def tokenize(text: str) -> List[str]:
+    return [t for t in _TOKEN_RE.findall(text.casefold()) if len(t) > 1 and t not in STOPWORDS]
+
+
+class BM25Index:
+    def __init__(self, k1: float = 1.5, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        self._lock = threading.RLock()
+        self._postings: Dict[str, Dict[str, int]] = {}
+        self._terms: Dict[str, Counter] = {}
+        self._lengths: Dict[str, int] = {}
+        self._meta: Dict[str, dict] = {}
+        self._total_length = 0
+
+    def __len__(self) -> int:
+        return len(self._lengths)
+
+    def upsert(self, key: str, text: str, metadata: Optional[dict] = None):
+        terms = Counter(tokenize(text))
+        with self._lock:
+            self._remove(key)
+            for term, tf in terms.items():
+                self._postings.setdefault(term, {})[key] = tf
+            self._terms[key] = terms
+            self._lengths[key] = sum(terms.values())
+            self._meta[key] = metadata or {}
+            self._total_length += self._lengths[key]
+
+    def _remove(self, key: str):
+        terms = self._terms.pop(key, None)
+        if terms is None:
+            return
+        for term in terms:
+            postings = self._postings.get(term)
+            if postings is not None:
+                postings.pop(key, None)
+                if not postings:
+                    del self._postings[term]
+        self._total_length -= self._lengths.pop(key)
+        self._meta.pop(key, None)
+
+    def remove(self, key: str):
+        with self._lock:
+            self._remove(key)
+
+    def get(self, key: str) -> Optional[dict]:
+        with self._lock:
+            return self._meta.get(key)
+
+    def search(self, query: str, k: int = 3, filters: Optional[Filters] = None) -> List[Tuple[str, float, dict]]:
+        """BM25 Top-k: [(key, score, metadata)], absteigend sortiert; nur Dokumente mit Term-Treffer."""
+        query_terms = set(tokenize(query))
+        with self._lock:
+            n = len(self._lengths)
+            if n == 0 or k <= 0 or not query_terms:
+                return []
+            avg_length = self._total_length / n or 1.0
+            scores: Dict[str, float] = {}
+            for term in query_terms:
+                postings = self._postings.get(term)
+                if not postings:
+                    continue
+                idf = math.log(1 + (n - len(postings) + 0.5) / (len(postings) + 0.5))
+                for key, tf in postings.items():
+                    norm = self.k1 * (1 - self.b + self.b * self._lengths[key] / avg_length)
+                    scores[key] = scores.get(key, 0.0) + idf * tf * (self.k1 + 1) / (tf + norm)
+
+            ranked = sorted(scores.items(), key=lambda item: -item[1])
+            results = []
+            for key, score in ranked:
+                meta = self._meta[key]
+                if not matches_filters(meta, filters):
+                    continue
+                results.append((key, score, meta))
+                if len(results) == k:
+                    break
+            return results
+
+    def stats(self) -> dict:
+        return {"documents": len(self), "terms": len(self._postings)}
@@ -0,0 +1,53 @@
+"""
+AGENTICUM G5 — Heading-Aligned Text Chunking
+=============================================
+Zerlegt Abschnitte (siehe html_skeleton.SkeletonParser) in Sliding Windows,
+die nie über eine H1–H3-Grenze hinweg laufen. Arbeitet als Generator,
+damit lange Seiten gruppenweise embedded und persistiert werden können.
+"""
+import os
+from typing import Iterable, Iterator
+
+CHUNK_WINDOW_CHARS = int(os.getenv("CHUNK_WINDOW_CHARS", "2000"))
+CHUNK_OVERLAP_CHARS = int(os.getenv("CHUNK_OVERLAP_CHARS", "200"))
+
+
+def _windows(text: str, window: int, overlap: int) -> Iterator[str]:
+    if len(text) <= window:
+        yield text
+        return
+    overlap = min(overlap, window // 4)
+    start = 0
+    while start < len(text):
+        end = min(len(text), start + window)
+        if end < len(text):
+            # Am Wortende schneiden, aber nie kürzer als ein halbes Fenster
+            cut = text.rfind(" ", start + window // 2, end)
+            if cut > start:
+                end = cut
+        piece = text[start:end].strip()
+        if piece:
+            yield piece
+        if end >= len(text):
+            break
+        next_start = end - overlap
+        space = text.find(" ", next_start, end)
+        start = space + 1 if space != -1 else next_start
+
+
+def iter_chunks(
+    sections: Iterable[dict],
+    window_chars: int = CHUNK_WINDOW_CHARS,
+    overlap_chars: int = CHUNK_OVERLAP_CHARS,
+) -> Iterator[dict]:
+    """Yieldet {index, heading, level, text} je Fenster; Index läuft über das ganze Dokument."""
+    index = 0
+    for section in sections:
+        for piece in _windows(section["text"], window_chars, overlap_chars):
+            yield {
+                "index": index,
+                "heading": section.get("heading", ""),
+                "level": section.get("level"),
+                "text": piece,
+            }
+            index += 1
@@ -0,0 +1,199 @@
+"""
+AGENTICUM G5 — Single-Pass HTML Skeleton Extractor
+====================================================
+Event-basierter Ersatz für BeautifulSoup(html, 'html.parser') in Columna.
+Headings (H1–H3), sichtbarer Body-Text (ohne script/style/nav/footer) und
+ausgehende Links werden in EINEM Durchlauf gesammelt — ohne DOM-Baum.
+Nur ein Stack offener Tags wird gehalten, damit implizit geschlossene
+Elemente sich wie im html.parser-Tree verhalten.
+"""
+import hashlib
+from collections import deque
+from html.parser import HTMLParser
+from typing import Iterator, List, Optional, Tuple
+
+# Strings in script/style/template zählen (wie bei bs4 get_text) nirgends als Text
+NO_TEXT_TAGS = frozenset({"script", "style", "template"})
+# Zusätzlich aus dem Body-Text entfernt (früher decompose())
+SKIP_TAGS = frozenset({"script", "style", "nav", "footer"}) | NO_TEXT_TAGS
+HEADING_TAGS = frozenset({"h1", "h2", "h3"})
+# Elemente ohne End-Tag (landen nie auf dem Stack)
+VOID_TAGS = frozenset({
+    "area", "base", "br", "col", "embed", "hr", "img", "input", "keygen",
+    "link", "menuitem", "meta", "param", "source", "spacer", "track", "wbr",
+})
+
+RAW_TEXT_LIMIT = 8000  # Limit für das Embedding Modell
+MAX_OUTBOUND_LINKS = 10
+SECTION_FEED_CHARS = 64 * 1024
+
+
+class SkeletonParser(HTMLParser):
+    """
+    Kann inkrementell mit feed() gefüttert werden; Ergebnis über skeleton().
+    Vom Body-Text wird nur der Anfang (raw_text_limit) gehalten, Länge und Hash
+    laufen inkrementell mit. Mit track_sections=True landen fertige, an H1–H3
+    ausgerichtete Abschnitte in `sections` (für Chunked Embeddings).
+    """
+
+    def __init__(self, raw_text_limit: Optional[int] = RAW_TEXT_LIMIT, track_sections: bool = False):
+        super().__init__(convert_charrefs=True)
+        self._stack: List[tuple] = []
+        self._skip_depth = 0
+        self._no_text_depth = 0
+        self._open_headings: List[dict] = []
+        self.headings: List[dict] = []
+        self.links: dict = {}
+
+        self._raw_text_limit = raw_text_limit
+        self._raw_parts: List[str] = []
+        self._raw_len = 0
+        self._text_chars = 0
+        self._text_count = 0
+        self._text_hash = hashlib.sha256()
+
+        self._track_sections = track_sections
+        self._section: Optional[dict] = None
+        self.sections: deque = deque()
+
+    def handle_starttag(self, tag, attrs):
+        if tag == "a":
+            href = dict(attrs).get("href")
+            if href is not None and href.startswith("http"):
+                self.links.setdefault(href, None)
+        if tag in VOID_TAGS:
+            return
+        heading = None
+        if tag in HEADING_TAGS:
+            heading = {"level": tag, "parts": []}
+            self.headings.append(heading)
+            self._open_headings.append(heading)
+            if self._track_sections:
+                self._finish_section()
+                self._section = {"heading": heading, "parts": []}
+        if tag in SKIP_TAGS:
+            self._skip_depth += 1
+        if tag in NO_TEXT_TAGS:
+            self._no_text_depth += 1
+        self._stack.append((tag, heading))
+
+    def handle_startendtag(self, tag, attrs):
+        self.handle_starttag(tag, attrs)
+        if tag not in VOID_TAGS:
+            self.handle_endtag(tag)
+
+    def handle_endtag(self, tag):
+        # Wie html.parser-Treebuilder: bis zum passenden offenen Tag poppen, verwaiste End-Tags ignorieren
+        for i in range(len(self._stack) - 1, -1, -1):
+            if self._stack[i][0] == tag:
+                break
+        else:
+            return
+        while len(self._stack) > i:
+            name, heading = self._stack.pop()
+            if name in SKIP_TAGS:
+                self._skip_depth -= 1
+            if name in NO_TEXT_TAGS:
+                self._no_text_depth -= 1
+            if heading is not None:
+                self._open_headings.remove(heading)
+
+    def handle_data(self, data):
+        text = data.strip()
+        if not text or self._no_text_depth:
+            return
+        # Headings enthalten (wie bisher) auch Text aus nav/footer innerhalb der Überschrift
+        for heading in self._open_headings:
+            heading["parts"].append(text)
+        if not self._skip_depth:
+            self._add_text(text)
+
+    def _add_text(self, text: str):
+        self._text_count += 1
+        self._text_chars += len(text)
+        self._text_hash.update(text.encode("utf-8"))
+        self._text_hash.update(b"\x00")
+        if self._raw_text_limit is None or self._raw_len < self._raw_text_limit:
+            self._raw_parts.append(text)
+            self._raw_len += len(text) + 1
+        if self._track_sections:
+            if self._section is None:
+                self._section = {"heading": None, "parts": []}
+            self._section["parts"].append(text)
+
+    def _finish_section(self):
+        section, self._section = self._section, None
+        if not section or not section["parts"]:
+            return
+        heading = section["heading"]
+        self.sections.append({
+            "heading": "".join(heading["parts"]) if heading else "",
+            "level": heading["level"] if heading else None,
+            "text": " ".join(section["parts"]),
+        })
+
+    def close(self):
+        super().close()
+        if self._track_sections:
+            self._finish_section()
+
+    def unknown_decl(self, data):
+        # <![CDATA[...]]> zählt wie bei bs4 als Text
+        if data.startswith("CDATA["):
+            self.handle_data(data[6:])
+
+    def skeleton(self) -> dict:
+        raw_text = " ".join(self._raw_parts)
+        return {
+            "headings": [{"level": h["level"], "text": "".join(h["parts"])} for h in self.headings],
+            "content_length": self._text_chars + max(0, self._text_count - 1),
+            "raw_text": raw_text[:self._raw_text_limit] if self._raw_text_limit else raw_text,
+            "outbound_links": list(self.links)[:MAX_OUTBOUND_LINKS],
+        }
+
+    def text_sha256(self) -> str:
+        """Hash über den GESAMTEN Body-Text (nicht nur raw_text) für Change-Detection."""
+        return self._text_hash.hexdigest()
+
+
+def extract_skeleton(html: str) -> dict:
+    """Extrahiert die Core-SEO-Architektur in einem Durchlauf."""
+    parser = SkeletonParser()
+    parser.feed(html)
+    parser.close()
+    return parser.skeleton()
+
+
+def extract_skeleton_and_hash(html: str) -> Tuple[dict, str]:
+    """Wie extract_skeleton, plus SHA-256 des gesamten Body-Texts aus demselben Durchlauf."""
+    parser = SkeletonParser()
+    parser.feed(html)
+    parser.close()
+    return parser.skeleton(), parser.text_sha256()
+
+
+def iter_sections(html: str, feed_chars: int = SECTION_FEED_CHARS) -> Iterator[dict]:
+    """
+    Heading-ausgerichtete Abschnitte [{heading, level, text}] als Generator: der Parser
+    wird stückweise gefüttert und fertige Abschnitte sofort weitergereicht, sodass nie
+    alle Abschnitte eines Dokuments gleichzeitig im Speicher liegen.
+    """
+    parser = SkeletonParser(raw_text_limit=0, track_sections=True)
+    start = 0
+    while start < len(html):
+        # Nur direkt vor einem "<" schneiden: html.parser reicht Text am Feed-Ende sonst
+        # fragmentiert durch, und die Text-Teile würden mit Leerzeichen verbunden
+        end = start + feed_chars
+        if end < len(html):
+            cut = html.rfind("<", start + 1, end)
+            if cut == -1:
+                cut = html.find("<", end)
+            end = cut if cut != -1 else len(html)
+        parser.feed(html[start:end])
+        start = end
+        while parser.sections:
+            yield parser.sections.popleft()
+    parser.close()
+    while parser.sections:
+        yield parser.sections.popleft()
+
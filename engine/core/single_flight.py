@@ -0,0 +1,84 @@
+"""
+AGENTICUM G5 — Single-Flight Request Coalescing
+================================================
+Gleichzeitige identische Aufrufe (gleicher Key) teilen sich einen laufenden
+Task statt je einen eigenen Modell-Call auszulösen. Nach Abschluss wird der
+Key freigegeben — das ist kein Cache. Bricht ein Aufrufer ab, läuft der Task
+für die übrigen weiter; erst wenn der letzte Aufrufer weg ist, wird er
+abgebrochen (Refcount).
+"""
+import asyncio
+import hashlib
+import json
+from typing import Any, Awaitable, Callable, Dict, TypeVar
+
+T = TypeVar("T")
+
+_groups: Dict[str, "SingleFlight"] = {}
+
+
+def normalize_prompt(prompt: str) -> str:
+    """Whitespace-Varianten desselben Prompts auf einen Key abbilden (Groß-/Kleinschreibung bleibt)."""
+    return " ".join(prompt.split())
+
+
+def flight_key(*parts: Any) -> str:
+    payload = json.dumps(parts, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class _Flight:
+    __slots__ = ("task", "waiters")
+
+    def __init__(self, task: asyncio.Task):
+        self.task = task
+        self.waiters = 0
+
+
+class SingleFlight:
+    def __init__(self, name: str):
+        self.name = name
+        self._flights: Dict[str, _Flight] = {}
+        self.leaders = 0
+        self.coalesced = 0
+        self.cancelled = 0
+        _groups[name] = self
+
+    def _release(self, key: str, flight: _Flight):
+        if self._flights.get(key) is flight:
+            del self._flights[key]
+
+    async def do(self, key: str, fn: Callable[[], Awaitable[T]]) -> T:
+        flight = self._flights.get(key)
+        if flight is None:
+            flight = _Flight(asyncio.ensure_future(fn()))
+            self._flights[key] = flight
+            flight.task.add_done_callback(lambda _, f=flight: self._release(key, f))
+            self.leaders += 1
+        else:
+            self.coalesced += 1
+
+        flight.waiters += 1
+        try:
+            # shield: Abbruch eines Aufrufers darf den geteilten Task nicht mitreißen
+            return await asyncio.shield(flight.task)
+        finally:
+            flight.waiters -= 1
+            if flight.waiters == 0 and not flight.task.done():
+                flight.task.cancel()
+                self._release(key, flight)
+                self.cancelled += 1
+
+    def stats(self) -> dict:
+        calls = self.leaders + self.coalesced
+        return {
+            "in_flight": len(self._flights),
+            "executed": self.leaders,
+            "duplicates_avoided": self.coalesced,
+            "cancelled": self.cancelled,
+            "coalesce_rate": round(self.coalesced / calls, 3) if calls else 0.0,
+        }
+
+
+def single_flight_stats() -> dict:
+    return {name: group.stats() for name, group in _groups.items()}
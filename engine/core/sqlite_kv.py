@@ -0,0 +1,125 @@
+"""
+AGENTICUM G5 — SQLite Key/Value Store
+======================================
+Kleiner persistenter Cache-Tier auf lokaler Disk (eine Tabelle, WAL-Modus).
+Einträge verfallen per TTL; bei Überschreiten von max_rows werden die am
+längsten nicht gelesenen Keys verdrängt. Synchrone API — aus async Code
+über asyncio.to_thread aufrufen.
+"""
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, Iterable, Optional
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS kv (
+    key TEXT PRIMARY KEY,
+    value BLOB NOT NULL,
+    created_at REAL NOT NULL,
+    accessed_at REAL NOT NULL
+)
+"""
+_SQLITE_MAX_VARIABLES = 900
+
+
+class SqliteKV:
+    def __init__(self, path: str, ttl_s: Optional[float] = None, max_rows: Optional[int] = None, evict_every: int = 256):
+        self.path = path
+        self.ttl_s = ttl_s
+        self.max_rows = max_rows
+        self.evict_every = evict_every
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+        self._writes_since_evict = 0
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is None:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            conn = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(_SCHEMA)
+            conn.execute("CREATE INDEX IF NOT EXISTS kv_accessed ON kv(accessed_at)")
+            self._conn = conn
+        return self._conn
+
+    def _fresh(self, created_at: float, now: float) -> bool:
+        return self.ttl_s is None or now - created_at <= self.ttl_s
+
+    def get(self, key: str) -> Optional[bytes]:
+        return self.get_many([key]).get(key)
+
+    def get_many(self, keys: Iterable[str]) -> Dict[str, bytes]:
+        keys = list(dict.fromkeys(keys))
+        now = time.time()
+        found: Dict[str, bytes] = {}
+        with self._lock:
+            conn = self._connect()
+            for start in range(0, len(keys), _SQLITE_MAX_VARIABLES):
+                chunk = keys[start:start + _SQLITE_MAX_VARIABLES]
+                placeholders = ",".join("?" * len(chunk))
+                rows = conn.execute(
+                    f"SELECT key, value, created_at FROM kv WHERE key IN ({placeholders})", chunk
+                ).fetchall()
+                found.update((key, bytes(value)) for key, value, created_at in rows if self._fresh(created_at, now))
+            if found:
+                conn.executemany("UPDATE kv SET accessed_at = ? WHERE key = ?", [(now, k) for k in found])
+        return found
+
+    def set(self, key: str, value: bytes):
+        self.set_many({key: value})
+
+    def set_many(self, items: Dict[str, bytes]):
+        if not items:
+            return
+        now = time.time()
+        with self._lock:
+            conn = self._connect()
+            conn.executemany(
+                "INSERT OR REPLACE INTO kv (key, value, created_at, accessed_at) VALUES (?, ?, ?, ?)",
+                [(k, sqlite3.Binary(v), now, now) for k, v in items.items()],
+            )
+            self._writes_since_evict += len(items)
+            if self._writes_since_evict >= self.evict_every:
+                self._evict(conn, now)
+
+    def get_json(self, key: str) -> Any:
+        raw = self.get(key)
+        return json.loads(raw) if raw is not None else None
+
+    def set_json(self, key: str, value: Any):
+        self.set(key, json.dumps(value, ensure_ascii=False, default=str).encode("utf-8"))
+
+    def delete(self, key: str):
+        with self._lock:
+            self._connect().execute("DELETE FROM kv WHERE key = ?", (key,))
+
+    def _evict(self, conn: sqlite3.Connection, now: float):
+        self._writes_since_evict = 0
+        if self.ttl_s is not None:
+            conn.execute("DELETE FROM kv WHERE created_at < ?", (now - self.ttl_s,))
+        if self.max_rows is not None:
+            (count,) = conn.execute("SELECT COUNT(*) FROM kv").fetchone()
+            if count > self.max_rows:
+                conn.execute(
+                    "DELETE FROM kv WHERE key IN (SELECT key FROM kv ORDER BY accessed_at ASC LIMIT ?)",
+                    (count - self.max_rows,),
+                )
+
+    def evict(self):
+        with self._lock:
+            self._evict(self._connect(), time.time())
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._connect().execute("SELECT COUNT(*) FROM kv").fetchone()[0]
+
+    def close(self):
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
@@ -0,0 +1,140 @@
+"""
+AGENTICUM G5 — In-Process Vector Index
+=======================================
+Float32-Matrix mit L2-normalisierten Zeilen + Metadaten pro Key.
+Cosine Top-k ist ein einziges Matrix-Vektor-Produkt; Upserts/Removes
+sind O(1) (Swap-Delete), damit ein Firestore-Listener inkrementell
+nachziehen kann. Thread-safe, weil Snapshot-Callbacks in einem
+Hintergrund-Thread laufen.
+"""
+import threading
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+Filters = Dict[str, Any]
+
+
+def matches_filters(metadata: dict, filters: Optional[Filters]) -> bool:
+    """Filterwert: Einzelwert (==), Liste/Set (in) oder Callable(value) -> bool."""
+    if not filters:
+        return True
+    for field, expected in filters.items():
+        value = metadata.get(field)
+        if callable(expected):
+            if not expected(value):
+                return False
+        elif isinstance(expected, (list, tuple, set, frozenset)):
+            if value not in expected:
+                return False
+        elif value != expected:
+            return False
+    return True
+
+
+def normalize(vector: Sequence[float]) -> np.ndarray:
+    arr = np.asarray(vector, dtype=np.float32)
+    norm = np.linalg.norm(arr)
+    return arr / norm if norm else arr
+
+
+class VectorIndex:
+    def __init__(self, initial_capacity: int = 1024):
+        self._lock = threading.RLock()
+        self._capacity = initial_capacity
+        self._matrix: Optional[np.ndarray] = None
+        self._keys: List[str] = []
+        self._meta: List[dict] = []
+        self._rows: Dict[str, int] = {}
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    @property
+    def dim(self) -> Optional[int]:
+        return None if self._matrix is None else self._matrix.shape[1]
+
+    def upsert(self, key: str, vector: Sequence[float], metadata: Optional[dict] = None):
+        row_vector = normalize(vector)
+        with self._lock:
+            if self._matrix is None:
+                self._matrix = np.zeros((self._capacity, row_vector.shape[0]), dtype=np.float32)
+            elif row_vector.shape[0] != self._matrix.shape[1]:
+                raise ValueError(f"Vector dim {row_vector.shape[0]} != index dim {self._matrix.shape[1]}")
+
+            row = self._rows.get(key)
+            if row is None:
+                row = len(self._keys)
+                if row == self._matrix.shape[0]:
+                    grown = np.zeros((row * 2, self._matrix.shape[1]), dtype=np.float32)
+                    grown[:row] = self._matrix
+                    self._matrix = grown
+                self._keys.append(key)
+                self._meta.append({})
+                self._rows[key] = row
+            self._matrix[row] = row_vector
+            self._meta[row] = metadata or {}
+
+    def remove(self, key: str):
+        with self._lock:
+            row = self._rows.pop(key, None)
+            if row is None:
+                return
+            last = len(self._keys) - 1
+            if row != last:
+                self._matrix[row] = self._matrix[last]
+                self._keys[row] = self._keys[last]
+                self._meta[row] = self._meta[last]
+                self._rows[self._keys[row]] = row
+            self._keys.pop()
+            self._meta.pop()
+
+    def get(self, key: str) -> Optional[dict]:
+        with self._lock:
+            row = self._rows.get(key)
+            return None if row is None else self._meta[row]
+
+    def search(self, query: Sequence[float], k: int = 3, filters: Optional[Filters] = None) -> List[Tuple[str, float, dict]]:
+        """Cosine Top-k: [(key, similarity, metadata)], absteigend sortiert."""
+        with self._lock:
+            n = len(self._keys)
+            if n == 0 or k <= 0:
+                return []
+            scores = self._matrix[:n] @ normalize(query)
+            if filters:
+                order = np.argsort(-scores)
+            elif k < n:
+                top = np.argpartition(-scores, k)[:k]
+                order = top[np.argsort(-scores[top])]
+            else:
+                order = np.argsort(-scores)
+
+            results = []
+            for row in order:
+                meta = self._meta[row]
+                if not matches_filters(meta, filters):
+                    continue
+                results.append((self._keys[row], float(scores[row]), meta))
+                if len(results) == k:
+                    break
+            return results
+
+    def score_matrix(self, queries: Sequence[Sequence[float]], filters: Optional[Filters] = None) -> Tuple[List[str], List[dict], np.ndarray]:
+        """Alle Queries gegen alle (gefilterten) Zeilen in einer Matrixmultiplikation: (keys, metas, Q×N-Cosine)."""
+        query_matrix = np.asarray(queries, dtype=np.float32)
+        if query_matrix.ndim == 1:
+            query_matrix = query_matrix[None, :]
+        norms = np.linalg.norm(query_matrix, axis=1, keepdims=True)
+        query_matrix = query_matrix / np.where(norms == 0, 1, norms)
+        with self._lock:
+            n = len(self._keys)
+            if n == 0:
+                return [], [], np.zeros((len(query_matrix), 0), dtype=np.float32)
+            rows = [r for r in range(n) if matches_filters(self._meta[r], filters)] if filters else list(range(n))
+            keys = [self._keys[r] for r in rows]
+            metas = [self._meta[r] for r in rows]
+            matrix = self._matrix[rows] if filters else self._matrix[:n]
+        return keys, metas, query_matrix @ matrix.T
+
+    def stats(self) -> dict:
+        return {"size": len(self), "dim": self.dim}
@@ -1,77 +1,279 @@
+import asyncio
+import os
+from typing import Optional
+
 from google.cloud import firestore
 from google.cloud.firestore_v1.base_vector_query import DistanceMeasure
 from google.cloud.firestore_v1.vector import Vector
-import vertexai
-from vertexai.language_models import TextEmbeddingModel
 
-from engine.config import PROJECT_ID, REGION
-import vertexai
+from engine.config import PROJECT_ID
+from engine.services.competitor_index import competitor_mirror
+from engine.services.embedding_cache import embedding_cache
+
+# Hybrid-Retrieval: Kandidaten je Rangliste und RRF-Konstante (üblich: 60)
+HYBRID_CANDIDATES = int(os.getenv("COUNTER_STRIKE_HYBRID_CANDIDATES", "20"))
+RRF_K = int(os.getenv("COUNTER_STRIKE_RRF_K", "60"))
+
+_db = None
 
 def get_db():
-    from google.cloud import firestore
-    return firestore.Client(project=PROJECT_ID)
+    global _db
+    if _db is None:
+        _db = firestore.Client(project=PROJECT_ID)
+    return _db
 
-def get_embedding_model():
-    from vertexai.language_models import TextEmbeddingModel
-    vertexai.init(project=PROJECT_ID, location=REGION)
-    return TextEmbeddingModel.from_pretrained("text-embedding-004")
+def _h2_structure(data: dict) -> list:
+    return [h["text"] for h in data.get("skeleton", []) if isinstance(h, dict) and h.get("level") == "h2"]
 
-def check_competitor_overlap(target_topic: str) -> list:
+def _chunk_level_overlap(db, target_embedding: list, limit: int = 3) -> list:
     """
-    Sucht in Firestore Vector Search nach ähnlichen Konkurrenz-Artikeln.
+    Matcht gegen die einzelnen Chunks (competitor_intel/{id}/chunks) statt gegen den
+    Dokument-Vektor und meldet pro Konkurrent den am stärksten überlappenden Abschnitt.
     """
-    # 1. Unser geplantes Thema vektorisieren
-    model = get_embedding_model()
-    target_embedding = model.get_embeddings([target_topic])[0].values
-    
+    vector_query = db.collection_group("chunks").find_nearest(
+        vector_field="embedding_field",
+        query_vector=Vector(target_embedding),
+        distance_measure=DistanceMeasure.COSINE,
+        limit=limit * 4,
+        distance_result_field="vector_distance",
+    )
+
+    best_by_competitor = {}
+    for doc in vector_query.get():
+        data = doc.to_dict()
+        parent_ref = doc.reference.parent.parent
+        if parent_ref is None or parent_ref.id in best_by_competitor:
+            continue  # Ergebnisse kommen sortiert: erster Treffer = bester Abschnitt
+        best_by_competitor[parent_ref.id] = (parent_ref, data)
+        if len(best_by_competitor) == limit:
+            break
+
+    parents = {snap.id: snap.to_dict() or {} for snap in db.get_all([ref for ref, _ in best_by_competitor.values()])}
+    threat_intel = []
+    for competitor_id, (_, chunk) in best_by_competitor.items():
+        parent = parents.get(competitor_id, {})
+        threat_intel.append({
+            "competitor": parent.get("name", chunk.get("name", "Unknown")),
+            "url": parent.get("url", chunk.get("url", "#")),
+            "their_h2_structure": _h2_structure(parent),
+            "similarity": round(1 - chunk.get("vector_distance", 1.0), 4),
+            "overlapping_section": {
+                "heading": chunk.get("heading", ""),
+                "level": chunk.get("level"),
+                "chunk_index": chunk.get("index"),
+                "excerpt": chunk.get("text", "")[:280],
+            },
+        })
+    return threat_intel
+
+def _hybrid_overlap(target_topic: str, target_embedding: list, filters: dict, limit: int = 3) -> list:
+    """
+    Vektor- (Cosine) und lexikalische (BM25) Rangliste aus dem Spiegel per
+    Reciprocal Rank Fusion zusammenführen: score = Σ 1 / (k + rank).
+    """
+    candidates = max(limit, HYBRID_CANDIDATES)
+    rankings = {
+        "similarity": competitor_mirror.documents.index.search(target_embedding, k=candidates, filters=filters),
+        "lexical_score": competitor_mirror.lexical.search(target_topic, k=candidates, filters=filters),
+    }
+    fused = {}
+    for field, hits in rankings.items():
+        for rank, (key, score, meta) in enumerate(hits):
+            entry = fused.setdefault(key, {"meta": meta, "rrf": 0.0})
+            entry["rrf"] += 1 / (RRF_K + rank + 1)
+            entry[field] = round(score, 4)
+
+    threat_intel = []
+    for entry in sorted(fused.values(), key=lambda e: -e["rrf"])[:limit]:
+        meta = entry["meta"]
+        threat_intel.append({
+            "competitor": meta.get("name", "Unknown"),
+            "url": meta.get("url", "#"),
+            "their_h2_structure": meta.get("h2", []),
+            **{field: entry[field] for field in rankings if field in entry},
+            "rrf_score": round(entry["rrf"], 5),
+        })
+    return threat_intel
+
+def _lexical_overlap(target_topic: str, filters: dict, limit: int = 3) -> list:
+    return [{
+        "competitor": meta.get("name", "Unknown"),
+        "url": meta.get("url", "#"),
+        "their_h2_structure": meta.get("h2", []),
+        "lexical_score": round(score, 4),
+    } for _, score, meta in competitor_mirror.lexical.search(target_topic, k=limit, filters=filters)]
+
+def _mirror_overlap(target_topic: str, target_embedding: list, chunk_level: bool, filters: dict, limit: int = 3) -> list:
+    """Top-k gegen den In-Memory-Spiegel; Filter greifen auf die Dokument-Metadaten."""
+    documents = competitor_mirror.documents.index
+    if not chunk_level or not len(competitor_mirror.chunks.index):
+        return _hybrid_overlap(target_topic, target_embedding, filters, limit)
+
+    allowed = None
+    if filters:
+        allowed = {key for key, _, _ in documents.search(target_embedding, k=len(documents), filters=filters)}
+
+    threat_intel, seen = [], set()
+    for _, similarity, chunk in competitor_mirror.chunks.index.search(
+        target_embedding,
+        k=len(competitor_mirror.chunks.index),
+        filters={"competitor_id": allowed} if allowed is not None else None,
+    ):
+        if chunk["competitor_id"] in seen:
+            continue  # Ergebnisse kommen sortiert: erster Treffer = bester Abschnitt
+        seen.add(chunk["competitor_id"])
+        parent = documents.get(chunk["competitor_id"]) or {}
+        threat_intel.append({
+            "competitor": parent.get("name", chunk.get("name", "Unknown")),
+            "url": parent.get("url", chunk.get("url", "#")),
+            "their_h2_structure": parent.get("h2", []),
+            "similarity": round(similarity, 4),
+            "overlapping_section": {
+                "heading": chunk.get("heading", ""),
+                "level": chunk.get("level"),
+                "chunk_index": chunk.get("index"),
+                "excerpt": chunk.get("excerpt", ""),
+            },
+        })
+        if len(threat_intel) == limit:
+            break
+    return threat_intel
+
+async def check_competitor_overlap(
+    target_topic: str,
+    chunk_level: bool = False,
+    competitor: Optional[str] = None,
+    status: Optional[str] = None,
+) -> list:
+    """
+    Sucht ähnliche Konkurrenz-Artikel — zuerst im In-Memory-Spiegel
+    (services/competitor_index), sonst per Firestore Vector Search.
+    Mit chunk_level=True auf Abschnittsebene inkl. überlappender Section.
+    """
+    # 1. Unser geplantes Thema vektorisieren (LRU → Disk → gebündelter Embedding Service)
+    target_embedding = await embedding_cache.embed(target_topic)
+
+    filters = {}
+    if competitor:
+        filters["name"] = competitor
+    if status:
+        filters["status"] = status
+
+    threat_intel = []
+    if competitor_mirror.ready:
+        threat_intel = _mirror_overlap(target_topic, target_embedding, chunk_level, filters)
+        if threat_intel or filters:
+            return threat_intel
+
     db = get_db()
     collection = db.collection("competitor_intel")
-    
-    # 2. Native Firestore Vector Search (find_nearest)
+
+    if chunk_level:
+        try:
+            threat_intel = await asyncio.to_thread(_chunk_level_overlap, db, target_embedding)
+        except Exception as e:
+            print(f"WARNING: Counter-Strike chunk-level search failed (likely missing index): {e}")
+
+    # 2. Native Firestore Vector Search (find_nearest) auf den Dokument-Vektoren
     # Sucht die 3 ähnlichsten Artikel der Konkurrenz
-    threat_intel = []
-    try:
-        vector_query = collection.find_nearest(
-            vector_field="embedding_field",
-            query_vector=Vector(target_embedding),
-            distance_measure=DistanceMeasure.COSINE,
-            limit=3
-        )
-        
-        results = vector_query.get()
-        
-        for doc in results:
-            data = doc.to_dict()
-            # Je nach Vektor-Distanz (Tiefer Score = Höhere Ähnlichkeit)
-            threat_intel.append({
-                "competitor": data.get("name", "Unknown"),
-                "url": data.get("url", "#"),
-                "their_h2_structure": [h["text"] for h in data.get("skeleton", []) if isinstance(h, dict) and h.get("level") == "h2"]
-            })
-    except Exception as e:
-        print(f"WARNING: Counter-Strike Vector Search failed (likely missing index): {e}")
-        
-    # 3. Fallback: Keyword search if vector search failed or returned nothing
     if not threat_intel:
-        print(f"INFO: Vector search yields no results for '{target_topic}'. Falling back to keyword matching...")
         try:
-            fallback_query = collection.limit(3).get() # Simple limit for demo excellence
-            for doc in fallback_query:
+            vector_query = collection.find_nearest(
+                vector_field="embedding_field",
+                query_vector=Vector(target_embedding),
+                distance_measure=DistanceMeasure.COSINE,
+                limit=3
+            )
+
+            results = await asyncio.to_thread(vector_query.get)
+
+            for doc in results:
                 data = doc.to_dict()
+                # Je nach Vektor-Distanz (Tiefer Score = Höhere Ähnlichkeit)
                 threat_intel.append({
-                    "competitor": data.get("name", "Market Leader"),
-                    "url": data.get("url", "https://example.com/analysis"),
-                    "their_h2_structure": [h["text"] for h in data.get("skeleton", []) if isinstance(h, dict) and h.get("level") == "h2"]
+                    "competitor": data.get("name", "Unknown"),
+                    "url": data.get("url", "#"),
+                    "their_h2_structure": _h2_structure(data)
                 })
-        except:
-            pass
-
-    # Ensure we never return an empty list for "Excellence"
+        except Exception as e:
+            print(f"WARNING: Counter-Strike Vector Search failed (likely missing index): {e}")
+        
+    # 3. Fallback: BM25 über Headings + Text-Auszug (lokaler invertierter Index)
     if not threat_intel:
+        print(f"INFO: Vector search yields no results for '{target_topic}'. Falling back to keyword matching...")
+        try:
+            await competitor_mirror.ensure_loaded()
+            threat_intel = _lexical_overlap(target_topic, filters)
+        except Exception as e:
+            print(f"WARNING: Counter-Strike keyword fallback failed: {e}")
+
+    # Platzhalter nur, solange noch gar keine Konkurrenz-Intel existiert
+    if not threat_intel and not len(competitor_mirror.lexical):
         threat_intel = [{
             "competitor": "Industry Standard",
             "url": "#",
             "their_h2_structure": ["Market Entry Strategy", "Target Audience Matrix", "Conversion Optimization"]
         }]
-        
+
     return threat_intel
+
+def _aggregate_h2_gaps(matches: list) -> list:
+    """H2s der Top-Konkurrenten, gewichtet nach Ähnlichkeit — was die Konkurrenz zum Thema abdeckt."""
+    gaps = {}
+    for _, similarity, meta in matches:
+        for heading in meta.get("h2", []):
+            key = " ".join(heading.split()).casefold()
+            gap = gaps.setdefault(key, {"heading": heading, "competitors": [], "weight": 0.0})
+            if meta.get("name") not in gap["competitors"]:
+                gap["competitors"].append(meta.get("name"))
+                gap["weight"] += similarity
+    ranked = sorted(gaps.values(), key=lambda g: (-len(g["competitors"]), -g["weight"]))
+    return [{**g, "weight": round(g["weight"], 4)} for g in ranked]
+
+async def batch_competitor_overlap(
+    topics: list,
+    top_k: int = 3,
+    competitor: Optional[str] = None,
+    status: Optional[str] = None,
+    include_matrix: bool = True,
+) -> dict:
+    """
+    Ganzer Redaktionsplan in einem Durchlauf: alle Topics gemeinsam embedden
+    (Cache + ein gebündelter Service-Call) und per einer Matrixmultiplikation
+    gegen alle Konkurrenz-Vektoren des In-Memory-Spiegels scoren.
+    """
+    topic_vectors, _ = await asyncio.gather(
+        embedding_cache.embed_many(topics),
+        competitor_mirror.ensure_loaded(),
+    )
+
+    filters = {}
+    if competitor:
+        filters["name"] = competitor
+    if status:
+        filters["status"] = status
+
+    keys, metas, scores = competitor_mirror.documents.index.score_matrix(topic_vectors, filters)
+    results = []
+    for row, topic in enumerate(topics):
+        order = scores[row].argsort()[::-1][:top_k] if keys else []
+        matches = [(keys[c], float(scores[row, c]), metas[c]) for c in order]
+        results.append({
+            "topic": topic,
+            "overlap": [{
+                "competitor": meta.get("name", "Unknown"),
+                "competitor_id": key,
+                "url": meta.get("url", "#"),
+                "their_h2_structure": meta.get("h2", []),
+                "similarity": round(similarity, 4),
+            } for key, similarity, meta in matches],
+            "h2_gaps": _aggregate_h2_gaps(matches),
+        })
+
+    response = {"topics": results, "competitor_count": len(keys)}
+    if include_matrix:
+        response["matrix"] = {
+            "competitors": [{"id": key, "name": meta.get("name", "Unknown"), "url": meta.get("url", "#")} for key, meta in zip(keys, metas)],
+            "scores": scores.astype(float).round(4).tolist(),
+        }
+    return response
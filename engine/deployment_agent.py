@@ -1,108 +1,106 @@
+import base64
+import binascii
 import os
-import hashlib
-import requests
-from google.auth import default
-from google.auth.transport.requests import Request
+from typing import Dict, List, Optional
 from fastapi import APIRouter, Depends, HTTPException
 from pydantic import BaseModel
 from .auth_middleware import verify_firebase_token
 from .config import PROJECT_ID
+from .services.hosting_client import HostingAPIError, hosting_client
 
 router = APIRouter()
 
+DEPLOY_MAX_SITES = int(os.getenv("DEPLOY_MAX_SITES", "100"))
+DEPLOY_MAX_BUNDLE_BYTES = int(os.getenv("DEPLOY_MAX_BUNDLE_BYTES", str(200 * 1024 * 1024)))
+
+class PublishAsset(BaseModel):
+    path: str                             # z.B. "/img/hero.webp"
+    content: Optional[str] = None         # Text-Assets (CSS, JS, SVG, HTML)
+    content_base64: Optional[str] = None  # Binär-Assets (Bilder, Fonts)
+
 class PublishRequest(BaseModel):
     run_id: str
-    html_content: str
-    site_id: str  # The Firebase Subdomain (e.g., "agenticum-client-a-promo")
+    html_content: Optional[str] = None    # wird zu /index.html
+    site_id: Optional[str] = None  # The Firebase Subdomain (e.g., "agenticum-client-a-promo")
+    site_ids: List[str] = []       # Kampagnen-Rollout: dasselbe Bundle auf viele Subdomains
+    assets: List[PublishAsset] = []
+    incremental: bool = False      # Fix-Loop: letzte Version klonen, nur geänderte Dateien senden
 
-def get_google_access_token():
-    """Fetches a fresh OAuth2 Access Token for the Firebase Hosting REST API."""
-    credentials, _ = default(scopes=["https://www.googleapis.com/auth/cloud-platform", "https://www.googleapis.com/auth/firebase"])
-    if not credentials.valid:
-        credentials.refresh(Request())
-    return credentials.token
+HOSTING_CONFIG = {
+    "headers": [{"glob": "**", "headers": {"Cache-Control": "max-age=1800"}}],
+    "rewrites": [{"source": "**", "destination": "/index.html"}]
+}
 
-def calculate_sha256(content: bytes) -> str:
-    """Firebase API requires SHA256 hashes of the files."""
-    return hashlib.sha256(content).hexdigest()
+def _bundle_files(req: PublishRequest) -> Dict[str, bytes]:
+    files: Dict[str, bytes] = {}
+    if req.html_content is not None:
+        files["/index.html"] = req.html_content.encode("utf-8")
+    for asset in req.assets:
+        path = "/" + asset.path.lstrip("/")
+        if asset.content_base64 is not None:
+            try:
+                files[path] = base64.b64decode(asset.content_base64, validate=True)
+            except binascii.Error:
+                raise HTTPException(status_code=400, detail=f"Asset {path}: invalid base64 content")
+        elif asset.content is not None:
+            files[path] = asset.content.encode("utf-8")
+        else:
+            raise HTTPException(status_code=400, detail=f"Asset {path} has no content")
+    if not files:
+        raise HTTPException(status_code=400, detail="Nothing to deploy: provide html_content and/or assets")
+    if sum(len(content) for content in files.values()) > DEPLOY_MAX_BUNDLE_BYTES:
+        raise HTTPException(status_code=413, detail=f"Bundle exceeds {DEPLOY_MAX_BUNDLE_BYTES} bytes")
+    return files
 
 @router.post("/publish/advertorial")
 async def publish_to_firebase(req: PublishRequest, user: dict = Depends(verify_firebase_token)):
     """
     Compiles the HTML and pushes it to Firebase Hosting via REST API.
+    Alle Schritte laufen async über den geteilten Hosting-Client (HTTP/2-Pool, Token-Cache, Retries).
+    Mehrere site_ids: Bundle einmal hashen, Sites parallel deployen, Ergebnis je Site.
     """
+    site_ids = list(dict.fromkeys(([req.site_id] if req.site_id else []) + req.site_ids))
+    if not site_ids:
+        raise HTTPException(status_code=400, detail="site_id or site_ids required")
+    if len(site_ids) > DEPLOY_MAX_SITES:
+        raise HTTPException(status_code=400, detail=f"At most {DEPLOY_MAX_SITES} sites per call")
+    files_to_upload = _bundle_files(req)
+
     try:
-        token = get_google_access_token()
-        headers = {
-            "Authorization": f"Bearer {token}",
-            "Content-Type": "application/json"
-        }
-        
-        # 1. Prepare files
-        files_to_upload = {
-            "/index.html": req.html_content.encode("utf-8")
-        }
-        
-        file_hashes = {
-            path: calculate_sha256(content) 
-            for path, content in files_to_upload.items()
-        }
-        
-        # STEP 1: Create a new version
-        version_url = f"https://firebasehosting.googleapis.com/v1beta1/sites/{req.site_id}/versions"
-        version_payload = {
-            "config": {
-                "headers": [{"glob": "**", "headers": {"Cache-Control": "max-age=1800"}}],
-                "rewrites": [{"source": "**", "destination": "/index.html"}]
+        if len(site_ids) == 1:
+            deployment = await hosting_client.deploy(site_ids[0], files_to_upload, HOSTING_CONFIG, req.incremental)
+            
+            live_url = f"https://{site_ids[0]}.web.app"
+            
+            return {
+                "status": "success",
+                "message": "Maximum Excellence. Advertorial deployed.",
+                "live_url": live_url,
+                "run_id": req.run_id,
+                "version": deployment["version"],
+                "mode": deployment["mode"],
+                "changed": deployment["changed"],
+                "files": deployment["files"],
+                "uploaded": deployment["uploaded"],
+                "timings_ms": deployment["timings_ms"]
             }
-        }
-        
-        res_version = requests.post(version_url, headers=headers, json=version_payload)
-        res_version.raise_for_status()
-        version_name = res_version.json()["name"]
-        
-        # STEP 2: Populate files
-        populate_url = f"https://firebasehosting.googleapis.com/v1beta1/{version_name}:populateFiles"
-        populate_payload = {
-            "files": {path: hash_val for path, hash_val in file_hashes.items()}
-        }
-        
-        res_populate = requests.post(populate_url, headers=headers, json=populate_payload)
-        res_populate.raise_for_status()
-        populate_data = res_populate.json()
-        
-        upload_url = populate_data.get("uploadUrl")
-        required_hashes = populate_data.get("uploadRequiredHashes", [])
-        
-        # STEP 3: Upload files
-        for path, content in files_to_upload.items():
-            file_hash = file_hashes[path]
-            if file_hash in required_hashes:
-                upload_file_url = f"{upload_url}/{file_hash}"
-                upload_headers = {
-                    "Authorization": f"Bearer {token}",
-                    "Content-Type": "application/octet-stream"
-                }
-                res_upload = requests.post(upload_file_url, headers=upload_headers, data=content)
-                res_upload.raise_for_status()
-        
-        # STEP 4: Release the version
-        release_url = f"https://firebasehosting.googleapis.com/v1beta1/sites/{req.site_id}/releases?versionName={version_name}"
-        res_release = requests.post(release_url, headers={"Authorization": f"Bearer {token}"})
-        res_release.raise_for_status()
-        
-        live_url = f"https://{req.site_id}.web.app"
-        
+
+        deployments = await hosting_client.deploy_many(site_ids, files_to_upload, HOSTING_CONFIG, req.incremental)
+        for deployment in deployments:
+            if "error" not in deployment:
+                deployment["live_url"] = f"https://{deployment['site_id']}.web.app"
+        failed = [d["site_id"] for d in deployments if "error" in d]
         return {
-            "status": "success",
-            "message": "Maximum Excellence. Advertorial deployed.",
-            "live_url": live_url,
-            "run_id": req.run_id
+            "status": "success" if not failed else ("failed" if len(failed) == len(deployments) else "partial"),
+            "message": f"{len(deployments) - len(failed)}/{len(deployments)} sites deployed.",
+            "run_id": req.run_id,
+            "failed_sites": failed,
+            "deployments": deployments
         }
         
-    except requests.exceptions.HTTPError as e:
-        print(f"Firebase API Error: {e.response.text}")
-        raise HTTPException(status_code=500, detail=f"Firebase Deployment failed: {e.response.text}")
+    except HostingAPIError as e:
+        print(f"Firebase API Error: {e}")
+        raise HTTPException(status_code=500, detail=f"Firebase Deployment failed: {e.text}")
     except Exception as e:
         print(f"Deployment Agent Exception: {e}")
         raise HTTPException(status_code=500, detail=str(e))
@@ -1,10 +1,17 @@
+import asyncio
+import os
+import time
 import vertexai
 from vertexai.generative_models import GenerativeModel, Tool, grounding
 from google.cloud import firestore
 import uuid
 from datetime import datetime, timezone
+from typing import AsyncIterator, Optional
 
 from engine.config import PROJECT_ID, REGION
+from engine.core.single_flight import SingleFlight, flight_key, normalize_prompt
+from engine.services.semantic_cache import grounding_cache
+from engine.services.llm_gateway import llm_gateway
 import vertexai
 
 vertexai.init(project=PROJECT_ID, location=REGION)
@@ -16,30 +23,24 @@ grounding_tool = Tool.from_google_search_retrieval(
 )
 
 # Gemini 1.5 Pro als Core Reasoning Engine
-model = GenerativeModel("gemini-1.5-pro-002")
+MODEL_VERSION = "gemini-1.5-pro-002"
+GENERATION_CONFIG = {"temperature": 0.2}
+model = GenerativeModel(MODEL_VERSION)
 
-async def execute_grounded_directive(directive: str, context_tags: list) -> dict:
-    """
-    Führt einen Agent-Task mit Search Grounding aus und speichert 
-    die gesamte Provenienz in Firestore (Perfect Twin).
-    """
-    run_id = f"run_{uuid.uuid4().hex[:12]}"
-    timestamp = datetime.now(timezone.utc)
-    
-    system_instruction = """
+# Identische, gleichzeitig laufende Direktiven teilen sich einen Modell-Call
+_grounding_flight = SingleFlight("grounding")
+
+SYSTEM_INSTRUCTION = """
     Du bist der Grounding & Entity Arbiter des AGENTICUM G5 OS.
     Nutze ZWINGEND die Google Search Funktion, um alle Fakten zu verifizieren.
     Liefere strukturierte, hochpräzise Pillar-Content-Bausteine für B2B SaaS.
     """
-    
-    # Model Call MIT Grounding Tool
-    response = model.generate_content(
-        f"{system_instruction}\n\nDIREKTIVE:\n{directive}",
-        tools=[grounding_tool],
-        generation_config={"temperature": 0.2}
-    )
-    
-    # Extrahieren der Grounding Metadaten
+
+def _build_prompt(directive: str) -> str:
+    return f"{SYSTEM_INSTRUCTION}\n\nDIREKTIVE:\n{directive}"
+
+def _extract_grounding(response) -> tuple:
+    """(search_queries, grounding_sources) aus den Grounding-Metadaten eines (Stream-)Responses."""
     search_queries = []
     grounding_chunks = []
     if response.candidates and response.candidates[0].grounding_metadata:
@@ -48,12 +49,17 @@ async def execute_grounded_directive(directive: str, context_tags: list) -> dict
             search_queries = list(metadata.web_search_queries)
         if hasattr(metadata, 'grounding_chunks'):
              grounding_chunks = [chunk.web.uri for chunk in metadata.grounding_chunks if hasattr(chunk, 'web')]
+    return search_queries, grounding_chunks
 
-    result_text = response.text
+def _chunk_text(response) -> str:
+    """Text eines Stream-Chunks; der letzte Chunk trägt oft nur Metadaten (response.text würde werfen)."""
+    if not response.candidates or not response.candidates[0].content:
+        return ""
+    return "".join(getattr(part, "text", "") or "" for part in response.candidates[0].content.parts)
 
-    # PERFECT TWIN: Speichere den exakten State in Firestore
-    twin_ref = db.collection("perfect_twin_logs").document(run_id)
-    twin_ref.set({
+def _twin_record(run_id: str, timestamp: datetime, directive: str, context_tags: list, result_text: str,
+                 search_queries: list, grounding_chunks: list, **telemetry) -> dict:
+    return {
         "run_id": run_id,
         "timestamp": timestamp,
         "type": "grounding",
@@ -66,13 +72,253 @@ async def execute_grounded_directive(directive: str, context_tags: list) -> dict
         "telemetry": {
             "search_queries_used": search_queries,
             "grounding_sources": grounding_chunks,
-            "model_version": "gemini-1.5-pro-002"
+            "model_version": MODEL_VERSION,
+            **telemetry,
         },
         "senate_approved": False 
-    })
+    }
+
+def _write_twin(record: dict):
+    db.collection("perfect_twin_logs").document(record["run_id"]).set(record)
+
+def _cache_telemetry(hit: dict) -> dict:
+    """Provenienz eines Cache-Treffers: aus welchem Run stammen Text und Quellen."""
+    return {"cache": {
+        "hit": hit["match"],
+        "similarity": hit["similarity"],
+        "age_s": hit["age_s"],
+        "source_run_id": hit["value"]["run_id"],
+    }}
+
+async def _cached_grounding(directive: str, context_tags: list, no_cache: bool) -> tuple:
+    """(hit, embedding) aus dem Semantic Cache; no_cache überspringt die Suche."""
+    if no_cache:
+        grounding_cache.bypassed += 1
+        return None, None
+    return await grounding_cache.lookup(directive, context_tags, model=MODEL_VERSION)
+
+def _store_grounding(directive: str, context_tags: list, embedding, run_id: str, content: str,
+                     sources: list, search_queries: list):
+    grounding_cache.store(directive, context_tags, {
+        "run_id": run_id,
+        "content": content,
+        "sources": sources,
+        "search_queries": search_queries,
+    }, embedding=embedding, model=MODEL_VERSION)
+
+async def _generate_grounded(prompt: str) -> tuple:
+    """Ein Grounding-Call: (text, search_queries, grounding_sources)."""
+    response = await llm_gateway.generate(
+        model,
+        prompt,
+        tools=[grounding_tool],
+        generation_config=GENERATION_CONFIG
+    )
+    # Extrahieren der Grounding Metadaten
+    search_queries, grounding_chunks = _extract_grounding(response)
+    return response.text, search_queries, grounding_chunks
+
+async def _ground(directive: str, context_tags: list, no_cache: bool, run_id: str, timestamp: datetime) -> tuple:
+    """Cache → (coalesced) Modell-Call. Liefert (Response-Dict, Perfect-Twin-Record) ohne zu schreiben."""
+    hit, embedding = await _cached_grounding(directive, context_tags, no_cache)
+    if hit:
+        cached = hit["value"]
+        record = _twin_record(
+            run_id, timestamp, directive, context_tags, cached["content"],
+            cached["search_queries"], cached["sources"], **_cache_telemetry(hit),
+        )
+        return {
+            "run_id": run_id,
+            "content": cached["content"],
+            "sources": cached["sources"],
+            "cached": True,
+            "source_run_id": cached["run_id"],
+        }, record
     
+    # Model Call MIT Grounding Tool (coalesced über Single-Flight)
+    prompt = _build_prompt(directive)
+    key = flight_key(MODEL_VERSION, normalize_prompt(prompt), GENERATION_CONFIG, "google_search_retrieval")
+    result_text, search_queries, grounding_chunks = await _grounding_flight.do(key, lambda: _generate_grounded(prompt))
+    _store_grounding(directive, context_tags, embedding, run_id, result_text, grounding_chunks, search_queries)
+
+    record = _twin_record(run_id, timestamp, directive, context_tags, result_text, search_queries, grounding_chunks)
     return {
         "run_id": run_id,
         "content": result_text,
         "sources": grounding_chunks
+    }, record
+
+async def execute_grounded_directive(directive: str, context_tags: list, no_cache: bool = False) -> dict:
+    """
+    Führt einen Agent-Task mit Search Grounding aus und speichert 
+    die gesamte Provenienz in Firestore (Perfect Twin).
+    Nahezu identische Direktiven werden aus dem Semantic Cache beantwortet.
+    """
+    run_id = f"run_{uuid.uuid4().hex[:12]}"
+    timestamp = datetime.now(timezone.utc)
+    result, record = await _ground(directive, context_tags, no_cache, run_id, timestamp)
+
+    # PERFECT TWIN: Speichere den exakten State in Firestore
+    await asyncio.to_thread(_write_twin, record)
+    return result
+
+async def stream_grounded_directive(directive: str, context_tags: list, no_cache: bool = False) -> AsyncIterator[dict]:
+    """
+    Streaming-Variante: yieldet {"event": "start" | "chunk" | "grounding" | "error", ...}
+    sobald das Modell Text produziert. Grounding-Quellen kommen erst mit dem
+    letzten Chunk; der Perfect-Twin-Log wird nach Stream-Ende geschrieben.
+    Ein Cache-Treffer kommt als ein einziger Chunk.
+    """
+    run_id = f"run_{uuid.uuid4().hex[:12]}"
+    timestamp = datetime.now(timezone.utc)
+    started = time.perf_counter()
+    yield {"event": "start", "run_id": run_id}
+
+    hit, embedding = await _cached_grounding(directive, context_tags, no_cache)
+    if hit:
+        cached = hit["value"]
+        yield {"event": "chunk", "text": cached["content"]}
+        await asyncio.to_thread(_write_twin, _twin_record(
+            run_id, timestamp, directive, context_tags, cached["content"],
+            cached["search_queries"], cached["sources"], streamed=True, **_cache_telemetry(hit),
+        ))
+        yield {
+            "event": "grounding",
+            "run_id": run_id,
+            "sources": cached["sources"],
+            "search_queries": cached["search_queries"],
+            "cached": True,
+            "source_run_id": cached["run_id"],
+        }
+        return
+
+    parts = []
+    search_queries, grounding_chunks = [], []
+    first_chunk_ms = None
+    try:
+        stream = llm_gateway.stream(
+            model,
+            _build_prompt(directive),
+            tools=[grounding_tool],
+            generation_config=GENERATION_CONFIG,
+        )
+        async for response in stream:
+            text = _chunk_text(response)
+            if text:
+                if first_chunk_ms is None:
+                    first_chunk_ms = round((time.perf_counter() - started) * 1000, 1)
+                parts.append(text)
+                yield {"event": "chunk", "text": text}
+            queries, sources = _extract_grounding(response)
+            search_queries = queries or search_queries
+            grounding_chunks = sources or grounding_chunks
+    except Exception as e:
+        print(f"ERROR: Grounded stream {run_id} failed: {e}")
+        yield {"event": "error", "run_id": run_id, "detail": str(e)}
+        return
+
+    result_text = "".join(parts)
+    await asyncio.to_thread(_write_twin, _twin_record(
+        run_id, timestamp, directive, context_tags, result_text, search_queries, grounding_chunks,
+        streamed=True,
+        first_chunk_ms=first_chunk_ms,
+        total_ms=round((time.perf_counter() - started) * 1000, 1),
+    ))
+    _store_grounding(directive, context_tags, embedding, run_id, result_text, grounding_chunks, search_queries)
+
+    yield {
+        "event": "grounding",
+        "run_id": run_id,
+        "sources": grounding_chunks,
+        "search_queries": search_queries,
     }
+
+
+# ── BATCH GROUNDING ──────────────────────────────────────────────────────────
+# Quota-Limits setzt der LLM-Gateway; hier nur eine Obergrenze parallel laufender Direktiven.
+BATCH_CONCURRENCY = int(os.getenv("GROUNDING_BATCH_CONCURRENCY", "8"))
+BATCH_ITEM_TIMEOUT_S = float(os.getenv("GROUNDING_BATCH_ITEM_TIMEOUT_S", "120"))
+FIRESTORE_BATCH_LIMIT = 500
+
+def _write_twins_batch(records: list):
+    """Alle Perfect-Twin-Logs eines Batches als ein Firestore-Batch-Commit (max. 500 Writes je Commit)."""
+    for start in range(0, len(records), FIRESTORE_BATCH_LIMIT):
+        batch = db.batch()
+        for record in records[start:start + FIRESTORE_BATCH_LIMIT]:
+            batch.set(db.collection("perfect_twin_logs").document(record["run_id"]), record)
+        batch.commit()
+
+async def _ground_one(index: int, directive: str, context_tags: list, no_cache: bool, timeout_s: float,
+                      semaphore: asyncio.Semaphore, batch_id: str) -> tuple:
+    """Eine Direktive im Batch. Timeouts/Fehler werden als Teilergebnis gemeldet, nicht geworfen."""
+    run_id = f"run_{uuid.uuid4().hex[:12]}"
+    timestamp = datetime.now(timezone.utc)
+    started = time.perf_counter()
+    line = {"index": index, "directive": directive, "run_id": run_id}
+    try:
+        async with semaphore:
+            result, record = await asyncio.wait_for(
+                _ground(directive, context_tags, no_cache, run_id, timestamp), timeout_s
+            )
+        line.update(result, status="success")
+    except asyncio.TimeoutError:
+        line.update(status="timeout", error=f"Exceeded {timeout_s}s")
+    except Exception as e:
+        line.update(status="error", error=str(e))
+
+    if line["status"] != "success":
+        record = _twin_record(run_id, timestamp, directive, context_tags, "", [], [], error=line["error"])
+        record.update(severity="error", message=f"Grounding fehlgeschlagen ({line['status']}) für: {directive[:50]}...")
+    duration_ms = round((time.perf_counter() - started) * 1000, 1)
+    record["telemetry"].update(batch_id=batch_id, duration_ms=duration_ms)
+    line["duration_ms"] = duration_ms
+    return line, record
+
+async def batch_grounded_directives(
+    directives: list,
+    no_cache: bool = False,
+    timeout_s: Optional[float] = None,
+    batch_id: Optional[str] = None,
+) -> AsyncIterator[dict]:
+    """
+    Grounded viele Direktiven ({"topic", "context_tags", "no_cache"}) nebenläufig und yieldet
+    jedes Ergebnis, sobald es fertig ist; zuletzt ein Summary. Die Perfect-Twin-Logs
+    aller Direktiven (auch der fehlgeschlagenen) werden am Ende gemeinsam committet.
+    """
+    batch_id = batch_id or f"grounding_batch_{uuid.uuid4().hex[:8]}"
+    semaphore = asyncio.Semaphore(BATCH_CONCURRENCY)
+    tasks = [
+        asyncio.create_task(_ground_one(
+            i, item["topic"], item.get("context_tags") or [], no_cache or item.get("no_cache", False),
+            timeout_s or BATCH_ITEM_TIMEOUT_S, semaphore, batch_id,
+        ))
+        for i, item in enumerate(directives)
+    ]
+    records, counts = [], {"success": 0, "timeout": 0, "error": 0}
+    try:
+        for next_done in asyncio.as_completed(tasks):
+            line, record = await next_done
+            records.append(record)
+            counts[line["status"]] += 1
+            yield line
+
+        twin_error = None
+        try:
+            await asyncio.to_thread(_write_twins_batch, records)
+        except Exception as e:
+            twin_error = str(e)
+            print(f"ERROR: Perfect-Twin batch commit for {batch_id} failed: {e}")
+        yield {
+            "status": "complete",
+            "batch_id": batch_id,
+            "total": len(tasks),
+            "succeeded": counts["success"],
+            "timed_out": counts["timeout"],
+            "failed": counts["error"],
+            "twin_logs_written": 0 if twin_error else len(records),
+            **({"twin_log_error": twin_error} if twin_error else {}),
+        }
+    finally:
+        # Client-Abbruch: offene Direktiven nicht weiterlaufen lassen
+        for task in tasks:
+            task.cancel()
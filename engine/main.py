@@ -1,8 +1,10 @@
+import json
 import os
 from engine.config import PROJECT_ID, REGION
-from fastapi import FastAPI
+from fastapi import FastAPI, HTTPException
+from fastapi.responses import StreamingResponse
 from engine.columna_decompiler import router as columna_router
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 from typing import List, Optional
 from engine.routers.browser_action import router as browser_action_router
 
@@ -11,6 +13,14 @@ def get_grounding_arbiter():
     from engine.grounding_arbiter import execute_grounded_directive
     return execute_grounded_directive
 
+def get_grounding_stream():
+    from engine.grounding_arbiter import stream_grounded_directive
+    return stream_grounded_directive
+
+def get_grounding_batch():
+    from engine.grounding_arbiter import batch_grounded_directives
+    return batch_grounded_directives
+
 def get_senate_evaluator():
     from engine.senate_evaluator import evaluate_content_block
     return evaluate_content_block
@@ -19,6 +29,10 @@ def get_counter_strike():
     from engine.counter_strike import check_competitor_overlap
     return check_competitor_overlap
 
+def get_counter_strike_batch():
+    from engine.counter_strike import batch_competitor_overlap
+    return batch_competitor_overlap
+
 app = FastAPI(title="AGENTICUM G5 Pillar Graph Engine")
 
 # ── CORS ──────────────────────────────────────────────────────────────────────
@@ -53,23 +67,106 @@ app.include_router(senate_router, tags=["Security Senate"])
 app.include_router(deployment_router, tags=["Deployment Agent"])
 app.include_router(browser_action_router)
 
+# ── LIFECYCLE ─────────────────────────────────────────────────────────────────
+# Warme Ressourcen starten mit der App statt pro Request.
+from engine.services.browser_pool import browser_pool
+from engine.services.fingerprint_store import fingerprint_store
+from engine.services.embedding_service import embedding_service
+from engine.services.competitor_index import competitor_mirror
+from engine.services.embedding_cache import embedding_cache
+from engine.services.semantic_cache import grounding_cache
+from engine.core.single_flight import single_flight_stats
+from engine.services.llm_gateway import llm_gateway
+from engine.services.verdict_cache import verdict_cache
+from engine.services.a11y_pool import a11y_pool
+from engine.services.hosting_client import hosting_client
+
+@app.on_event("startup")
+async def start_warm_pools():
+    try:
+        await browser_pool.start()
+    except Exception as e:
+        # Pool startet beim ersten Lease erneut (lazy)
+        print(f"WARNING: Columna BrowserPool warm start failed: {e}")
+    try:
+        await competitor_mirror.start()
+    except Exception as e:
+        # Counter-Strike fällt auf Firestore Vector Search zurück
+        print(f"WARNING: Counter-Strike competitor mirror failed to start: {e}")
+    try:
+        await a11y_pool.start()
+    except Exception as e:
+        # Pool startet beim ersten Audit erneut (lazy)
+        print(f"WARNING: Accessibility worker pool warm start failed: {e}")
+
+@app.on_event("shutdown")
+async def stop_warm_pools():
+    await a11y_pool.stop()
+    await hosting_client.close()
+    await competitor_mirror.stop()
+    await embedding_service.stop()
+    await browser_pool.stop()
+# ─────────────────────────────────────────────────────────────────────────────
+
 class PillarRequest(BaseModel):
     topic: str
     context_tags: Optional[List[str]] = []
+    no_cache: bool = False
 
 class AuditRequest(BaseModel):
     run_id: str
     content: str
+    keywords: Optional[List[str]] = None
+    sectioned: Optional[bool] = None
 
 @app.post("/engine/grounding")
 async def run_grounding(req: PillarRequest):
     arbiter = get_grounding_arbiter()
-    return await arbiter(req.topic, req.context_tags)
+    return await arbiter(req.topic, req.context_tags, no_cache=req.no_cache)
+
+@app.post("/engine/grounding/stream")
+async def run_grounding_stream(req: PillarRequest):
+    """Server-Sent Events: `chunk`-Events während der Generierung, `grounding` mit Quellen am Ende."""
+    stream = get_grounding_stream()
+
+    async def sse():
+        async for event in stream(req.topic, req.context_tags, no_cache=req.no_cache):
+            yield f"event: {event['event']}\ndata: {json.dumps(event, ensure_ascii=False)}\n\n"
+
+    return StreamingResponse(
+        sse(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+GROUNDING_BATCH_MAX_DIRECTIVES = int(os.getenv("GROUNDING_BATCH_MAX_DIRECTIVES", "50"))
+
+class GroundingBatchRequest(BaseModel):
+    directives: List[PillarRequest]
+    no_cache: bool = False
+    timeout_s: Optional[float] = None
+    batch_id: Optional[str] = None
+
+@app.post("/engine/grounding/batch")
+async def run_grounding_batch(req: GroundingBatchRequest):
+    """NDJSON: eine Zeile je Direktive sobald fertig (inkl. Timeouts/Fehler), zuletzt ein Summary."""
+    if not req.directives:
+        raise HTTPException(status_code=400, detail="No directives provided.")
+    if len(req.directives) > GROUNDING_BATCH_MAX_DIRECTIVES:
+        raise HTTPException(status_code=400, detail=f"Too many directives ({len(req.directives)} > {GROUNDING_BATCH_MAX_DIRECTIVES}).")
+    batch = get_grounding_batch()
+
+    async def ndjson():
+        directives = [d.model_dump() for d in req.directives]
+        async for line in batch(directives, no_cache=req.no_cache, timeout_s=req.timeout_s, batch_id=req.batch_id):
+            yield json.dumps(line, ensure_ascii=False, default=str) + "\n"
+
+    return StreamingResponse(ndjson(), media_type="application/x-ndjson")
 
 @app.post("/engine/audit")
 async def run_audit(req: AuditRequest):
     audit = get_senate_evaluator()
-    return await audit(req.run_id, req.content)
+    return await audit(req.run_id, req.content, keywords=req.keywords, sectioned=req.sectioned)
 
 @app.get("/health")
 async def health():
@@ -81,6 +178,22 @@ async def health():
         "region": "europe-west1"
     }
 
+@app.get("/engine/metrics")
+async def metrics():
+    return {
+        "browser_pool": browser_pool.stats(),
+        "columna_fingerprints": fingerprint_store.stats(),
+        "embeddings": embedding_service.stats(),
+        "embedding_cache": embedding_cache.stats(),
+        "grounding_cache": grounding_cache.stats(),
+        "single_flight": single_flight_stats(),
+        "llm_gateway": llm_gateway.stats(),
+        "senate_verdict_cache": verdict_cache.stats(),
+        "competitor_mirror": competitor_mirror.stats(),
+        "a11y_pool": a11y_pool.stats(),
+        "hosting_client": hosting_client.stats(),
+    }
+
 @app.get("/")
 async def root():
     return {
@@ -96,9 +209,37 @@ async def robots():
     return "User-agent: *\nDisallow: /"
 
 @app.get("/engine/counter-strike")
-async def run_counter_strike(topic: str):
+async def run_counter_strike(
+    topic: str,
+    chunk_level: bool = False,
+    competitor: Optional[str] = None,
+    status: Optional[str] = None,
+):
     overlap = get_counter_strike()
-    return {"overlap": overlap(topic)}
+    return {"overlap": await overlap(topic, chunk_level=chunk_level, competitor=competitor, status=status)}
+
+COUNTER_STRIKE_BATCH_MAX_TOPICS = int(os.getenv("COUNTER_STRIKE_BATCH_MAX_TOPICS", "500"))
+COUNTER_STRIKE_BATCH_MAX_TOP_K = int(os.getenv("COUNTER_STRIKE_BATCH_MAX_TOP_K", "50"))
+
+class CounterStrikeBatchRequest(BaseModel):
+    topics: List[str] = Field(..., min_length=1)
+    top_k: int = Field(3, ge=1, le=COUNTER_STRIKE_BATCH_MAX_TOP_K)
+    competitor: Optional[str] = None
+    status: Optional[str] = None
+    include_matrix: bool = True
+
+@app.post("/engine/counter-strike/batch")
+async def run_counter_strike_batch(req: CounterStrikeBatchRequest):
+    if len(req.topics) > COUNTER_STRIKE_BATCH_MAX_TOPICS:
+        raise HTTPException(status_code=413, detail=f"Max {COUNTER_STRIKE_BATCH_MAX_TOPICS} topics per batch")
+    batch_overlap = get_counter_strike_batch()
+    return await batch_overlap(
+        req.topics,
+        top_k=req.top_k,
+        competitor=req.competitor,
+        status=req.status,
+        include_matrix=req.include_matrix,
+    )
 
 if __name__ == "__main__":
     import uvicorn
@@ -1,12 +1,13 @@
-import json
 import asyncio
-import subprocess
 import os
-from datetime import datetime
-from typing import Optional, List
-from fastapi import APIRouter, HTTPException, Depends
+import time
+from typing import Awaitable, Callable, Optional, List
+from fastapi import APIRouter, BackgroundTasks, Depends
 from pydantic import BaseModel
 from .auth_middleware import verify_firebase_token
+from .compliance_transformer import transform_compliance_html
+from .static_wcag import static_wcag_check
+from .swarm.entities import AuditCheck, SenateVerdictEntity
 
 router = APIRouter()
 
@@ -17,125 +18,139 @@ class ComplianceRequest(BaseModel):
     target_market: str
     primary_keyword: Optional[str] = "AI Agents"
 
-def inject_eu_compliance_tags(html: str) -> str:
-    """
-    Fulfills Article 50 of the EU AI Act (Machine-readable marking)
-    and DSGVO Privacy-by-Design standards.
-    """
-    # 1. AI Act: Machine-readable meta-tags
-    ai_act_meta = f"""
-    <meta name="generator" content="AGENTICUM G5 AI">
-    <meta name="ai-generated" content="true">
-    <meta name="ai-model" content="Gemini 1.5 Pro">
-    <meta name="robots" content="index, follow">
-    <script type="application/ld+json">
-    {{
-      "@context": "https://schema.org",
-      "@type": "CreativeWork",
-      "author": {{ "@type": "Organization", "name": "AGENTICUM G5" }},
-      "contentRating": "AI-Generated",
-      "sdPublisher": {{ "@type": "SoftwareApplication", "name": "Gemini 1.5 Pro" }},
-      "dateCreated": "{datetime.now().isoformat()}"
-    }}
-    </script>
-    <!-- Zero-Cookie Default: No third-party trackers before consent -->
+async def run_accessibility_audit(html_content: str, run_id: str) -> dict:
     """
-    
-    # 2. Disclaimer Inject in the Footer
-    disclaimer = """
-    <footer class="ai-act-disclaimer" style="font-size: 0.8rem; color: #666; padding: 20px; text-align: center; border-top: 1px solid #eee;">
-        Transparenzhinweis (EU AI Act): Dieser Artikel wurde durch die AGENTICUM AI 
-        (Modell: Gemini 1.5) zur thematischen Unterstützung generiert und von 
-        unserer Redaktion geprüft.
-    </footer>
+    Uses Google Lighthouse to check WCAG 2.1 compliance.
+    Läuft über den warmen Worker-Pool (kein npx/Chrome-Start pro Request,
+    keine Temp-Datei); Überlast und Timeouts landen als Failure im Report.
     """
-    
-    # Modify HTML
-    if "</head>" in html:
-        html = html.replace("</head>", f"{ai_act_meta}\n</head>")
-    
-    if "</body>" in html:
-        html = html.replace("</body>", f"{disclaimer}\n</body>")
-    else:
-        html += disclaimer
-        
-    return html
-
-def semantic_seo_check(html: str, keyword: str) -> dict:
+    from engine.services.a11y_pool import A11yPoolSaturated, a11y_pool
+    try:
+        return await a11y_pool.audit(html_content)
+    except A11yPoolSaturated as e:
+        print(f"WARNING: Accessibility audit for {run_id} rejected: {e}")
+        return {"score": 0, "passed": False, "failures": [f"Accessibility audit capacity exhausted: {e}"]}
+
+# ── STAGE PIPELINE ───────────────────────────────────────────────────────────
+# Unabhängige Prüfungen laufen nebenläufig; ein hartes VETO bricht die
+# nachfolgenden Stages ab. Jede Stage hat eine Deadline und eine gemessene Laufzeit.
+SEO_STAGE_DEADLINE_S = float(os.getenv("SENATE_GATE_SEO_DEADLINE_S", "10"))
+STATIC_WCAG_STAGE_DEADLINE_S = float(os.getenv("SENATE_GATE_STATIC_WCAG_DEADLINE_S", "10"))
+A11Y_STAGE_DEADLINE_S = float(os.getenv("SENATE_GATE_A11Y_DEADLINE_S", "90"))
+
+class _StageResult(BaseModel):
+    name: str
+    passed: bool
+    veto: bool = False
+    score: float = 0.0
+    details: str = ""
+    duration_ms: float = 0.0
+    payload: dict = {}
+
+async def _run_stage(name: str, fn: Callable[[], Awaitable[dict]], deadline_s: float) -> _StageResult:
+    """fn liefert {passed, score, details, payload}; Timeout und Exceptions werden zu einem VETO."""
+    started = time.perf_counter()
+    try:
+        async with asyncio.timeout(deadline_s):
+            outcome = await fn()
+    except TimeoutError:
+        outcome = {"passed": False, "details": f"Stage '{name}' exceeded its {deadline_s}s deadline"}
+    except Exception as e:
+        print(f"WARNING: Senate gate stage '{name}' failed: {e}")
+        outcome = {"passed": False, "details": f"Stage '{name}' failed: {e}"}
+    return _StageResult(
+        name=name,
+        passed=outcome["passed"],
+        veto=not outcome["passed"],
+        score=outcome.get("score", 1.0 if outcome["passed"] else 0.0),
+        details=outcome.get("details", ""),
+        duration_ms=round((time.perf_counter() - started) * 1000, 2),
+        payload=outcome.get("payload", {}),
+    )
+
+async def _run_concurrently(stages: List[tuple]) -> List[_StageResult]:
     """
-    Validates logical structure and semantic density.
+    Startet alle Stages gleichzeitig. Nach einem VETO werden nur die in der Liste
+    nachfolgenden Stages abgebrochen; vorangehende laufen zu Ende. So ist das
+    gemeldete Veto immer das erste in Stage-Reihenfolge, unabhängig davon, welche
+    Stage zuerst fertig wird. Ergebnisse in Stage-Reihenfolge.
     """
-    issues = []
-    # 1. Check for H1
-    if "</h1>" not in html.lower():
-        issues.append("Missing H1 heading – Semantic failure.")
-    
-    # 2. Check Keyword Density (very basic)
-    count = html.lower().count(keyword.lower())
-    if count < 3:
-        issues.append(f"Keyword '{keyword}' density too low ({count} found) – Quality gate failure.")
-        
+    tasks = {asyncio.create_task(_run_stage(*stage)): index for index, stage in enumerate(stages)}
+    results = {}
+    pending = set(tasks)
+    first_veto = len(stages)
+    try:
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                results[tasks[task]] = task.result()
+                if results[tasks[task]].veto:
+                    first_veto = min(first_veto, tasks[task])
+            superseded = {task for task in pending if tasks[task] > first_veto}
+            for task in superseded:
+                task.cancel()
+            if superseded:
+                await asyncio.gather(*superseded, return_exceptions=True)
+            pending -= superseded
+    finally:
+        for task in pending:
+            task.cancel()
+        if pending:
+            await asyncio.gather(*pending, return_exceptions=True)
+    return [results[index] for index in sorted(results)]
+
+async def _seo_stage(draft: "ComplianceRequest") -> dict:
+    compliant_html, seo_report = await asyncio.to_thread(
+        transform_compliance_html, draft.html_content, draft.primary_keyword
+    )
     return {
-        "passed": len(issues) == 0,
-        "issues": issues
+        "passed": seo_report["passed"],
+        "details": ", ".join(seo_report["issues"]),
+        "payload": {"compliant_html": compliant_html, "issues": seo_report["issues"], "metrics": seo_report["metrics"]},
     }
 
-async def run_accessibility_audit(html_content: str, run_id: str) -> dict:
-    """
-    Uses Google Lighthouse CI to check WCAG 2.1 compliance.
-    """
-    temp_file = f"temp_{run_id}.html"
-    with open(temp_file, "w", encoding="utf-8") as f:
-        f.write(html_content)
-    
-    # Lighthouse CLI command
-    cmd = [
-        "npx", "-y", "lighthouse", temp_file,
-        "--output=json",
-        "--quiet",
-        "--only-categories=accessibility",
-        "--chrome-flags=--headless --no-sandbox"
-    ]
-    
+async def _static_wcag_stage(draft: "ComplianceRequest") -> dict:
+    # Die injizierten Compliance-Tags sind WCAG-neutral — daher parallel zum SEO-Pass auf dem Draft
+    report = await asyncio.to_thread(static_wcag_check, draft.html_content)
+    return {
+        "passed": report["passed"],
+        "details": ", ".join(report["failures"] + report["warnings"]),
+        "payload": report,
+    }
+
+async def _a11y_stage(compliant_html: str, run_id: str) -> dict:
+    report = await run_accessibility_audit(compliant_html, run_id)
+    return {
+        "passed": report["passed"],
+        "score": report["score"],
+        "details": ", ".join(report["failures"]),
+        "payload": report,
+    }
+
+def _audit_check(result: _StageResult) -> AuditCheck:
+    return AuditCheck(
+        category=result.name,
+        passed=result.passed,
+        score=result.score,
+        details=result.details,
+        duration_ms=result.duration_ms,
+    )
+
+async def _persist_verdict(bus, verdict):
+    # Läuft als BackgroundTask nach der Response — Firestore liegt nicht mehr auf dem kritischen Pfad
     try:
-        process = await asyncio.create_subprocess_exec(
-            *cmd,
-            stdout=subprocess.PIPE,
-            stderr=subprocess.PIPE
-        )
-        stdout, stderr = await process.communicate()
-        
-        if process.returncode != 0:
-            print(f"Lighthouse Error Output: {stderr.decode()}")
-            return {"score": 0, "passed": False, "failures": ["Lighthouse execution failed"]}
-
-        report = json.loads(stdout)
-        score = report["categories"]["accessibility"]["score"] * 100
-        
-        # Hardened check for critical failures
-        failed_audits = [
-            audit["title"] for audit in report["audits"].values() 
-            if audit.get("score") == 0 and audit.get("weight", 0) > 0
-        ]
-        
-        return {
-            "score": score,
-            "passed": score >= 90.0, # Adjusted for realistic baseline in dev
-            "failures": failed_audits
-        }
+        bus.write_verdict(verdict)
+        await bus.persist()
     except Exception as e:
-        print(f"Lighthouse Exception: {e}")
-        return {"score": 0, "passed": False, "failures": [f"Audit Exception: {str(e)}"]}
-    finally:
-        if os.path.exists(temp_file):
-            os.remove(temp_file)
+        print(f"WARNING: Senate verdict persist failed: {e}")
 
 @router.post("/senate/evaluate-advertorial")
-async def evaluate_advertorial(draft: ComplianceRequest, user: dict = Depends(verify_firebase_token)):
-    from datetime import datetime, timezone
-    from .config import PROJECT_ID
+async def evaluate_advertorial(
+    draft: ComplianceRequest,
+    background_tasks: BackgroundTasks,
+    user: dict = Depends(verify_firebase_token),
+):
     from engine.swarm.swarm_bus import SwarmBus
-    from engine.swarm.entities import SenateVerdictEntity, AuditCheck
     
     # Mock context for SwarmBus
     from google.adk.sessions import Session
@@ -145,53 +160,79 @@ async def evaluate_advertorial(draft: ComplianceRequest, user: dict = Depends(ve
     mock_ctx.session = mock_session
     bus = SwarmBus(mock_ctx)
 
-    # 1. Semantic SEO Gate
-    seo_report = semantic_seo_check(draft.html_content, draft.primary_keyword)
-    if not seo_report["passed"]:
-        bus.write_verdict(SenateVerdictEntity(
-            approved=False,
-            overall_score=0.0,
-            checks=[AuditCheck(category="seo", passed=False, details=", ".join(seo_report["issues"]))]
-        ))
-        await bus.persist()
+    pipeline_started = time.perf_counter()
+
+    def finish(results: List[_StageResult], extra_checks: Optional[List[AuditCheck]] = None, score: float = 0.0) -> dict:
+        checks = [_audit_check(r) for r in results] + (extra_checks or [])
+        verdict = SenateVerdictEntity(
+            approved=all(c.passed for c in checks),
+            overall_score=score,
+            checks=checks,
+        )
+        background_tasks.add_task(_persist_verdict, bus, verdict)
+        timings = {r.name: r.duration_ms for r in results}
+        timings["total"] = round((time.perf_counter() - pipeline_started) * 1000, 2)
+        return timings
+
+    # Stage-Gruppe 1 (nebenläufig): Streaming-Pass Injektion + SEO-Metriken ‖ statische WCAG-Regeln
+    group = await _run_concurrently([
+        ("seo", lambda: _seo_stage(draft), SEO_STAGE_DEADLINE_S),
+        ("wcag_static", lambda: _static_wcag_stage(draft), STATIC_WCAG_STAGE_DEADLINE_S),
+    ])
+    by_name = {r.name: r for r in group}
+    seo, static = by_name.get("seo"), by_name.get("wcag_static")
+
+    if seo is not None and seo.veto:
+        timings = finish(group)
         return {
             "status": "VETO",
             "reason": "Semantic SEO Requirements not met.",
-            "issues": seo_report["issues"],
-            "action": "TRIGGER_REWRITE"
+            "issues": seo.payload.get("issues") or [seo.details],
+            "seo_metrics": seo.payload.get("metrics", {}),
+            "action": "TRIGGER_REWRITE",
+            "timings_ms": timings
         }
 
-    # 2. Inject Compliance Tags
-    compliant_html = inject_eu_compliance_tags(draft.html_content)
-    
-    # 3. Run Accessibility Audit
-    a11y_report = await run_accessibility_audit(compliant_html, draft.run_id)
-    
-    # Final Verdict via SwarmBus
-    verdict = SenateVerdictEntity(
-        approved=a11y_report["passed"],
-        overall_score=a11y_report["score"],
-        checks=[
-            AuditCheck(category="wcag", passed=a11y_report["passed"], score=a11y_report["score"], details=", ".join(a11y_report["failures"])),
-            AuditCheck(category="eu_ai_act", passed=True, score=1.0)
-        ]
+    if static is not None and static.veto:
+        # Blockierende statische WCAG-Fehler: ohne Browser-Audit zurück in den Fix-Loop
+        timings = finish(group)
+        return {
+            "status": "VETO",
+            "reason": "Accessibility Standards (WCAG) not fulfilled (static checks).",
+            "score": 0,
+            "required_fixes": static.payload.get("failures") or [static.details],
+            "warnings": static.payload.get("warnings", []),
+            "action": "TRIGGER_FIX_LOOP",
+            "timings_ms": timings
+        }
+
+    # Stage 2: Lighthouse-Audit nur für Drafts, die alle schnellen Stages bestanden haben
+    compliant_html = seo.payload["compliant_html"]
+    a11y = await _run_stage("wcag", lambda: _a11y_stage(compliant_html, draft.run_id), A11Y_STAGE_DEADLINE_S)
+    a11y_report = a11y.payload or {"score": 0, "passed": False, "failures": [a11y.details]}
+
+    timings = finish(
+        group + [a11y],
+        extra_checks=[AuditCheck(category="eu_ai_act", passed=True, score=1.0)],
+        score=a11y_report["score"],
     )
-    bus.write_verdict(verdict)
-    await bus.persist()
-    
+
     if not a11y_report["passed"]:
         return {
             "status": "VETO",
             "reason": "Accessibility Standards (WCAG) not fulfilled.",
             "score": a11y_report["score"],
             "required_fixes": a11y_report["failures"],
-            "action": "TRIGGER_FIX_LOOP"
+            "action": "TRIGGER_FIX_LOOP",
+            "timings_ms": timings
         }
     
     return {
         "status": "APPROVED",
         "score": a11y_report["score"],
         "message": "Maximum Excellence. EU AI Act, DSGVO and WCAG fulfilled.",
+        "seo_metrics": seo.payload["metrics"],
         "html_ready_for_deploy": compliant_html,
-        "run_id": draft.run_id
+        "run_id": draft.run_id,
+        "timings_ms": timings
     }
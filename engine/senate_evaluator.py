@@ -1,6 +1,15 @@
 from pydantic import BaseModel
 from vertexai.generative_models import GenerativeModel, GenerationConfig
+from google.cloud import firestore
+import asyncio
 import json
+import os
+from typing import List, Optional
+
+from engine.core.single_flight import SingleFlight, flight_key, normalize_prompt
+from engine.services.llm_gateway import llm_gateway
+from engine.services.verdict_cache import verdict_cache
+from engine.senate_prescreen import analyze_content, metrics_for_prompt, prescreen, split_h2_sections, structure_issues
 
 class SenateEvaluation(BaseModel):
     compliance_score: int
@@ -9,7 +18,22 @@ class SenateEvaluation(BaseModel):
     feedback: str
     action_required: str
 
-senate_model = GenerativeModel("gemini-1.5-pro-002")
+SENATE_MODEL_VERSION = "gemini-1.5-pro-002"
+# Bei jeder Änderung an Prompt/Schema/Pre-Screen erhöhen — invalidiert den Verdict-Cache
+SENATE_PROMPT_VERSION = "senate-v4"
+senate_model = GenerativeModel(SENATE_MODEL_VERSION)
+
+SENATE_RESPONSE_SCHEMA = {
+    "type": "OBJECT",
+    "properties": {
+        "compliance_score": {"type": "INTEGER", "description": "0-100"},
+        "seo_excellence_score": {"type": "INTEGER", "description": "0-100"},
+        "veto_triggered": {"type": "BOOLEAN"},
+        "feedback": {"type": "STRING", "description": "Genaue Kritik falls Veto"},
+        "action_required": {"type": "STRING", "enum": ["PUBLISH", "REWRITE_REQUIRED", "DROP"]}
+    },
+    "required": ["compliance_score", "seo_excellence_score", "veto_triggered", "feedback", "action_required"]
+}
 
 from engine.config import PROJECT_ID, REGION
 import vertexai
@@ -17,47 +41,168 @@ import vertexai
 vertexai.init(project=PROJECT_ID, location=REGION)
 db = firestore.Client(project=PROJECT_ID)
 
-async def evaluate_content_block(run_id: str, content: str) -> dict:
-    """
-    Der algorithmische Senat prüft den Output des Grounding Arbiters.
-    Gibt ein striktes JSON-Schema zurück.
-    """
-    
-    senate_prompt = f"""
+# Identische, gleichzeitig laufende Audits teilen sich einen Senats-Call
+_senate_flight = SingleFlight("senate")
+
+async def _evaluate(senate_prompt: str) -> dict:
+    # Erzwinge strukturierten JSON-Output
+    response = await llm_gateway.generate(
+        senate_model,
+        senate_prompt,
+        generation_config=GenerationConfig(
+            temperature=0.0,
+            response_mime_type="application/json",
+            response_schema=SENATE_RESPONSE_SCHEMA
+        )
+    )
+    return json.loads(response.text)
+
+# Lange Artikel: Abschnitte an H2-Grenzen parallel prüfen statt eines Riesen-Prompts
+SECTION_MODE_MIN_CHARS = int(os.getenv("SENATE_SECTION_MODE_MIN_CHARS", "12000"))
+_ACTION_SEVERITY = {"PUBLISH": 0, "REWRITE_REQUIRED": 1, "DROP": 2}
+
+def _build_senate_prompt(content: str, metrics: dict) -> str:
+    return f"""
     Du bist der 'Security Senate' von AGENTICUM G5. 
     Analysiere diesen Content-Block streng nach unseren EU-first, Maximum Excellence Standards.
     Wenn SEO-Struktur (H2/H3), Entity-Dichte oder Fakten fehlen, lege ein VETO ein.
+    Die Struktur-Metriken wurden lokal gemessen — nicht erneut zählen, sondern
+    auf Faktentreue, Entity-Qualität und inhaltliche Tiefe konzentrieren.
+
+    LOKALE METRIKEN:
+{metrics_for_prompt(metrics)}
     
     CONTENT ZU PRÜFEN:
     {content}
     """
+
+def _build_section_prompt(content: str, metrics: dict, section: str) -> str:
+    # Abschnitts-Rubrik ohne Struktur-Veto: die Heading-Struktur wird einmal auf Artikel-Ebene geprüft
+    return f"""
+    Du bist der 'Security Senate' von AGENTICUM G5. 
+    Dies ist der Abschnitt '{section}' eines längeren Artikels; bewerte nur diesen Abschnitt
+    streng nach unseren EU-first, Maximum Excellence Standards.
+    Wenn Fakten falsch oder unbelegt sind, Entities fehlen oder der Abschnitt inhaltlich
+    zu dünn ist, lege ein VETO ein. Die Heading-Struktur des Artikels (H1/H2/H3) wird
+    separat geprüft — fehlende Überschriften in diesem Abschnitt sind kein Veto-Grund.
+
+    LOKALE METRIKEN DES ABSCHNITTS:
+{metrics_for_prompt(metrics)}
     
-    # Erzwinge strukturierten JSON-Output
-    response = senate_model.generate_content(
-        senate_prompt,
-        generation_config=GenerationConfig(
-            temperature=0.0,
-            response_mime_type="application/json",
-            response_schema={
-                "type": "OBJECT",
-                "properties": {
-                    "compliance_score": {"type": "INTEGER", "description": "0-100"},
-                    "seo_excellence_score": {"type": "INTEGER", "description": "0-100"},
-                    "veto_triggered": {"type": "BOOLEAN"},
-                    "feedback": {"type": "STRING", "description": "Genaue Kritik falls Veto"},
-                    "action_required": {"type": "STRING", "enum": ["PUBLISH", "REWRITE_REQUIRED", "DROP"]}
-                },
-                "required": ["compliance_score", "seo_excellence_score", "veto_triggered", "feedback", "action_required"]
-            }
-        )
+    ABSCHNITT ZU PRÜFEN:
+    {content}
+    """
+
+async def _senate_call(senate_prompt: str) -> dict:
+    key = flight_key(SENATE_MODEL_VERSION, normalize_prompt(senate_prompt), {"temperature": 0.0}, SENATE_RESPONSE_SCHEMA)
+    return await _senate_flight.do(key, lambda: _evaluate(senate_prompt))
+
+def aggregate_section_evaluations(sections: List[dict], article_issues: Optional[List[str]] = None) -> dict:
+    """
+    Scores längengewichtet, Veto = OR, Aktion = die strengste, Feedback je Abschnitt zusammengeführt.
+    article_issues (Struktur, einmal für den ganzen Artikel gemessen) erzwingen zusätzlich ein Veto.
+    """
+    total = sum(len(s["text"]) for s in sections) or 1
+    evaluations = [s["evaluation"] for s in sections]
+    feedback = [f"[Artikel] {issue}" for issue in article_issues or []]
+    feedback += [
+        f"[{s['heading'] or 'Intro'}] {s['evaluation']['feedback'].strip()}"
+        for s in sections if s["evaluation"]["feedback"].strip()
+    ]
+    actions = [e["action_required"] for e in evaluations] + (["REWRITE_REQUIRED"] if article_issues else [])
+    return {
+        "compliance_score": round(sum(e["compliance_score"] * len(s["text"]) for e, s in zip(evaluations, sections)) / total),
+        "seo_excellence_score": round(sum(e["seo_excellence_score"] * len(s["text"]) for e, s in zip(evaluations, sections)) / total),
+        "veto_triggered": bool(article_issues) or any(e["veto_triggered"] for e in evaluations),
+        "feedback": "\n".join(feedback),
+        "action_required": max(actions, key=lambda a: _ACTION_SEVERITY.get(a, 1)),
+    }
+
+async def _evaluate_sections(content: str, keywords: Optional[List[str]], metrics: dict) -> tuple:
+    """
+    Alle H2-Abschnitte nebenläufig mit der Abschnitts-Rubrik prüfen (Quota regelt der LLM-Gateway);
+    die Struktur wird nur einmal aus den Artikel-Metriken bewertet.
+    """
+    sections = split_h2_sections(content)
+
+    async def evaluate_section(section: dict) -> dict:
+        section_metrics = analyze_content(section["text"], keywords)
+        evaluation = await _senate_call(_build_section_prompt(section["text"], section_metrics, section["heading"] or "Intro"))
+        return {**section, "evaluation": SenateEvaluation(**evaluation).model_dump()}
+
+    evaluated = await asyncio.gather(*(evaluate_section(s) for s in sections))
+    per_section = [{
+        "index": i,
+        "heading": s["heading"],
+        "chars": len(s["text"]),
+        "evaluation": s["evaluation"],
+    } for i, s in enumerate(evaluated)]
+    return aggregate_section_evaluations(evaluated, structure_issues(metrics)), per_section
+
+def _update_twin(run_id: str, update: dict):
+    db.collection("perfect_twin_logs").document(run_id).update(update)
+
+async def _update_twin_logged(run_id: str, update: dict):
+    try:
+        await asyncio.to_thread(_update_twin, run_id, update)
+    except Exception as e:
+        print(f"WARNING: Perfect-Twin update for cached verdict {run_id} failed: {e}")
+
+_background_writes = set()
+
+async def evaluate_content_block(
+    run_id: str,
+    content: str,
+    keywords: Optional[List[str]] = None,
+    sectioned: Optional[bool] = None,
+) -> dict:
+    """
+    Der algorithmische Senat prüft den Output des Grounding Arbiters.
+    Gibt ein striktes JSON-Schema zurück. Eindeutige Fälle entscheidet der
+    lokale Pre-Screen ohne Modell-Call; lange Artikel werden abschnittsweise
+    (H2) parallel geprüft und aggregiert (sectioned=None → automatisch).
+    Identischer Content (Rewrite-Loop, Retries) kommt aus dem Verdict-Cache.
+    """
+    cache_key = verdict_cache.key_for(
+        content, SENATE_MODEL_VERSION, SENATE_PROMPT_VERSION,
+        keywords=sorted(keywords or []), sectioned=sectioned,
     )
+    cached = await verdict_cache.get(cache_key)
+    if cached is not None:
+        # Perfect Twin des neuen run_id trotzdem aktualisieren — im Hintergrund, der Hit bleibt < 10 ms
+        task = asyncio.create_task(_update_twin_logged(run_id, {
+            **cached["twin_update"],
+            "senate_cache": {"hit": True, "key": cache_key, "source_run_id": cached["run_id"]},
+        }))
+        _background_writes.add(task)
+        task.add_done_callback(_background_writes.discard)
+        return cached["twin_update"]["senate_evaluation"]
+
+    metrics = analyze_content(content, keywords)
+    evaluation = prescreen(metrics)
+    source = "prescreen"
+    per_section = None
+
+    if evaluation is None:
+        if sectioned is None:
+            sectioned = len(content) >= SECTION_MODE_MIN_CHARS and metrics["h2_count"] >= 2
+        if sectioned:
+            evaluation, per_section = await _evaluate_sections(content, keywords, metrics)
+            source = "gemini_sectioned"
+        else:
+            evaluation = await _senate_call(_build_senate_prompt(content, metrics))
+            source = "gemini"
+    evaluation = SenateEvaluation(**evaluation).model_dump()
     
-    evaluation = json.loads(response.text)
-    
-    # PERFECT TWIN UPDATE
-    db.collection("perfect_twin_logs").document(run_id).update({
+    # PERFECT TWIN UPDATE (je Aufrufer, auch wenn der Call geteilt wurde)
+    twin_update = {
         "senate_evaluation": evaluation,
-        "senate_approved": not evaluation["veto_triggered"]
-    })
+        "senate_approved": not evaluation["veto_triggered"],
+        "senate_prescreen": {**metrics, "decided_by": source},
+    }
+    if per_section is not None:
+        twin_update["senate_sections"] = per_section
+    await asyncio.to_thread(_update_twin, run_id, twin_update)
+    await verdict_cache.put(cache_key, {"run_id": run_id, "twin_update": twin_update})
     
     return evaluation
@@ -0,0 +1,135 @@
+"""
+AGENTICUM G5 — Senate Pre-Screen
+=================================
+Deterministische lokale Analyse vor dem Gemini-Senat: Heading-Struktur,
+Entity-Dichte, Absatz-/Längen-Statistik und Keyword-Abdeckung. Eindeutige
+Fälle (keine H2/H3, zu kurz, kein einziges Keyword) bekommen sofort ein VETO;
+nur Grenzfälle gehen an das Modell — zusammen mit diesen Metriken.
+"""
+import os
+import re
+from typing import List, Optional
+
+MIN_WORDS = int(os.getenv("SENATE_PRESCREEN_MIN_WORDS", "120"))
+DROP_BELOW_WORDS = int(os.getenv("SENATE_PRESCREEN_DROP_BELOW_WORDS", "20"))
+
+_MD_HEADING = re.compile(r"^(#{1,6})\s+(.+?)\s*#*\s*$", re.MULTILINE)
+_HTML_HEADING = re.compile(r"<h([1-6])[^>]*>(.*?)</h\1\s*>", re.IGNORECASE | re.DOTALL)
+_TAG = re.compile(r"<[^>]+>")
+_WORD = re.compile(r"\w+(?:[-'’]\w+)*", re.UNICODE)
+_PARAGRAPH_SPLIT = re.compile(r"\n\s*\n|</p\s*>", re.IGNORECASE)
+# Entity-Heuristik, die auch für Deutsch (alle Nomen groß) trägt:
+# Akronyme (SEO, DSGVO), CamelCase-Marken (HubSpot), Zahlen/Jahre/Prozente,
+# sowie Folgen aus ≥2 großgeschriebenen Wörtern (Google Search Console).
+_ENTITY = re.compile(
+    r"\b[A-ZÄÖÜ]{2,}[0-9]*\b"
+    r"|\b[A-Za-zäöü]+[A-Z][a-z]+\w*\b"
+    r"|\b\d[\d.,]*\s?%?"
+    r"|\b[A-ZÄÖÜ][\wäöüß]+(?:\s+[A-ZÄÖÜ][\wäöüß]+)+"
+)
+
+
+def _headings(content: str) -> List[dict]:
+    headings = [{"level": len(m.group(1)), "text": m.group(2).strip()} for m in _MD_HEADING.finditer(content)]
+    headings += [{"level": int(m.group(1)), "text": _TAG.sub("", m.group(2)).strip()} for m in _HTML_HEADING.finditer(content)]
+    return headings
+
+
+def analyze_content(content: str, keywords: Optional[List[str]] = None) -> dict:
+    headings = _headings(content)
+    body = _TAG.sub(" ", _HTML_HEADING.sub(" ", _MD_HEADING.sub(" ", content)))
+    words = _WORD.findall(body)
+    word_count = len(words)
+
+    paragraphs = [p for p in (_TAG.sub(" ", part).strip() for part in _PARAGRAPH_SPLIT.split(_MD_HEADING.sub("", content))) if p]
+    paragraph_words = [len(_WORD.findall(p)) for p in paragraphs]
+
+    entities = {m.group(0).strip() for m in _ENTITY.finditer(body)}
+    lowered = " ".join(w.casefold() for w in words)
+    keywords = [k for k in (keywords or []) if k.strip()]
+    covered = [k for k in keywords if " ".join(_WORD.findall(k.casefold())) in lowered]
+
+    level_counts = {f"h{level}_count": sum(1 for h in headings if h["level"] == level) for level in (1, 2, 3)}
+    return {
+        **level_counts,
+        "outline": [f"H{h['level']}: {h['text']}" for h in headings if h["level"] <= 3][:30],
+        "word_count": word_count,
+        "char_count": len(body.strip()),
+        "paragraph_count": len(paragraphs),
+        "avg_paragraph_words": round(sum(paragraph_words) / len(paragraph_words), 1) if paragraph_words else 0.0,
+        "max_paragraph_words": max(paragraph_words, default=0),
+        "entity_count": len(entities),
+        "entity_density_per_100_words": round(len(entities) * 100 / word_count, 2) if word_count else 0.0,
+        "keywords_total": len(keywords),
+        "keyword_coverage": round(len(covered) / len(keywords), 3) if keywords else None,
+        "missing_keywords": [k for k in keywords if k not in covered],
+    }
+
+
+def structure_issues(metrics: dict) -> List[str]:
+    """Strukturprüfung auf Artikel-Ebene (nie pro Abschnitt — ein H2-Abschnitt hat naturgemäß genau eine H2)."""
+    if metrics["h2_count"] + metrics["h3_count"] == 0:
+        return ["Keine SEO-Struktur: weder H2 noch H3 vorhanden."]
+    return []
+
+
+def prescreen(metrics: dict) -> Optional[dict]:
+    """
+    VETO als SenateEvaluation-Dict, wenn der Content eindeutig durchfällt; sonst None
+    (Grenzfall → Gemini-Senat).
+    """
+    reasons = []
+    if metrics["word_count"] < MIN_WORDS:
+        reasons.append(f"Zu kurz: {metrics['word_count']} Wörter (Minimum {MIN_WORDS}).")
+    reasons += structure_issues(metrics)
+    if metrics["entity_count"] == 0 and metrics["word_count"] > 0:
+        reasons.append("Keine Entities (Marken, Akronyme, Zahlen, Eigennamen) erkannt.")
+    if metrics["keyword_coverage"] == 0:
+        reasons.append(f"Keines der Ziel-Keywords abgedeckt: {', '.join(metrics['missing_keywords'])}.")
+    if not reasons:
+        return None
+
+    structure = min(metrics["h2_count"] + metrics["h3_count"], 5) * 10
+    depth = min(metrics["word_count"] / max(MIN_WORDS, 1), 1.0) * 30
+    entities = min(metrics["entity_density_per_100_words"], 5) * 4
+    return {
+        "compliance_score": int(min(depth + entities + 20, 60)),
+        "seo_excellence_score": int(min(structure + depth / 2, 40)),
+        "veto_triggered": True,
+        "feedback": "Pre-Screen VETO: " + " ".join(reasons),
+        "action_required": "DROP" if metrics["word_count"] < DROP_BELOW_WORDS else "REWRITE_REQUIRED",
+    }
+
+
+def metrics_for_prompt(metrics: dict) -> str:
+    """Kompakte Metrik-Zusammenfassung für den Senats-Prompt (Struktur muss das Modell nicht selbst zählen)."""
+    lines = [
+        f"- Headings: H1={metrics['h1_count']}, H2={metrics['h2_count']}, H3={metrics['h3_count']}",
+        f"- Umfang: {metrics['word_count']} Wörter, {metrics['paragraph_count']} Absätze "
+        f"(Ø {metrics['avg_paragraph_words']}, max {metrics['max_paragraph_words']} Wörter)",
+        f"- Entities: {metrics['entity_count']} ({metrics['entity_density_per_100_words']} je 100 Wörter)",
+    ]
+    if metrics["keyword_coverage"] is not None:
+        missing = ", ".join(metrics["missing_keywords"]) or "keine"
+        lines.append(f"- Keyword-Abdeckung: {metrics['keyword_coverage']:.0%} (fehlend: {missing})")
+    return "\n".join(lines)
+
+
+_H2_BOUNDARY = re.compile(r"^##\s+(.+?)\s*#*\s*$|<h2[^>]*>(.*?)</h2\s*>", re.MULTILINE | re.IGNORECASE | re.DOTALL)
+
+
+def split_h2_sections(content: str) -> List[dict]:
+    """
+    Zerlegt Content an H2-Grenzen in [{heading, text}]. Der Teil vor der ersten
+    H2 (Intro, H1) wird dem ersten Abschnitt vorangestellt.
+    """
+    boundaries = list(_H2_BOUNDARY.finditer(content))
+    if not boundaries:
+        return [{"heading": "", "text": content}]
+    sections = []
+    for i, match in enumerate(boundaries):
+        start = 0 if i == 0 else match.start()
+        end = boundaries[i + 1].start() if i + 1 < len(boundaries) else len(content)
+        heading = _TAG.sub("", match.group(1) or match.group(2) or "").strip()
+        sections.append({"heading": heading, "text": content[start:end].strip()})
+    return sections
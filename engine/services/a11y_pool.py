@@ -0,0 +1,283 @@
+"""
+AGENTICUM G5 — Accessibility Audit Worker Pool
+===============================================
+Ersetzt `npx -y lighthouse` pro Request: N langlebige Node-Worker
+(engine/a11y_worker/worker.mjs) halten je ein warmes Chromium und
+auditieren nacheinander. Das HTML wird nicht als Temp-Datei geschrieben,
+sondern von einem lokalen In-Memory-Server (aiohttp, 127.0.0.1) ausgeliefert.
+Bounded Queue + Timeouts; Ergebnisse im bisherigen {score, passed, failures}-Format.
+"""
+import asyncio
+import itertools
+import json
+import os
+import secrets
+import time
+from collections import deque
+from typing import Dict, List, Optional
+
+from aiohttp import web
+
+WORKER_SCRIPT = os.path.join(os.path.dirname(os.path.dirname(__file__)), "a11y_worker", "worker.mjs")
+POOL_SIZE = int(os.getenv("A11Y_WORKERS", "2"))
+MAX_QUEUE = int(os.getenv("A11Y_MAX_QUEUE", "16"))
+JOB_TIMEOUT_S = float(os.getenv("A11Y_JOB_TIMEOUT_S", "45"))
+QUEUE_TIMEOUT_S = float(os.getenv("A11Y_QUEUE_TIMEOUT_S", "30"))
+WORKER_START_TIMEOUT_S = float(os.getenv("A11Y_WORKER_START_TIMEOUT_S", "30"))
+PASS_SCORE = float(os.getenv("A11Y_PASS_SCORE", "90"))
+
+
+class A11yPoolSaturated(Exception):
+    """Queue voll oder Wartezeit überschritten."""
+
+
+class _PageServer:
+    """Liefert registrierte HTML-Seiten aus dem Speicher unter /pages/{token}."""
+
+    def __init__(self):
+        self.pages: Dict[str, str] = {}
+        self._runner: Optional[web.AppRunner] = None
+        self.port: Optional[int] = None
+
+    async def start(self):
+        app = web.Application()
+        app.router.add_get("/pages/{token}", self._serve)
+        self._runner = web.AppRunner(app, access_log=None)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, "127.0.0.1", 0)
+        await site.start()
+        self.port = site._server.sockets[0].getsockname()[1]
+
+    async def stop(self):
+        if self._runner:
+            await self._runner.cleanup()
+            self._runner = None
+
+    async def _serve(self, request: web.Request) -> web.Response:
+        html = self.pages.get(request.match_info["token"])
+        if html is None:
+            raise web.HTTPNotFound()
+        return web.Response(text=html, content_type="text/html", charset="utf-8")
+
+    def register(self, html: str) -> str:
+        token = secrets.token_urlsafe(16)
+        self.pages[token] = html
+        return token
+
+    def url_for(self, token: str) -> str:
+        return f"http://127.0.0.1:{self.port}/pages/{token}"
+
+
+class _Worker:
+    def __init__(self, worker_id: int):
+        self.worker_id = worker_id
+        self.process: Optional[asyncio.subprocess.Process] = None
+        self._reader: Optional[asyncio.Task] = None
+        self._pending: Dict[int, asyncio.Future] = {}
+        self._ready: Optional[asyncio.Future] = None
+        self.jobs = 0
+        self.restarts = 0
+
+    @property
+    def alive(self) -> bool:
+        return self.process is not None and self.process.returncode is None
+
+    async def start(self):
+        # Eigenes Pending-Dict je Prozess: der Reader eines alten Prozesses räumt nur seine Jobs ab
+        self._pending = {}
+        self._ready = asyncio.get_running_loop().create_future()
+        self.process = await asyncio.create_subprocess_exec(
+            "node", WORKER_SCRIPT,
+            stdin=asyncio.subprocess.PIPE,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.DEVNULL,
+            limit=4 * 1024 * 1024,
+        )
+        self._reader = asyncio.create_task(self._read(self.process, self._pending, self._ready))
+        await asyncio.wait_for(self._ready, WORKER_START_TIMEOUT_S)
+
+    async def _read(self, process, pending: Dict[int, asyncio.Future], ready: asyncio.Future):
+        while True:
+            line = await process.stdout.readline()
+            if not line:
+                break
+            try:
+                message = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+            if message.get("id") is None:
+                if not ready.done():
+                    if message.get("ready"):
+                        ready.set_result(True)
+                    else:
+                        ready.set_exception(RuntimeError(message.get("error", "worker start failed")))
+                continue
+            future = pending.pop(message["id"], None)
+            if future and not future.done():
+                future.set_result(message)
+        # Prozess beendet: alle offenen Jobs scheitern lassen
+        for future in pending.values():
+            if not future.done():
+                future.set_exception(RuntimeError("a11y worker exited"))
+        pending.clear()
+        if not ready.done():
+            ready.set_exception(RuntimeError("a11y worker exited during start"))
+
+    async def stop(self):
+        if self.alive:
+            self.process.stdin.close()
+            try:
+                await asyncio.wait_for(self.process.wait(), 5)
+            except asyncio.TimeoutError:
+                self.process.kill()
+                await self.process.wait()
+        if self._reader:
+            self._reader.cancel()
+
+    async def restart(self):
+        self.restarts += 1
+        if self.alive:
+            self.process.kill()
+            await self.process.wait()
+        await self.start()
+
+    async def run(self, job_id: int, url: str) -> dict:
+        future = asyncio.get_running_loop().create_future()
+        self._pending[job_id] = future
+        self.process.stdin.write((json.dumps({"id": job_id, "url": url}) + "\n").encode("utf-8"))
+        await self.process.stdin.drain()
+        self.jobs += 1
+        return await future
+
+
+class A11yWorkerPool:
+    def __init__(self, size: int = POOL_SIZE, max_queue: int = MAX_QUEUE, job_timeout: float = JOB_TIMEOUT_S):
+        self.size = size
+        self.max_queue = max_queue
+        self.job_timeout = job_timeout
+        self._server = _PageServer()
+        self._idle: Optional[asyncio.Queue] = None
+        self._workers: List[_Worker] = []
+        self._job_ids = itertools.count(1)
+        self._start_lock: Optional[asyncio.Lock] = None
+        self._waiting = 0
+        self.started = False
+        self.audits = 0
+        self.timeouts = 0
+        self.errors = 0
+        self.rejected = 0
+        self.cancelled = 0
+        self._background = set()
+        self._durations_ms = deque(maxlen=512)
+
+    async def start(self):
+        if self._start_lock is None:
+            self._start_lock = asyncio.Lock()
+        async with self._start_lock:
+            if self.started:
+                return
+            await self._server.start()
+            self._idle = asyncio.Queue()
+            self._workers = [_Worker(i) for i in range(self.size)]
+            results = await asyncio.gather(*(w.start() for w in self._workers), return_exceptions=True)
+            for worker, result in zip(self._workers, results):
+                if isinstance(result, Exception):
+                    print(f"WARNING: a11y worker {worker.worker_id} failed to start: {result}")
+                self._idle.put_nowait(worker)
+            self.started = True
+            print(f"INFO: a11y worker pool started ({self.size} workers, page server :{self._server.port})")
+
+    async def stop(self):
+        if not self.started:
+            return
+        await asyncio.gather(*(w.stop() for w in self._workers), return_exceptions=True)
+        await self._server.stop()
+        self.started = False
+
+    async def _acquire(self) -> _Worker:
+        if not self._idle.empty():
+            return self._idle.get_nowait()
+        if self._waiting >= self.max_queue:
+            self.rejected += 1
+            raise A11yPoolSaturated(f"{self._waiting} audits already queued")
+        self._waiting += 1
+        try:
+            return await asyncio.wait_for(self._idle.get(), QUEUE_TIMEOUT_S)
+        except asyncio.TimeoutError:
+            self.rejected += 1
+            raise A11yPoolSaturated(f"No a11y worker free within {QUEUE_TIMEOUT_S}s")
+        finally:
+            self._waiting -= 1
+
+    async def audit(self, html: str) -> dict:
+        """Auditiert HTML und liefert {score, passed, failures}; wirft A11yPoolSaturated bei Überlast."""
+        if not self.started:
+            await self.start()
+        worker = await self._acquire()
+        token = self._server.register(html)
+        started = time.perf_counter()
+        try:
+            if not worker.alive:
+                await worker.restart()
+            message = await asyncio.wait_for(
+                worker.run(next(self._job_ids), self._server.url_for(token)), self.job_timeout
+            )
+            if "error" in message:
+                self.errors += 1
+                return {"score": 0, "passed": False, "failures": [f"Lighthouse execution failed: {message['error']}"]}
+            self.audits += 1
+            score = round(float(message["score"]), 1)
+            return {"score": score, "passed": score >= PASS_SCORE, "failures": message.get("failures", [])}
+        except asyncio.CancelledError:
+            # Aufrufer abgebrochen (Stage-Deadline, Client weg): der Job läuft im Worker weiter,
+            # daher erst nach einem Neustart wieder in den Idle-Pool
+            recycle, worker = worker, None
+            task = asyncio.create_task(self._recycle(recycle))
+            self._background.add(task)
+            task.add_done_callback(self._background.discard)
+            raise
+        except asyncio.TimeoutError:
+            # Hängender Lighthouse-Run: Worker neu starten, damit die Queue weiterläuft
+            self.timeouts += 1
+            try:
+                await worker.restart()
+            except Exception as e:
+                print(f"WARNING: a11y worker {worker.worker_id} restart failed: {e}")
+            return {"score": 0, "passed": False, "failures": [f"Accessibility audit timed out after {self.job_timeout}s"]}
+        except Exception as e:
+            self.errors += 1
+            return {"score": 0, "passed": False, "failures": [f"Audit Exception: {e}"]}
+        finally:
+            self._server.pages.pop(token, None)
+            self._durations_ms.append((time.perf_counter() - started) * 1000)
+            if worker is not None:
+                self._idle.put_nowait(worker)
+
+    async def _recycle(self, worker: _Worker):
+        self.cancelled += 1
+        try:
+            await worker.restart()
+        except Exception as e:
+            print(f"WARNING: a11y worker {worker.worker_id} restart failed: {e}")
+        self._idle.put_nowait(worker)
+
+    def stats(self) -> dict:
+        durations = sorted(self._durations_ms)
+        return {
+            "started": self.started,
+            "workers": self.size,
+            "alive": sum(1 for w in self._workers if w.alive),
+            "idle": self._idle.qsize() if self._idle else 0,
+            "queued": self._waiting,
+            "audits": self.audits,
+            "timeouts": self.timeouts,
+            "errors": self.errors,
+            "rejected": self.rejected,
+            "cancelled": self.cancelled,
+            "restarts": sum(w.restarts for w in self._workers),
+            "audit_ms_p50": round(durations[len(durations) // 2], 1) if durations else 0.0,
+            "audit_ms_p95": round(durations[int(len(durations) * 0.95) - 1], 1) if durations else 0.0,
+        }
+
+
+a11y_pool = A11yWorkerPool()
@@ -0,0 +1,300 @@
+"""
+AGENTICUM G5 — Warm Chromium Pool
+==================================
+Langlebiger Browser-Pool für Columna (fetch_competitor_dom).
+Chromium startet einmal mit der App; pro Request gibt es nur noch einen
+frischen BrowserContext + Page. Browser werden nach N Leases oder bei
+Überschreiten des RSS-Limits recycelt, tote Browser per Health-Check ersetzt.
+"""
+import asyncio
+import os
+import time
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, List, Optional
+
+from playwright.async_api import Browser, Page, Playwright, async_playwright
+
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+POOL_SIZE = int(os.getenv("COLUMNA_BROWSER_POOL_SIZE", "2"))
+PAGES_PER_BROWSER = int(os.getenv("COLUMNA_BROWSER_PAGES_PER_BROWSER", "4"))
+MAX_USES = int(os.getenv("COLUMNA_BROWSER_MAX_USES", "200"))
+MAX_RSS_MB = int(os.getenv("COLUMNA_BROWSER_MAX_RSS_MB", "1024"))
+MAX_WAITERS = int(os.getenv("COLUMNA_BROWSER_MAX_WAITERS", "32"))
+ACQUIRE_TIMEOUT_S = float(os.getenv("COLUMNA_BROWSER_ACQUIRE_TIMEOUT_S", "20"))
+HEALTH_INTERVAL_S = float(os.getenv("COLUMNA_BROWSER_HEALTH_INTERVAL_S", "30"))
+
+BROWSER_ARGS = [
+    "--disable-gpu",
+    "--disable-dev-shm-usage",
+    "--disable-blink-features=AutomationControlled",
+]
+
+
+class BrowserPoolSaturated(Exception):
+    """Admission Control: zu viele wartende Leases oder Timeout beim Warten."""
+
+
+class _BrowserSlot:
+    def __init__(self, slot_id: int):
+        self.slot_id = slot_id
+        self.browser: Optional[Browser] = None
+        self.pid: Optional[int] = None
+        self.uses = 0
+        self.active = 0
+        self.draining = False
+        self.recycling = False
+        self.started_at = 0.0
+
+    @property
+    def healthy(self) -> bool:
+        return self.browser is not None and self.browser.is_connected()
+
+    def rss_mb(self) -> Optional[float]:
+        """RSS des Chromium-Hauptprozesses inkl. Renderer/GPU-Kindprozesse."""
+        if psutil is None or self.pid is None:
+            return None
+        try:
+            root = psutil.Process(self.pid)
+            procs = [root] + root.children(recursive=True)
+            return sum(p.memory_info().rss for p in procs) / (1024 * 1024)
+        except psutil.Error:
+            return None
+
+
+class BrowserPool:
+    """
+    Pool aus `size` Chromium-Instanzen mit je `pages_per_browser` gleichzeitigen Leases.
+    Jeder Lease bekommt einen eigenen BrowserContext (keine Cookies/Cache-Leaks zwischen Requests).
+    """
+
+    def __init__(
+        self,
+        size: int = POOL_SIZE,
+        pages_per_browser: int = PAGES_PER_BROWSER,
+        max_uses: int = MAX_USES,
+        max_rss_mb: int = MAX_RSS_MB,
+        max_waiters: int = MAX_WAITERS,
+        acquire_timeout: float = ACQUIRE_TIMEOUT_S,
+        health_interval: float = HEALTH_INTERVAL_S,
+    ):
+        self.size = max(1, size)
+        self.pages_per_browser = max(1, pages_per_browser)
+        self.max_uses = max_uses
+        self.max_rss_mb = max_rss_mb
+        self.max_waiters = max_waiters
+        self.acquire_timeout = acquire_timeout
+        self.health_interval = health_interval
+
+        self._playwright: Optional[Playwright] = None
+        self._slots: List[_BrowserSlot] = []
+        self._cond: Optional[asyncio.Condition] = None
+        self._launch_lock: Optional[asyncio.Lock] = None
+        self._start_lock: Optional[asyncio.Lock] = None
+        self._health_task: Optional[asyncio.Task] = None
+        self._waiters = 0
+        self._started = False
+
+        self.leases_total = 0
+        self.rejected_total = 0
+        self.recycled_total = 0
+        self.wait_ms_total = 0.0
+
+    async def start(self):
+        if self._started:
+            return
+        if self._start_lock is None:
+            self._start_lock = asyncio.Lock()
+        async with self._start_lock:
+            if self._started:
+                return
+            self._cond = asyncio.Condition()
+            self._launch_lock = asyncio.Lock()
+            self._playwright = await async_playwright().start()
+            self._slots = [_BrowserSlot(i) for i in range(self.size)]
+            for slot in self._slots:
+                await self._launch(slot)
+            self._health_task = asyncio.create_task(self._health_loop())
+            self._started = True
+            print(f"INFO: Columna BrowserPool started ({self.size} browsers x {self.pages_per_browser} pages)")
+
+    async def stop(self):
+        if not self._started:
+            return
+        self._started = False
+        if self._health_task:
+            self._health_task.cancel()
+            self._health_task = None
+        for slot in self._slots:
+            await self._close(slot)
+        if self._playwright:
+            await self._playwright.stop()
+            self._playwright = None
+        print("INFO: Columna BrowserPool stopped")
+
+    async def _launch(self, slot: _BrowserSlot):
+        # Launch serialisieren, damit der neue Chromium-Root-Prozess eindeutig zuordenbar ist
+        async with self._launch_lock:
+            before = _chromium_roots()
+            slot.browser = await self._playwright.chromium.launch(headless=True, args=BROWSER_ARGS)
+            new_roots = _chromium_roots() - before
+            slot.pid = min(new_roots) if new_roots else None
+        slot.uses = 0
+        slot.draining = False
+        slot.started_at = time.time()
+
+    async def _close(self, slot: _BrowserSlot):
+        browser, slot.browser, slot.pid = slot.browser, None, None
+        if browser is None:
+            return
+        try:
+            await browser.close()
+        except Exception as e:
+            print(f"WARNING: BrowserPool slot {slot.slot_id} close failed: {e}")
+
+    async def _recycle(self, slot: _BrowserSlot, reason: str):
+        if slot.recycling:
+            return
+        slot.recycling = True
+        print(f"INFO: BrowserPool recycling slot {slot.slot_id} ({reason})")
+        try:
+            await self._close(slot)
+            await self._launch(slot)
+        except Exception as e:
+            # Slot bleibt leer; Health-Loop versucht es erneut
+            print(f"WARNING: BrowserPool relaunch of slot {slot.slot_id} failed: {e}")
+        finally:
+            slot.recycling = False
+        self.recycled_total += 1
+        async with self._cond:
+            self._cond.notify_all()
+
+    def _pick_slot(self) -> Optional[_BrowserSlot]:
+        candidates = [
+            s for s in self._slots
+            if s.healthy and not s.draining and s.active < self.pages_per_browser
+        ]
+        if not candidates:
+            return None
+        return min(candidates, key=lambda s: s.active)
+
+    async def _acquire_slot(self) -> _BrowserSlot:
+        if self._waiters >= self.max_waiters:
+            self.rejected_total += 1
+            raise BrowserPoolSaturated(f"BrowserPool saturated ({self._waiters} requests waiting)")
+
+        started = time.perf_counter()
+        self._waiters += 1
+        try:
+            async with self._cond:
+                await asyncio.wait_for(
+                    self._cond.wait_for(lambda: self._pick_slot() is not None),
+                    timeout=self.acquire_timeout,
+                )
+                slot = self._pick_slot()
+                slot.active += 1
+                slot.uses += 1
+        except asyncio.TimeoutError:
+            self.rejected_total += 1
+            raise BrowserPoolSaturated(f"No browser lease available within {self.acquire_timeout}s")
+        finally:
+            self._waiters -= 1
+        self.leases_total += 1
+        self.wait_ms_total += (time.perf_counter() - started) * 1000
+        return slot
+
+    async def _release_slot(self, slot: _BrowserSlot):
+        async with self._cond:
+            slot.active -= 1
+            if slot.uses >= self.max_uses:
+                slot.draining = True
+            self._cond.notify_all()
+        if slot.draining and slot.active == 0:
+            await self._recycle(slot, f"max_uses={self.max_uses} reached")
+
+    @asynccontextmanager
+    async def lease_page(self) -> AsyncIterator[Page]:
+        """Leased eine Page in einem frischen Context. Context wird beim Verlassen geschlossen."""
+        if not self._started:
+            await self.start()
+        slot = await self._acquire_slot()
+        context = None
+        try:
+            context = await slot.browser.new_context()
+            page = await context.new_page()
+            yield page
+        finally:
+            if context is not None:
+                try:
+                    await context.close()
+                except Exception:
+                    pass
+            await self._release_slot(slot)
+
+    async def health_check(self):
+        """Ersetzt abgestürzte Browser und markiert Browser über dem RSS-Limit zum Recycling."""
+        for slot in self._slots:
+            if not slot.healthy:
+                if slot.active == 0:
+                    await self._recycle(slot, "disconnected")
+                continue
+            rss = slot.rss_mb()
+            if rss is not None and rss > self.max_rss_mb:
+                slot.draining = True
+                if slot.active == 0:
+                    await self._recycle(slot, f"rss={rss:.0f}MB > {self.max_rss_mb}MB")
+
+    async def _health_loop(self):
+        while True:
+            await asyncio.sleep(self.health_interval)
+            try:
+                await self.health_check()
+            except Exception as e:
+                print(f"WARNING: BrowserPool health check failed: {e}")
+
+    def stats(self) -> dict:
+        return {
+            "started": self._started,
+            "size": self.size,
+            "pages_per_browser": self.pages_per_browser,
+            "waiting": self._waiters,
+            "leases_total": self.leases_total,
+            "rejected_total": self.rejected_total,
+            "recycled_total": self.recycled_total,
+            "avg_wait_ms": round(self.wait_ms_total / self.leases_total, 2) if self.leases_total else 0.0,
+            "browsers": [
+                {
+                    "slot": s.slot_id,
+                    "healthy": s.healthy,
+                    "active": s.active,
+                    "uses": s.uses,
+                    "draining": s.draining,
+                    "rss_mb": s.rss_mb(),
+                }
+                for s in self._slots
+            ],
+        }
+
+
+def _chromium_roots() -> set:
+    """PIDs aller Chromium-Hauptprozesse unterhalb dieses Python-Prozesses."""
+    if psutil is None:
+        return set()
+    roots = set()
+    try:
+        for proc in psutil.Process().children(recursive=True):
+            try:
+                name = proc.name().lower()
+                if ("chrom" in name or "headless_shell" in name) and "--type=" not in " ".join(proc.cmdline()):
+                    roots.add(proc.pid)
+            except psutil.Error:
+                continue
+    except psutil.Error:
+        pass
+    return roots
+
+
+browser_pool = BrowserPool()
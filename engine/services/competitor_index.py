@@ -0,0 +1,225 @@
+"""
+AGENTICUM G5 — Competitor Intel Mirror
+=======================================
+In-Memory-Spiegel der `competitor_intel`-Embeddings (Dokument- und Chunk-Ebene)
+für Counter-Strike. Sync inkrementell über Firestore Snapshot-Listener; falls
+der Listener nicht aufgebaut werden kann, per periodischem Delta-Pull über
+`timestamp`. Overlap-Checks laufen so in Millisekunden lokal und funktionieren
+auch ohne Firestore-Vector-Index.
+"""
+import asyncio
+import os
+import threading
+from typing import Callable, Iterable, Optional, Tuple
+
+from engine.config import PROJECT_ID
+from engine.core.bm25_index import BM25Index
+from engine.core.vector_index import VectorIndex
+
+MIRROR_ENABLED = os.getenv("COUNTER_STRIKE_MIRROR_ENABLED", "true").lower() == "true"
+POLL_INTERVAL_S = float(os.getenv("COUNTER_STRIKE_MIRROR_POLL_INTERVAL_S", "60"))
+
+Entry = Tuple[str, Optional[list], dict]
+
+
+def _h2_structure(data: dict) -> list:
+    return [h["text"] for h in data.get("skeleton", []) if isinstance(h, dict) and h.get("level") == "h2"]
+
+
+def _vector_of(data: dict) -> Optional[list]:
+    vector = data.get("embedding_field")
+    return list(vector) if vector is not None else None
+
+
+def document_entry(doc_id: str, data: dict) -> Entry:
+    return doc_id, _vector_of(data), {
+        "competitor_id": doc_id,
+        "name": data.get("name", "Unknown"),
+        "url": data.get("url", "#"),
+        "status": data.get("status"),
+        "threat_score": data.get("threat_score"),
+        "run_id": data.get("run_id"),
+        "h2": _h2_structure(data),
+    }
+
+
+def document_text(data: dict) -> str:
+    """Lexikalischer Inhalt eines Intel-Dokuments: Name, alle Headings, Text-Auszug."""
+    headings = [h.get("text", "") for h in data.get("skeleton", []) if isinstance(h, dict)]
+    return " ".join([data.get("name", ""), *headings, data.get("text_excerpt", "")])
+
+
+def chunk_entry(competitor_id: str, chunk_id: str, data: dict) -> Entry:
+    return f"{competitor_id}/{chunk_id}", _vector_of(data), {
+        "competitor_id": competitor_id,
+        "name": data.get("name", "Unknown"),
+        "url": data.get("url", "#"),
+        "heading": data.get("heading", ""),
+        "level": data.get("level"),
+        "index": data.get("index"),
+        "excerpt": data.get("text", "")[:280],
+    }
+
+
+def _snapshot_entry(snapshot, is_chunk: bool) -> Entry:
+    data = snapshot.to_dict() or {}
+    if is_chunk:
+        parent = snapshot.reference.parent.parent
+        return chunk_entry(parent.id if parent else "", snapshot.id, data)
+    return document_entry(snapshot.id, data)
+
+
+class _MirroredCollection:
+    def __init__(self, name: str, query_factory: Callable, is_chunk: bool, lexical: Optional[BM25Index] = None):
+        self.name = name
+        self.index = VectorIndex()
+        self.lexical = lexical
+        self.ready = threading.Event()
+        self._query_factory = query_factory
+        self._is_chunk = is_chunk
+        self._watch = None
+        self._last_seen = None
+        self.changes_applied = 0
+
+    def _apply(self, snapshot, removed: bool = False):
+        key, vector, meta = _snapshot_entry(snapshot, self._is_chunk)
+        if removed or vector is None:
+            self.index.remove(key)
+        else:
+            self.index.upsert(key, vector, meta)
+        if self.lexical is not None:
+            if removed:
+                self.lexical.remove(key)
+            else:
+                self.lexical.upsert(key, document_text(snapshot.to_dict() or {}), meta)
+        self.changes_applied += 1
+
+    def _on_snapshot(self, docs, changes, read_time):
+        # Erster Callback liefert alle Dokumente als ADDED (= Initial Load)
+        for change in changes:
+            try:
+                self._apply(change.document, removed=change.type.name == "REMOVED")
+            except Exception as e:
+                print(f"WARNING: Mirror '{self.name}' skipped {change.document.id}: {e}")
+        self.ready.set()
+
+    def start_listener(self):
+        self._watch = self._query_factory().on_snapshot(self._on_snapshot)
+
+    def stop_listener(self):
+        if self._watch is not None:
+            self._watch.unsubscribe()
+            self._watch = None
+
+    @property
+    def listening(self) -> bool:
+        return self._watch is not None
+
+    def pull_delta(self):
+        """Fallback ohne Listener: nur Dokumente mit neuerem `timestamp` nachladen (Löschungen bleiben unsichtbar)."""
+        query = self._query_factory()
+        if self._last_seen is not None:
+            query = query.where("timestamp", ">", self._last_seen)
+        for snapshot in query.order_by("timestamp").stream():
+            self._apply(snapshot)
+            self._last_seen = (snapshot.to_dict() or {}).get("timestamp", self._last_seen)
+        self.ready.set()
+
+    def stats(self) -> dict:
+        return {
+            **self.index.stats(),
+            **({"lexical": self.lexical.stats()} if self.lexical is not None else {}),
+            "ready": self.ready.is_set(),
+            "mode": "listener" if self.listening else "delta_pull",
+            "changes_applied": self.changes_applied,
+        }
+
+
+class CompetitorIntelMirror:
+    def __init__(self, poll_interval: float = POLL_INTERVAL_S):
+        self.poll_interval = poll_interval
+        self._db = None
+        self._poll_task: Optional[asyncio.Task] = None
+        self.documents = _MirroredCollection(
+            "competitor_intel", lambda: self._get_db().collection("competitor_intel"), is_chunk=False,
+            lexical=BM25Index(),
+        )
+        self.chunks = _MirroredCollection(
+            "chunks", lambda: self._get_db().collection_group("chunks"), is_chunk=True
+        )
+
+    def _get_db(self):
+        if self._db is None:
+            from google.cloud import firestore
+            self._db = firestore.Client(project=PROJECT_ID)
+        return self._db
+
+    @property
+    def ready(self) -> bool:
+        return self.documents.ready.is_set() and len(self.documents.index) > 0
+
+    @property
+    def lexical(self) -> BM25Index:
+        return self.documents.lexical
+
+    async def start(self):
+        if not MIRROR_ENABLED:
+            return
+        needs_polling = False
+        for collection in (self.documents, self.chunks):
+            try:
+                await asyncio.to_thread(collection.start_listener)
+            except Exception as e:
+                print(f"WARNING: Mirror listener for '{collection.name}' failed, using delta pull: {e}")
+                needs_polling = True
+        if needs_polling and self._poll_task is None:
+            self._poll_task = asyncio.create_task(self._poll_loop())
+        print("INFO: Counter-Strike competitor mirror started")
+
+    async def stop(self):
+        for collection in (self.documents, self.chunks):
+            collection.stop_listener()
+        if self._poll_task:
+            self._poll_task.cancel()
+            self._poll_task = None
+
+    async def _poll_loop(self):
+        while True:
+            for collection in (self.documents, self.chunks):
+                if collection.listening:
+                    continue
+                try:
+                    await asyncio.to_thread(collection.pull_delta)
+                except Exception as e:
+                    print(f"WARNING: Mirror delta pull for '{collection.name}' failed: {e}")
+            await asyncio.sleep(self.poll_interval)
+
+    async def ensure_loaded(self):
+        """Kalter Spiegel (Listener noch nicht gemeldet): Dokument-Vektoren einmalig synchron nachladen."""
+        if not self.documents.ready.is_set():
+            await asyncio.to_thread(self.documents.pull_delta)
+
+    def record_document(self, doc_id: str, data: dict):
+        """Lokaler Write-Through nach Persistenz (vor dem Listener-Echo sichtbar)."""
+        key, vector, meta = document_entry(doc_id, data)
+        if vector is not None:
+            self.documents.index.upsert(key, vector, meta)
+        self.lexical.upsert(key, document_text(data), meta)
+
+    def record_chunk(self, competitor_id: str, chunk_id: str, data: dict):
+        key, vector, meta = chunk_entry(competitor_id, chunk_id, data)
+        if vector is not None:
+            self.chunks.index.upsert(key, vector, meta)
+
+    def forget_document(self, doc_id: str, chunk_ids: Iterable[str] = ()):
+        """Lokales Gegenstück zum Löschen eines Intel-Dokuments samt Chunks (vor dem Listener-Echo)."""
+        self.documents.index.remove(doc_id)
+        self.lexical.remove(doc_id)
+        for chunk_id in chunk_ids:
+            self.chunks.index.remove(f"{doc_id}/{chunk_id}")
+
+    def stats(self) -> dict:
+        return {"documents": self.documents.stats(), "chunks": self.chunks.stats()}
+
+
+competitor_mirror = CompetitorIntelMirror()
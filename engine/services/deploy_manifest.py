@@ -0,0 +1,66 @@
+"""
+AGENTICUM G5 — Hosting Deploy Manifest
+=======================================
+Merkt sich pro Firebase-Site die zuletzt von uns released Version samt
+Manifest (Pfad → SHA-256 des gzip-Inhalts, Config-Hash). Grundlage für
+inkrementelle Redeploys per versions:clone. In-Memory + SQLite auf lokaler
+Disk; fehlt ein Manifest (neue Instanz), wird einfach voll deployed.
+"""
+import asyncio
+import hashlib
+import json
+import os
+from typing import Dict, Optional
+
+from engine.core.sqlite_kv import SqliteKV
+
+MANIFEST_PATH = os.getenv("HOSTING_MANIFEST_PATH", "/tmp/agenticum/hosting_manifests.sqlite")
+MANIFEST_TTL_S = float(os.getenv("HOSTING_MANIFEST_TTL_S", str(30 * 24 * 3600)))
+
+
+def config_hash(config: dict) -> str:
+    return hashlib.sha256(json.dumps(config, sort_keys=True).encode("utf-8")).hexdigest()
+
+
+class DeployManifestStore:
+    def __init__(self, disk_path: Optional[str] = MANIFEST_PATH, ttl_s: float = MANIFEST_TTL_S):
+        self._memory: Dict[str, dict] = {}
+        self._disk = SqliteKV(disk_path, ttl_s=ttl_s) if disk_path else None
+        self.disk_errors = 0
+
+    async def get(self, site_id: str) -> Optional[dict]:
+        manifest = self._memory.get(site_id)
+        if manifest is None and self._disk is not None:
+            try:
+                manifest = await asyncio.to_thread(self._disk.get_json, site_id)
+            except Exception as e:
+                self.disk_errors += 1
+                print(f"WARNING: Hosting manifest read for {site_id} failed: {e}")
+            if manifest is not None:
+                self._memory[site_id] = manifest
+        return manifest
+
+    async def put(self, site_id: str, version: str, files: Dict[str, str], config: dict):
+        manifest = {"version": version, "files": files, "config_hash": config_hash(config)}
+        self._memory[site_id] = manifest
+        if self._disk is not None:
+            try:
+                await asyncio.to_thread(self._disk.set_json, site_id, manifest)
+            except Exception as e:
+                self.disk_errors += 1
+                print(f"WARNING: Hosting manifest write for {site_id} failed: {e}")
+
+    async def forget(self, site_id: str):
+        self._memory.pop(site_id, None)
+        if self._disk is not None:
+            try:
+                await asyncio.to_thread(self._disk.delete, site_id)
+            except Exception as e:
+                self.disk_errors += 1
+                print(f"WARNING: Hosting manifest delete for {site_id} failed: {e}")
+
+    def stats(self) -> dict:
+        return {"sites_in_memory": len(self._memory), "disk_errors": self.disk_errors}
+
+
+deploy_manifests = DeployManifestStore()
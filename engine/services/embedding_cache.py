@@ -0,0 +1,147 @@
+"""
+AGENTICUM G5 — Two-Tier Embedding Cache
+========================================
+Vor den Embedding Service geschaltet: Tier 1 ist ein In-Memory-LRU,
+Tier 2 ein SQLite-Store auf lokaler Disk (überlebt Restarts der Instanz).
+Key = SHA-256 über Modellversion + normalisierten Text, d.h. ein
+Modellwechsel invalidiert automatisch. Wiederholte Topics lösen keinen
+Netzwerk-Call aus.
+"""
+import asyncio
+import hashlib
+import os
+import time
+import unicodedata
+from collections import OrderedDict
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from engine.core.sqlite_kv import SqliteKV
+from engine.services.embedding_service import embedding_service
+
+MEMORY_MAX_ENTRIES = int(os.getenv("EMBEDDING_CACHE_MEMORY_MAX", "4096"))
+MEMORY_TTL_S = float(os.getenv("EMBEDDING_CACHE_MEMORY_TTL_S", "3600"))
+DISK_PATH = os.getenv("EMBEDDING_CACHE_PATH", "/tmp/agenticum/embedding_cache.sqlite")
+DISK_MAX_ROWS = int(os.getenv("EMBEDDING_CACHE_DISK_MAX_ROWS", "200000"))
+DISK_TTL_S = float(os.getenv("EMBEDDING_CACHE_DISK_TTL_S", str(30 * 24 * 3600)))
+
+
+def normalize_text(text: str) -> str:
+    """NFKC, Whitespace zusammenfassen, casefold — 'Pillar  Page' und 'pillar page' teilen einen Eintrag."""
+    return " ".join(unicodedata.normalize("NFKC", text).split()).casefold()
+
+
+class EmbeddingCache:
+    def __init__(
+        self,
+        service=embedding_service,
+        memory_max_entries: int = MEMORY_MAX_ENTRIES,
+        memory_ttl_s: float = MEMORY_TTL_S,
+        disk_path: Optional[str] = DISK_PATH,
+        disk_max_rows: int = DISK_MAX_ROWS,
+        disk_ttl_s: float = DISK_TTL_S,
+    ):
+        self.service = service
+        self.memory_max_entries = memory_max_entries
+        self.memory_ttl_s = memory_ttl_s
+        self._memory: "OrderedDict[str, tuple]" = OrderedDict()
+        self._disk = SqliteKV(disk_path, ttl_s=disk_ttl_s, max_rows=disk_max_rows) if disk_path else None
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.disk_errors = 0
+
+    def key_for(self, text: str) -> str:
+        payload = f"{self.service.model_name}\x00{normalize_text(text)}"
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def _memory_get(self, key: str) -> Optional[List[float]]:
+        entry = self._memory.get(key)
+        if entry is None:
+            return None
+        stored_at, vector = entry
+        if time.monotonic() - stored_at > self.memory_ttl_s:
+            del self._memory[key]
+            return None
+        self._memory.move_to_end(key)
+        return vector
+
+    def _memory_put(self, key: str, vector: List[float]):
+        self._memory[key] = (time.monotonic(), vector)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_max_entries:
+            self._memory.popitem(last=False)
+
+    async def _disk_get_many(self, keys: List[str]) -> Dict[str, List[float]]:
+        if self._disk is None or not keys:
+            return {}
+        try:
+            raw = await asyncio.to_thread(self._disk.get_many, keys)
+        except Exception as e:
+            self.disk_errors += 1
+            print(f"WARNING: Embedding disk cache read failed: {e}")
+            return {}
+        return {k: np.frombuffer(v, dtype=np.float32).tolist() for k, v in raw.items()}
+
+    async def _disk_set_many(self, vectors: Dict[str, List[float]]):
+        if self._disk is None or not vectors:
+            return
+        try:
+            await asyncio.to_thread(
+                self._disk.set_many, {k: np.asarray(v, dtype=np.float32).tobytes() for k, v in vectors.items()}
+            )
+        except Exception as e:
+            self.disk_errors += 1
+            print(f"WARNING: Embedding disk cache write failed: {e}")
+
+    async def embed(self, text: str) -> List[float]:
+        return (await self.embed_many([text]))[0]
+
+    async def embed_many(self, texts: List[str]) -> List[List[float]]:
+        """Memory → Disk → ein gebündelter Service-Call nur für die verbleibenden Misses."""
+        keys = [self.key_for(t) for t in texts]
+        resolved: Dict[str, List[float]] = {}
+        for key in keys:
+            if key in resolved:
+                continue
+            vector = self._memory_get(key)
+            if vector is not None:
+                resolved[key] = vector
+                self.memory_hits += 1
+
+        pending = [k for k in dict.fromkeys(keys) if k not in resolved]
+        from_disk = await self._disk_get_many(pending)
+        for key, vector in from_disk.items():
+            self._memory_put(key, vector)
+            self.disk_hits += 1
+        resolved.update(from_disk)
+
+        missing = {}
+        for key, text in zip(keys, texts):
+            if key not in resolved:
+                missing.setdefault(key, text)
+        if missing:
+            self.misses += len(missing)
+            vectors = await self.service.embed_many(list(missing.values()))
+            fresh = dict(zip(missing.keys(), vectors))
+            for key, vector in fresh.items():
+                self._memory_put(key, vector)
+            resolved.update(fresh)
+            await self._disk_set_many(fresh)
+
+        return [resolved[k] for k in keys]
+
+    def stats(self) -> dict:
+        lookups = self.memory_hits + self.disk_hits + self.misses
+        return {
+            "memory_entries": len(self._memory),
+            "memory_hits": self.memory_hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "disk_errors": self.disk_errors,
+            "hit_rate": round((self.memory_hits + self.disk_hits) / lookups, 3) if lookups else 0.0,
+        }
+
+
+embedding_cache = EmbeddingCache()
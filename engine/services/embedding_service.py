@@ -0,0 +1,225 @@
+"""
+AGENTICUM G5 — Micro-Batching Embedding Service
+================================================
+Gemeinsamer Embedding-Layer für Columna und Counter-Strike.
+Gleichzeitige embed()-Aufrufe werden in einem kurzen Zeitfenster zu
+Batches bis zum Modell-Limit gebündelt — ein Remote-Roundtrip statt N.
+Jeder Aufrufer bekommt seinen eigenen Vektor zurück.
+"""
+import asyncio
+import os
+import random
+import threading
+import time
+from collections import deque
+from typing import List, Optional, Set
+
+from engine.config import PROJECT_ID, REGION
+
+EMBEDDING_MODEL = os.getenv("EMBEDDING_MODEL", "text-embedding-004")
+# text-embedding-004: max. 250 Texte und ~20k Tokens pro Request
+MAX_BATCH = int(os.getenv("EMBEDDING_MAX_BATCH", "250"))
+MAX_BATCH_CHARS = int(os.getenv("EMBEDDING_MAX_BATCH_CHARS", "60000"))
+MAX_WAIT_MS = float(os.getenv("EMBEDDING_MAX_WAIT_MS", "10"))
+MAX_INFLIGHT_BATCHES = int(os.getenv("EMBEDDING_MAX_INFLIGHT_BATCHES", "4"))
+MAX_RETRIES = int(os.getenv("EMBEDDING_MAX_RETRIES", "4"))
+BACKOFF_BASE_S = float(os.getenv("EMBEDDING_BACKOFF_BASE_S", "0.5"))
+
+
+class EmbeddingServiceStopped(Exception):
+    """Service wurde während des Wartens gestoppt (App-Shutdown)."""
+
+
+def _fail(items: List["_PendingEmbedding"], error: Exception):
+    for p in items:
+        if not p.future.done():
+            p.future.set_exception(error)
+
+
+class _PendingEmbedding:
+    __slots__ = ("text", "future", "enqueued_at")
+
+    def __init__(self, text: str, future: asyncio.Future):
+        self.text = text
+        self.future = future
+        self.enqueued_at = time.perf_counter()
+
+
+class EmbeddingService:
+    def __init__(
+        self,
+        model_name: str = EMBEDDING_MODEL,
+        max_batch: int = MAX_BATCH,
+        max_batch_chars: int = MAX_BATCH_CHARS,
+        max_wait_ms: float = MAX_WAIT_MS,
+        max_inflight_batches: int = MAX_INFLIGHT_BATCHES,
+        max_retries: int = MAX_RETRIES,
+    ):
+        self.model_name = model_name
+        self.max_batch = max_batch
+        self.max_batch_chars = max_batch_chars
+        self.max_wait = max_wait_ms / 1000
+        self.max_inflight_batches = max_inflight_batches
+        self.max_retries = max_retries
+
+        self._model = None
+        self._model_lock = threading.Lock()
+        self._queue: Optional[asyncio.Queue] = None
+        self._worker: Optional[asyncio.Task] = None
+        self._inflight: Optional[asyncio.Semaphore] = None
+        self._carry: Optional[_PendingEmbedding] = None
+        self._dispatches: Set[asyncio.Task] = set()
+
+        self.batches_total = 0
+        self.texts_total = 0
+        self.max_batch_seen = 0
+        self.retries_total = 0
+        self.failed_batches_total = 0
+        self._queue_waits_ms = deque(maxlen=2048)
+        self._call_ms = deque(maxlen=512)
+
+    def get_model(self):
+        """Process-weites Modell-Singleton (vertexai.init + from_pretrained nur einmal)."""
+        if self._model is None:
+            with self._model_lock:
+                if self._model is None:
+                    import vertexai
+                    from vertexai.language_models import TextEmbeddingModel
+                    vertexai.init(project=PROJECT_ID, location=REGION)
+                    self._model = TextEmbeddingModel.from_pretrained(self.model_name)
+        return self._model
+
+    def _get_embeddings(self, texts: List[str]):
+        # Läuft im Thread: der erste Aufruf lädt das Modell (blockierendes from_pretrained)
+        return self.get_model().get_embeddings(texts)
+
+    def _ensure_worker(self):
+        if self._worker is None or self._worker.done():
+            self._queue = asyncio.Queue()
+            self._inflight = asyncio.Semaphore(self.max_inflight_batches)
+            self._carry = None
+            self._worker = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """Beendet den Batcher; alle noch wartenden Aufrufer bekommen EmbeddingServiceStopped."""
+        tasks = [t for t in (self._worker, *self._dispatches) if t is not None]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._worker = None
+        # Noch nicht gebatchte Aufrufer ebenfalls freigeben
+        pending = [self._carry] if self._carry else []
+        while self._queue is not None and not self._queue.empty():
+            pending.append(self._queue.get_nowait())
+        self._carry = None
+        _fail(pending, EmbeddingServiceStopped("Embedding service stopped"))
+
+    async def embed(self, text: str) -> List[float]:
+        self._ensure_worker()
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put(_PendingEmbedding(text, future))
+        return await future
+
+    async def embed_many(self, texts: List[str]) -> List[List[float]]:
+        """Alle Texte landen gemeinsam in der Queue und werden zusammen gebatcht."""
+        return list(await asyncio.gather(*(self.embed(t) for t in texts)))
+
+    async def _next_batch(self) -> List[_PendingEmbedding]:
+        loop = asyncio.get_running_loop()
+        first = self._carry or await self._queue.get()
+        self._carry = None
+        batch, chars = [first], len(first.text)
+        deadline = loop.time() + self.max_wait
+
+        try:
+            while len(batch) < self.max_batch:
+                try:
+                    item = self._queue.get_nowait()
+                except asyncio.QueueEmpty:
+                    timeout = deadline - loop.time()
+                    if timeout <= 0:
+                        break
+                    try:
+                        item = await asyncio.wait_for(self._queue.get(), timeout)
+                    except asyncio.TimeoutError:
+                        break
+                if chars + len(item.text) > self.max_batch_chars:
+                    self._carry = item
+                    break
+                batch.append(item)
+                chars += len(item.text)
+        except asyncio.CancelledError:
+            # Bereits eingesammelte Aufrufer hängen sonst für immer
+            _fail(batch, EmbeddingServiceStopped("Embedding service stopped"))
+            raise
+        return batch
+
+    async def _run(self):
+        while True:
+            batch = await self._next_batch()
+            try:
+                await self._inflight.acquire()
+            except asyncio.CancelledError:
+                _fail(batch, EmbeddingServiceStopped("Embedding service stopped"))
+                raise
+            task = asyncio.create_task(self._dispatch(batch))
+            self._dispatches.add(task)
+            task.add_done_callback(self._dispatches.discard)
+
+    async def _dispatch(self, batch: List[_PendingEmbedding]):
+        try:
+            now = time.perf_counter()
+            self._queue_waits_ms.extend((now - p.enqueued_at) * 1000 for p in batch)
+            batch = [p for p in batch if not p.future.done()]
+            if not batch:
+                return
+
+            texts = [p.text for p in batch]
+            for attempt in range(self.max_retries + 1):
+                try:
+                    started = time.perf_counter()
+                    embeddings = await asyncio.to_thread(self._get_embeddings, texts)
+                    self._call_ms.append((time.perf_counter() - started) * 1000)
+                    break
+                except Exception as e:
+                    if attempt == self.max_retries:
+                        self.failed_batches_total += 1
+                        print(f"WARNING: Embedding batch of {len(texts)} failed after {attempt + 1} attempts: {e}")
+                        for p in batch:
+                            if not p.future.done():
+                                p.future.set_exception(e)
+                        return
+                    self.retries_total += 1
+                    # Exponential Backoff mit Full Jitter
+                    await asyncio.sleep(random.uniform(0, BACKOFF_BASE_S * (2 ** attempt)))
+
+            self.batches_total += 1
+            self.texts_total += len(batch)
+            self.max_batch_seen = max(self.max_batch_seen, len(batch))
+            for p, embedding in zip(batch, embeddings):
+                if not p.future.done():
+                    p.future.set_result(embedding.values)
+        except asyncio.CancelledError:
+            _fail(batch, EmbeddingServiceStopped("Embedding service stopped"))
+            raise
+        finally:
+            self._inflight.release()
+
+    def stats(self) -> dict:
+        waits = sorted(self._queue_waits_ms)
+        return {
+            "model": self.model_name,
+            "queue_depth": self._queue.qsize() if self._queue else 0,
+            "batches_total": self.batches_total,
+            "texts_total": self.texts_total,
+            "avg_batch_size": round(self.texts_total / self.batches_total, 2) if self.batches_total else 0.0,
+            "max_batch_size": self.max_batch_seen,
+            "retries_total": self.retries_total,
+            "failed_batches_total": self.failed_batches_total,
+            "queue_wait_ms_avg": round(sum(waits) / len(waits), 2) if waits else 0.0,
+            "queue_wait_ms_p95": round(waits[int(len(waits) * 0.95) - 1], 2) if waits else 0.0,
+            "call_ms_avg": round(sum(self._call_ms) / len(self._call_ms), 1) if self._call_ms else 0.0,
+        }
+
+
+embedding_service = EmbeddingService()
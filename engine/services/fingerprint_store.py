@@ -0,0 +1,129 @@
+"""
+AGENTICUM G5 — Competitor Fingerprint Store
+============================================
+Change-Detection für Columna: pro normalisierter URL werden Text-Hash,
+ETag/Last-Modified und die zuletzt gespeicherte Intel gehalten.
+Unveränderte Seiten werden weder neu embedded noch erneut persistiert.
+"""
+import asyncio
+import hashlib
+import json
+import os
+from datetime import datetime, timezone
+from typing import Optional, Tuple
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+import httpx
+
+from engine.config import PROJECT_ID
+
+COLLECTION = os.getenv("COLUMNA_FINGERPRINT_COLLECTION", "competitor_fingerprints")
+PROBE_TIMEOUT_S = float(os.getenv("COLUMNA_FINGERPRINT_PROBE_TIMEOUT_S", "5"))
+
+_TRACKING_PARAMS = ("utm_", "gclid", "fbclid", "mc_cid", "mc_eid")
+_DEFAULT_PORTS = {"http": 80, "https": 443}
+
+
+def normalize_url(url: str) -> str:
+    """Kanonische URL: Schema/Host klein, ohne Default-Port, Fragment, Tracking-Parameter und Trailing Slash."""
+    parts = urlsplit(url.strip())
+    scheme = parts.scheme.lower() or "https"
+    host = (parts.hostname or "").lower()
+    if parts.port and parts.port != _DEFAULT_PORTS.get(scheme):
+        host = f"{host}:{parts.port}"
+    path = parts.path or "/"
+    if len(path) > 1 and path.endswith("/"):
+        path = path.rstrip("/")
+    query = urlencode(sorted(
+        (k, v) for k, v in parse_qsl(parts.query, keep_blank_values=True)
+        if not k.lower().startswith(_TRACKING_PARAMS)
+    ))
+    return urlunsplit((scheme, host, path, query, ""))
+
+
+def content_fingerprint(skeleton: dict, text_sha256: Optional[str] = None) -> str:
+    """SHA-256 über den extrahierten Text (Hash des gesamten Bodys, falls übergeben) + Heading-Struktur."""
+    payload = json.dumps(
+        {"headings": skeleton.get("headings", []), "text": text_sha256 or skeleton.get("raw_text", "")},
+        ensure_ascii=False,
+        sort_keys=True,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class FingerprintStore:
+    """Firestore-Collection `competitor_fingerprints`, Document-ID = Hash der normalisierten URL."""
+
+    def __init__(self, collection: str = COLLECTION):
+        self.collection = collection
+        self._db = None
+        self._http: Optional[httpx.AsyncClient] = None
+        self.hits_conditional = 0
+        self.hits_content = 0
+        self.misses = 0
+
+    def _get_db(self):
+        if self._db is None:
+            from google.cloud import firestore
+            self._db = firestore.Client(project=PROJECT_ID)
+        return self._db
+
+    def _doc(self, normalized_url: str):
+        doc_id = hashlib.sha256(normalized_url.encode("utf-8")).hexdigest()[:40]
+        return self._get_db().collection(self.collection).document(doc_id)
+
+    async def get(self, normalized_url: str) -> Optional[dict]:
+        snapshot = await asyncio.to_thread(self._doc(normalized_url).get)
+        return snapshot.to_dict() if snapshot.exists else None
+
+    async def put(self, normalized_url: str, data: dict):
+        now = datetime.now(timezone.utc)
+        record = {**data, "normalized_url": normalized_url, "updated_at": now, "checked_at": now}
+        await asyncio.to_thread(self._doc(normalized_url).set, record)
+
+    async def touch(self, normalized_url: str, etag: Optional[str] = None, last_modified: Optional[str] = None):
+        """Nur Validatoren + checked_at aktualisieren (Seite unverändert)."""
+        update = {"checked_at": datetime.now(timezone.utc)}
+        if etag:
+            update["etag"] = etag
+        if last_modified:
+            update["last_modified"] = last_modified
+        await asyncio.to_thread(self._doc(normalized_url).update, update)
+
+    async def probe_not_modified(self, url: str, fingerprint: dict) -> Tuple[bool, Optional[str], Optional[str]]:
+        """
+        Conditional GET (If-None-Match / If-Modified-Since) ohne Browser.
+        Liefert (not_modified, etag, last_modified). Bei 200 wird der Body nicht gelesen.
+        """
+        headers = {}
+        if fingerprint.get("etag"):
+            headers["If-None-Match"] = fingerprint["etag"]
+        if fingerprint.get("last_modified"):
+            headers["If-Modified-Since"] = fingerprint["last_modified"]
+        if not headers:
+            return False, None, None
+
+        if self._http is None:
+            self._http = httpx.AsyncClient(follow_redirects=True, timeout=PROBE_TIMEOUT_S)
+        try:
+            async with self._http.stream("GET", url, headers=headers) as response:
+                return (
+                    response.status_code == 304,
+                    response.headers.get("etag"),
+                    response.headers.get("last-modified"),
+                )
+        except httpx.HTTPError as e:
+            print(f"WARNING: Fingerprint probe failed for {url}: {e}")
+            return False, None, None
+
+    def stats(self) -> dict:
+        total = self.hits_conditional + self.hits_content + self.misses
+        return {
+            "unchanged_by_validator": self.hits_conditional,
+            "unchanged_by_content_hash": self.hits_content,
+            "changed_or_new": self.misses,
+            "skip_rate": round((self.hits_conditional + self.hits_content) / total, 3) if total else 0.0,
+        }
+
+
+fingerprint_store = FingerprintStore()
@@ -0,0 +1,388 @@
+"""
+AGENTICUM G5 — Async Firebase Hosting Client
+=============================================
+Ein geteilter httpx.AsyncClient (HTTP/2, Connection-Pool) für die Hosting
+REST API. OAuth-Token werden gecacht und erst kurz vor Ablauf erneuert
+(Refresh im Thread, nicht im Event-Loop). 429/5xx und Transportfehler werden
+mit Full-Jitter-Backoff wiederholt; jeder Schritt wird gemessen.
+"""
+import asyncio
+import gzip
+import hashlib
+import os
+import random
+import re
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+
+import httpx
+
+from engine.services.deploy_manifest import config_hash, deploy_manifests
+
+HOSTING_API = "https://firebasehosting.googleapis.com/v1beta1"
+HOSTING_SCOPES = ["https://www.googleapis.com/auth/cloud-platform", "https://www.googleapis.com/auth/firebase"]
+HOSTING_TIMEOUT_S = float(os.getenv("HOSTING_TIMEOUT_S", "30"))
+HOSTING_MAX_RETRIES = int(os.getenv("HOSTING_MAX_RETRIES", "4"))
+HOSTING_BACKOFF_BASE_S = float(os.getenv("HOSTING_BACKOFF_BASE_S", "0.5"))
+HOSTING_MAX_CONNECTIONS = int(os.getenv("HOSTING_MAX_CONNECTIONS", "20"))
+HOSTING_UPLOAD_CONCURRENCY = int(os.getenv("HOSTING_UPLOAD_CONCURRENCY", "8"))
+HOSTING_SITE_CONCURRENCY = int(os.getenv("HOSTING_SITE_CONCURRENCY", "4"))
+HOSTING_HASH_WORKERS = int(os.getenv("HOSTING_HASH_WORKERS", str(min(4, os.cpu_count() or 1))))
+# Kleinere Dateien werden inline komprimiert — der Prozess-Roundtrip wäre teurer
+HOSTING_PROCESS_POOL_MIN_BYTES = int(os.getenv("HOSTING_PROCESS_POOL_MIN_BYTES", str(256 * 1024)))
+HOSTING_CLONE_POLL_S = float(os.getenv("HOSTING_CLONE_POLL_S", "0.5"))
+HOSTING_CLONE_TIMEOUT_S = float(os.getenv("HOSTING_CLONE_TIMEOUT_S", "60"))
+# Limit der Hosting API pro populateFiles-Call
+POPULATE_BATCH_SIZE = 1000
+# Token so viele Sekunden vor Ablauf erneuern
+HOSTING_TOKEN_REFRESH_MARGIN_S = float(os.getenv("HOSTING_TOKEN_REFRESH_MARGIN_S", "300"))
+
+_RETRYABLE_STATUS = {429, 500, 502, 503, 504}
+
+
+class HostingAPIError(Exception):
+    def __init__(self, step: str, status_code: int, text: str):
+        super().__init__(f"{step} failed with HTTP {status_code}: {text}")
+        self.step = step
+        self.status_code = status_code
+        self.text = text
+
+
+def gzip_file(content: bytes) -> bytes:
+    """Hosting erwartet gzip-komprimierte Dateien; mtime=0 hält den Hash deterministisch."""
+    return gzip.compress(content, mtime=0)
+
+
+def sha256_hex(content: bytes) -> str:
+    return hashlib.sha256(content).hexdigest()
+
+
+def gzip_and_hash(content: bytes) -> Tuple[str, bytes]:
+    """Läuft im Process-Pool (top-level, damit picklebar)."""
+    gzipped = gzip_file(content)
+    return sha256_hex(gzipped), gzipped
+
+
+@dataclass
+class PreparedBundle:
+    file_hashes: Dict[str, str]   # Pfad → SHA-256 des gzip-Inhalts
+    blobs: Dict[str, bytes]       # SHA-256 → gzip-Inhalt (dedupliziert)
+
+
+class _TokenCache:
+    def __init__(self, scopes=HOSTING_SCOPES, margin_s: float = HOSTING_TOKEN_REFRESH_MARGIN_S):
+        self.scopes = scopes
+        self.margin = timedelta(seconds=margin_s)
+        self._credentials = None
+        self._lock: Optional[asyncio.Lock] = None
+        self.refreshes = 0
+
+    def _fresh(self) -> bool:
+        credentials = self._credentials
+        if credentials is None or not credentials.token:
+            return False
+        # google-auth: expiry ist naive UTC
+        return credentials.expiry is None or credentials.expiry - self.margin > datetime.utcnow()
+
+    def _load_and_refresh(self):
+        from google.auth import default
+        from google.auth.transport.requests import Request
+        if self._credentials is None:
+            self._credentials, _ = default(scopes=self.scopes)
+        self._credentials.refresh(Request())
+
+    async def token(self) -> str:
+        if self._fresh():
+            return self._credentials.token
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        async with self._lock:
+            if not self._fresh():
+                await asyncio.to_thread(self._load_and_refresh)
+                self.refreshes += 1
+        return self._credentials.token
+
+    def invalidate(self):
+        if self._credentials is not None:
+            self._credentials.expiry = datetime.utcnow()
+
+
+class FirebaseHostingClient:
+    def __init__(self, max_retries: int = HOSTING_MAX_RETRIES, timeout_s: float = HOSTING_TIMEOUT_S):
+        self.max_retries = max_retries
+        self.timeout_s = timeout_s
+        self.tokens = _TokenCache()
+        self._client: Optional[httpx.AsyncClient] = None
+        self._process_pool: Optional[ProcessPoolExecutor] = None
+        self.requests = 0
+        self.retries = 0
+        self.failures = 0
+        self._step_ms: Dict[str, deque] = {}
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        if self._client is None or self._client.is_closed:
+            self._client = httpx.AsyncClient(
+                http2=True,
+                timeout=self.timeout_s,
+                limits=httpx.Limits(max_connections=HOSTING_MAX_CONNECTIONS, max_keepalive_connections=HOSTING_MAX_CONNECTIONS),
+            )
+        return self._client
+
+    @property
+    def process_pool(self) -> ProcessPoolExecutor:
+        if self._process_pool is None:
+            self._process_pool = ProcessPoolExecutor(max_workers=HOSTING_HASH_WORKERS)
+        return self._process_pool
+
+    async def close(self):
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+        if self._process_pool is not None:
+            self._process_pool.shutdown(wait=False, cancel_futures=True)
+            self._process_pool = None
+
+    async def _request(self, step: str, method: str, url: str, timings: Optional[dict] = None, **kwargs) -> httpx.Response:
+        started = time.perf_counter()
+        extra_headers = kwargs.pop("headers", {})
+        reauthorized = False
+        try:
+            attempt = 0
+            while True:
+                headers = {"Authorization": f"Bearer {await self.tokens.token()}", **extra_headers}
+                self.requests += 1
+                try:
+                    response = await self.client.request(method, url, headers=headers, **kwargs)
+                except httpx.TransportError as e:
+                    if attempt >= self.max_retries:
+                        self.failures += 1
+                        raise HostingAPIError(step, 0, str(e)) from e
+                    await self._backoff(step, attempt, str(e))
+                    attempt += 1
+                    continue
+                if response.status_code == 401 and not reauthorized:
+                    # Token serverseitig widerrufen/abgelaufen: einmal neu holen
+                    self.tokens.invalidate()
+                    reauthorized = True
+                    continue
+                if response.status_code in _RETRYABLE_STATUS and attempt < self.max_retries:
+                    await self._backoff(step, attempt, f"HTTP {response.status_code}", response.headers.get("retry-after"))
+                    attempt += 1
+                    continue
+                if response.is_error:
+                    self.failures += 1
+                    raise HostingAPIError(step, response.status_code, response.text)
+                return response
+        finally:
+            elapsed = round((time.perf_counter() - started) * 1000, 1)
+            self._step_ms.setdefault(step, deque(maxlen=256)).append(elapsed)
+            if timings is not None:
+                timings[step] = round(timings.get(step, 0.0) + elapsed, 1)
+
+    async def _backoff(self, step: str, attempt: int, reason: str, retry_after: Optional[str] = None):
+        self.retries += 1
+        print(f"WARNING: Firebase Hosting {step} failed ({reason}), retry {attempt + 1}/{self.max_retries}")
+        delay = random.uniform(0, HOSTING_BACKOFF_BASE_S * (2 ** attempt))
+        if retry_after and retry_after.isdigit():
+            delay = max(delay, float(retry_after))
+        await asyncio.sleep(delay)
+
+    # ── Hosting REST Schritte ──
+    async def create_version(self, site_id: str, config: dict, timings: Optional[dict] = None) -> str:
+        response = await self._request(
+            "create_version", "POST", f"{HOSTING_API}/sites/{site_id}/versions", timings, json={"config": config}
+        )
+        return response.json()["name"]
+
+    async def populate_files(self, version_name: str, file_hashes: Dict[str, str], timings: Optional[dict] = None) -> dict:
+        response = await self._request(
+            "populate_files", "POST", f"{HOSTING_API}/{version_name}:populateFiles", timings, json={"files": file_hashes}
+        )
+        return response.json()
+
+    async def upload(self, upload_url: str, file_hash: str, gzipped: bytes, timings: Optional[dict] = None):
+        await self._request(
+            "upload", "POST", f"{upload_url}/{file_hash}", timings,
+            content=gzipped, headers={"Content-Type": "application/octet-stream"},
+        )
+
+    async def finalize(self, version_name: str, timings: Optional[dict] = None):
+        await self._request(
+            "finalize", "PATCH", f"{HOSTING_API}/{version_name}", timings,
+            params={"update_mask": "status"}, json={"status": "FINALIZED"},
+        )
+
+    async def release(self, site_id: str, version_name: str, timings: Optional[dict] = None) -> dict:
+        response = await self._request(
+            "release", "POST", f"{HOSTING_API}/sites/{site_id}/releases", timings, params={"versionName": version_name}
+        )
+        return response.json()
+
+    async def clone_version(self, site_id: str, source_version: str, exclude_paths: List[str], timings: Optional[dict] = None) -> str:
+        """versions:clone (Long-Running Operation) ohne die geänderten/entfernten Pfade; gibt die neue Version zurück."""
+        payload = {"sourceVersion": source_version, "finalize": False}
+        if exclude_paths:
+            payload["exclude"] = {"regexes": [f"^{re.escape(path)}$" for path in exclude_paths]}
+        response = await self._request(
+            "clone_version", "POST", f"{HOSTING_API}/sites/{site_id}/versions:clone", timings, json=payload
+        )
+        operation = response.json()
+        async with asyncio.timeout(HOSTING_CLONE_TIMEOUT_S):
+            while not operation.get("done"):
+                await asyncio.sleep(HOSTING_CLONE_POLL_S)
+                response = await self._request("clone_version", "GET", f"{HOSTING_API}/{operation['name']}", timings)
+                operation = response.json()
+        if "error" in operation:
+            error = operation["error"]
+            raise HostingAPIError("clone_version", error.get("code", 0), error.get("message", ""))
+        return operation["response"]["name"]
+
+    async def prepare(self, files: Dict[str, bytes]) -> PreparedBundle:
+        """
+        gzip + SHA-256 je Datei; große Dateien im Process-Pool, kleine gesammelt in einem
+        einzigen to_thread-Aufruf (IPC lohnt für sie nicht, den Event-Loop blockieren sie trotzdem nicht).
+        """
+        loop = asyncio.get_running_loop()
+        pool = None
+        jobs = {}
+        small = {}
+        for path, content in files.items():
+            if len(content) >= HOSTING_PROCESS_POOL_MIN_BYTES:
+                pool = pool or self.process_pool
+                jobs[path] = loop.run_in_executor(pool, gzip_and_hash, content)
+            else:
+                small[path] = content
+        if small:
+            jobs.update(await asyncio.to_thread(lambda: {path: gzip_and_hash(content) for path, content in small.items()}))
+        prepared = {path: (await jobs[path] if asyncio.isfuture(jobs[path]) else jobs[path]) for path in files}
+        file_hashes = {path: file_hash for path, (file_hash, _) in prepared.items()}
+        # Gleicher Inhalt unter mehreren Pfaden → ein Blob
+        blobs = {file_hash: gzipped for file_hash, gzipped in prepared.values()}
+        return PreparedBundle(file_hashes=file_hashes, blobs=blobs)
+
+    async def _version_for(self, site_id: str, bundle: PreparedBundle, config: dict, incremental: bool, timings: dict) -> tuple:
+        """
+        (version_name, zu meldende Pfade, Modus). Inkrementell: letzte eigene Version klonen,
+        geänderte und entfernte Pfade dabei ausschließen — nur diese werden neu gemeldet.
+        """
+        previous = await deploy_manifests.get(site_id) if incremental else None
+        if previous is None or previous["config_hash"] != config_hash(config):
+            return await self.create_version(site_id, config, timings), list(bundle.file_hashes), "full"
+
+        changed = [path for path, file_hash in bundle.file_hashes.items() if previous["files"].get(path) != file_hash]
+        removed = [path for path in previous["files"] if path not in bundle.file_hashes]
+        if not changed and not removed:
+            return previous["version"], [], "unchanged"
+        try:
+            version_name = await self.clone_version(site_id, previous["version"], changed + removed, timings)
+        except (HostingAPIError, TimeoutError) as e:
+            # Quellversion gelöscht/abgelaufen o.ä.: Manifest verwerfen, voll deployen
+            print(f"WARNING: Incremental clone for {site_id} failed ({e}), falling back to full deploy")
+            await deploy_manifests.forget(site_id)
+            return await self.create_version(site_id, config, timings), list(bundle.file_hashes), "full"
+        return version_name, changed, "incremental"
+
+    async def deploy_prepared(
+        self,
+        site_id: str,
+        bundle: PreparedBundle,
+        config: dict,
+        timings: Optional[dict] = None,
+        incremental: bool = False,
+    ) -> dict:
+        """Version anlegen (oder klonen) → Dateien melden → fehlende parallel hochladen → finalisieren → releasen."""
+        timings = {} if timings is None else timings
+        started = time.perf_counter()
+        version_name, paths, mode = await self._version_for(site_id, bundle, config, incremental, timings)
+        if mode == "unchanged":
+            # Identisches Bundle: nur die vorhandene Version erneut releasen (falls zwischendurch jemand anderes released hat)
+            release = await self.release(site_id, version_name, timings)
+            timings["total"] = round(timings.get("total", 0.0) + (time.perf_counter() - started) * 1000, 1)
+            return {
+                "site_id": site_id, "version": version_name, "release": release.get("name"), "mode": mode,
+                "files": len(bundle.file_hashes), "changed": [], "uploaded": 0, "timings_ms": timings,
+            }
+
+        required = set()
+        upload_url = None
+        for offset in range(0, len(paths), POPULATE_BATCH_SIZE):
+            batch = {path: bundle.file_hashes[path] for path in paths[offset:offset + POPULATE_BATCH_SIZE]}
+            populated = await self.populate_files(version_name, batch, timings)
+            required.update(populated.get("uploadRequiredHashes", []))
+            upload_url = populated.get("uploadUrl", upload_url)
+
+        upload_started = time.perf_counter()
+        semaphore = asyncio.Semaphore(HOSTING_UPLOAD_CONCURRENCY)
+
+        async def upload_one(file_hash: str):
+            async with semaphore:
+                await self.upload(upload_url, file_hash, bundle.blobs[file_hash])
+
+        await asyncio.gather(*(upload_one(h) for h in required))
+        timings["upload"] = round((time.perf_counter() - upload_started) * 1000, 1)
+
+        await self.finalize(version_name, timings)
+        release = await self.release(site_id, version_name, timings)
+        await deploy_manifests.put(site_id, version_name, bundle.file_hashes, config)
+        timings["total"] = round(timings.get("total", 0.0) + (time.perf_counter() - started) * 1000, 1)
+        return {
+            "site_id": site_id,
+            "version": version_name,
+            "release": release.get("name"),
+            "mode": mode,
+            "files": len(bundle.file_hashes),
+            "changed": paths if mode == "incremental" else [],
+            "uploaded": len(required),
+            "timings_ms": timings,
+        }
+
+    async def deploy(self, site_id: str, files: Dict[str, bytes], config: dict, incremental: bool = False) -> dict:
+        started = time.perf_counter()
+        bundle = await self.prepare(files)
+        timings = {"hash": round((time.perf_counter() - started) * 1000, 1)}
+        timings["total"] = timings["hash"]
+        return await self.deploy_prepared(site_id, bundle, config, timings, incremental)
+
+    async def deploy_many(self, site_ids: List[str], files: Dict[str, bytes], config: dict, incremental: bool = False) -> List[dict]:
+        """
+        Dasselbe Bundle auf viele Sites (Kampagnen-Rollout): einmal hashen, Sites parallel
+        (HOSTING_SITE_CONCURRENCY) deployen. Fehler bleiben je Site im Ergebnis.
+        """
+        started = time.perf_counter()
+        bundle = await self.prepare(files)
+        hash_ms = round((time.perf_counter() - started) * 1000, 1)
+        semaphore = asyncio.Semaphore(HOSTING_SITE_CONCURRENCY)
+
+        async def deploy_site(site_id: str) -> dict:
+            async with semaphore:
+                try:
+                    return await self.deploy_prepared(site_id, bundle, config, {"hash": hash_ms, "total": hash_ms}, incremental)
+                except HostingAPIError as e:
+                    print(f"WARNING: Deploy to {site_id} failed: {e}")
+                    return {"site_id": site_id, "error": e.text, "step": e.step, "status_code": e.status_code}
+                except Exception as e:
+                    # RefreshError, unerwartete API-Antworten, Timeouts: nur diese Site scheitert
+                    print(f"WARNING: Deploy to {site_id} failed: {e!r}")
+                    return {"site_id": site_id, "error": f"{type(e).__name__}: {e}", "step": None, "status_code": None}
+
+        return await asyncio.gather(*(deploy_site(site_id) for site_id in site_ids))
+
+    def stats(self) -> dict:
+        return {
+            "requests": self.requests,
+            "retries": self.retries,
+            "failures": self.failures,
+            "token_refreshes": self.tokens.refreshes,
+            "manifests": deploy_manifests.stats(),
+            "step_ms_avg": {
+                step: round(sum(values) / len(values), 1) for step, values in self._step_ms.items() if values
+            },
+        }
+
+
+hosting_client = FirebaseHostingClient()
@@ -0,0 +1,232 @@
+"""
+AGENTICUM G5 — Async LLM Gateway
+=================================
+Gemeinsamer Zugang zu Gemini für Grounding und Senat. Pro Modell eine Lane
+mit Token-Bucket (Requests/s) und Concurrency-Semaphore; Aufrufe laufen über
+die async Client-APIs, damit kein Modell-Call den Event-Loop blockiert.
+429/5xx werden mit Full-Jitter-Backoff wiederholt, jeder Call hat eine
+Deadline (inkl. Wartezeit in der Queue).
+"""
+import asyncio
+import json
+import os
+import random
+import time
+from collections import deque
+from typing import Any, AsyncIterator, Dict, Optional
+
+try:
+    from google.api_core import exceptions as api_exceptions
+    _RETRYABLE_TYPES = (
+        api_exceptions.TooManyRequests,
+        api_exceptions.ResourceExhausted,
+        api_exceptions.InternalServerError,
+        api_exceptions.BadGateway,
+        api_exceptions.ServiceUnavailable,
+        api_exceptions.GatewayTimeout,
+    )
+except ImportError:
+    _RETRYABLE_TYPES = ()
+
+LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", "8"))
+LLM_RPS = float(os.getenv("LLM_RPS", "5"))
+LLM_BURST = int(os.getenv("LLM_BURST", "10"))
+LLM_MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", "4"))
+LLM_BACKOFF_BASE_S = float(os.getenv("LLM_BACKOFF_BASE_S", "1.0"))
+LLM_DEADLINE_S = float(os.getenv("LLM_DEADLINE_S", "90"))
+# Overrides pro Modell, z.B. {"gemini-1.5-pro-002": {"rps": 2, "burst": 4, "concurrency": 4}}
+LLM_LANES = json.loads(os.getenv("LLM_LANES", "{}"))
+
+_RETRYABLE_CODES = {429, 500, 502, 503, 504}
+
+
+def _is_retryable(error: Exception) -> bool:
+    if _RETRYABLE_TYPES and isinstance(error, _RETRYABLE_TYPES):
+        return True
+    code = getattr(error, "code", None)
+    return isinstance(code, int) and code in _RETRYABLE_CODES
+
+
+def _model_name(model) -> str:
+    return str(getattr(model, "_model_name", "default")).rsplit("/", 1)[-1]
+
+
+class LLMDeadlineExceeded(TimeoutError):
+    pass
+
+
+class _TokenBucket:
+    def __init__(self, rate: float, burst: int):
+        self.rate = rate
+        self.capacity = max(1, burst)
+        self.tokens = float(self.capacity)
+        self.updated = time.monotonic()
+
+    async def acquire(self):
+        while True:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            if self.tokens >= 1:
+                self.tokens -= 1
+                return
+            await asyncio.sleep((1 - self.tokens) / self.rate)
+
+
+class _ModelLane:
+    def __init__(self, name: str, rps: float, burst: int, concurrency: int):
+        self.name = name
+        self.bucket = _TokenBucket(rps, burst)
+        self.semaphore = asyncio.Semaphore(concurrency)
+        self.concurrency = concurrency
+        self.waiting = 0
+        self.inflight = 0
+        self.calls = 0
+        self.retries = 0
+        self.failures = 0
+        self.deadline_exceeded = 0
+        self._queue_ms = deque(maxlen=1024)
+        self._latency_ms = deque(maxlen=1024)
+
+    def stats(self) -> dict:
+        latencies = sorted(self._latency_ms)
+        return {
+            "queue_depth": self.waiting,
+            "inflight": self.inflight,
+            "concurrency": self.concurrency,
+            "calls": self.calls,
+            "retries": self.retries,
+            "failures": self.failures,
+            "deadline_exceeded": self.deadline_exceeded,
+            "queue_wait_ms_avg": round(sum(self._queue_ms) / len(self._queue_ms), 1) if self._queue_ms else 0.0,
+            "latency_ms_p50": round(latencies[len(latencies) // 2], 1) if latencies else 0.0,
+            "latency_ms_p95": round(latencies[int(len(latencies) * 0.95) - 1], 1) if latencies else 0.0,
+        }
+
+
+class LLMGateway:
+    def __init__(self, max_retries: int = LLM_MAX_RETRIES, deadline_s: float = LLM_DEADLINE_S):
+        self.max_retries = max_retries
+        self.deadline_s = deadline_s
+        self._lanes: Dict[str, _ModelLane] = {}
+
+    def lane(self, name: str) -> _ModelLane:
+        if name not in self._lanes:
+            config = LLM_LANES.get(name, {})
+            self._lanes[name] = _ModelLane(
+                name,
+                rps=float(config.get("rps", LLM_RPS)),
+                burst=int(config.get("burst", LLM_BURST)),
+                concurrency=int(config.get("concurrency", LLM_MAX_CONCURRENCY)),
+            )
+        return self._lanes[name]
+
+    async def _admit(self, lane: _ModelLane):
+        queued_at = time.perf_counter()
+        lane.waiting += 1
+        try:
+            await lane.semaphore.acquire()
+            try:
+                await lane.bucket.acquire()
+            except BaseException:
+                lane.semaphore.release()
+                raise
+        finally:
+            lane.waiting -= 1
+        lane._queue_ms.append((time.perf_counter() - queued_at) * 1000)
+        lane.inflight += 1
+
+    def _release(self, lane: _ModelLane):
+        lane.inflight -= 1
+        lane.semaphore.release()
+
+    async def _backoff(self, lane: _ModelLane, attempt: int, error: Exception):
+        lane.retries += 1
+        print(f"WARNING: LLM call on {lane.name} failed ({error}), retry {attempt + 1}/{self.max_retries}")
+        # Exponential Backoff mit Full Jitter; Slot wird währenddessen freigegeben
+        await asyncio.sleep(random.uniform(0, LLM_BACKOFF_BASE_S * (2 ** attempt)))
+
+    async def generate(self, model, contents, *, deadline_s: Optional[float] = None, **kwargs) -> Any:
+        """model.generate_content_async über die Lane des Modells, mit Retries und Gesamt-Deadline."""
+        lane = self.lane(_model_name(model))
+        deadline = asyncio.timeout(deadline_s or self.deadline_s)
+        try:
+            async with deadline:
+                for attempt in range(self.max_retries + 1):
+                    await self._admit(lane)
+                    started = time.perf_counter()
+                    try:
+                        response = await model.generate_content_async(contents, **kwargs)
+                        lane.calls += 1
+                        lane._latency_ms.append((time.perf_counter() - started) * 1000)
+                        return response
+                    except Exception as e:
+                        if attempt == self.max_retries or not _is_retryable(e):
+                            lane.failures += 1
+                            raise
+                        error = e
+                    finally:
+                        self._release(lane)
+                    await self._backoff(lane, attempt, error)
+        except TimeoutError as e:
+            if not deadline.expired():
+                raise
+            lane.deadline_exceeded += 1
+            raise LLMDeadlineExceeded(f"LLM call on {lane.name} exceeded {deadline_s or self.deadline_s}s") from e
+
+    async def _bounded(self, lane: _ModelLane, when: float, awaitable, deadline_s: float):
+        """Await mit absoluter Deadline; Überschreitung → LLMDeadlineExceeded (nur Producer-Seite)."""
+        timeout = asyncio.timeout_at(when)
+        try:
+            async with timeout:
+                return await awaitable
+        except TimeoutError as e:
+            if not timeout.expired():
+                raise
+            lane.deadline_exceeded += 1
+            raise LLMDeadlineExceeded(f"LLM stream on {lane.name} exceeded {deadline_s}s") from e
+
+    async def stream(self, model, contents, *, deadline_s: Optional[float] = None, **kwargs) -> AsyncIterator[Any]:
+        """
+        Streaming-Variante; Retries nur bis zum ersten Chunk (danach wäre Output doppelt).
+        Die Deadline begrenzt nur das Warten auf Modell/Queue — nie das `yield`, sonst
+        würde sie im Task des Konsumenten (z.B. SSE-Writer) als CancelledError feuern.
+        """
+        lane = self.lane(_model_name(model))
+        deadline_s = deadline_s or self.deadline_s
+        when = asyncio.get_running_loop().time() + deadline_s
+        for attempt in range(self.max_retries + 1):
+            await self._bounded(lane, when, self._admit(lane), deadline_s)
+            started = time.perf_counter()
+            yielded = False
+            try:
+                response = await self._bounded(
+                    lane, when, model.generate_content_async(contents, stream=True, **kwargs), deadline_s
+                )
+                chunks = response.__aiter__()
+                while True:
+                    try:
+                        chunk = await self._bounded(lane, when, chunks.__anext__(), deadline_s)
+                    except StopAsyncIteration:
+                        break
+                    yielded = True
+                    yield chunk
+                lane.calls += 1
+                lane._latency_ms.append((time.perf_counter() - started) * 1000)
+                return
+            except LLMDeadlineExceeded:
+                raise
+            except Exception as e:
+                if yielded or attempt == self.max_retries or not _is_retryable(e):
+                    lane.failures += 1
+                    raise
+                error = e
+            finally:
+                self._release(lane)
+            await self._bounded(lane, when, self._backoff(lane, attempt, error), deadline_s)
+
+    def stats(self) -> dict:
+        return {name: lane.stats() for name, lane in self._lanes.items()}
+
+
+llm_gateway = LLMGateway()
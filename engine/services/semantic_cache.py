@@ -0,0 +1,121 @@
+"""
+AGENTICUM G5 — Semantic Response Cache
+=======================================
+Cache vor teuren LLM-Calls (Grounding): zuerst exakter Hash über die
+normalisierte Direktive + Tags + Modellversion, danach Ähnlichkeitssuche
+über das Direktiven-Embedding (Cosine ≥ Threshold). Jeder Eintrag hat eine
+TTL (gegroundete Fakten veralten), die Größe ist per LRU begrenzt.
+"""
+import hashlib
+import os
+import time
+from collections import OrderedDict
+from typing import List, Optional, Tuple
+
+from engine.core.vector_index import VectorIndex
+from engine.services.embedding_cache import embedding_cache, normalize_text
+
+GROUNDING_CACHE_TTL_S = float(os.getenv("GROUNDING_CACHE_TTL_S", str(6 * 3600)))
+GROUNDING_CACHE_MAX_ENTRIES = int(os.getenv("GROUNDING_CACHE_MAX_ENTRIES", "512"))
+GROUNDING_CACHE_SIMILARITY = float(os.getenv("GROUNDING_CACHE_SIMILARITY", "0.95"))
+
+
+class SemanticCache:
+    def __init__(
+        self,
+        ttl_s: float = GROUNDING_CACHE_TTL_S,
+        max_entries: int = GROUNDING_CACHE_MAX_ENTRIES,
+        similarity_threshold: float = GROUNDING_CACHE_SIMILARITY,
+        embedder=embedding_cache,
+    ):
+        self.ttl_s = ttl_s
+        self.max_entries = max_entries
+        self.similarity_threshold = similarity_threshold
+        self.embedder = embedder
+        self._entries: "OrderedDict[str, dict]" = OrderedDict()
+        self._vectors = VectorIndex(initial_capacity=max(16, max_entries))
+        self.exact_hits = 0
+        self.semantic_hits = 0
+        self.misses = 0
+        self.expired = 0
+        self.bypassed = 0
+
+    def key_for(self, prompt: str, tags: Optional[List[str]] = None, model: str = "") -> str:
+        normalized_tags = sorted({normalize_text(t) for t in tags or []})
+        payload = "\x00".join([model, normalize_text(prompt), *normalized_tags])
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def _drop(self, key: str):
+        self._entries.pop(key, None)
+        self._vectors.remove(key)
+
+    def _live(self, key: str) -> Optional[dict]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if time.monotonic() - entry["stored_at"] > self.ttl_s:
+            self.expired += 1
+            self._drop(key)
+            return None
+        self._entries.move_to_end(key)
+        return entry
+
+    async def lookup(self, prompt: str, tags: Optional[List[str]] = None, model: str = "") -> Tuple[Optional[dict], Optional[list]]:
+        """
+        Liefert (hit, embedding). hit = {"value", "match", "similarity", "age_s"} oder None.
+        Das Embedding wird zurückgegeben, damit store() es nicht erneut berechnen muss.
+        """
+        entry = self._live(self.key_for(prompt, tags, model))
+        if entry is not None:
+            self.exact_hits += 1
+            return self._hit(entry, "exact", 1.0), entry["embedding"]
+
+        try:
+            embedding = await self.embedder.embed(prompt)
+        except Exception as e:
+            print(f"WARNING: Semantic cache embedding failed, exact match only: {e}")
+            self.misses += 1
+            return None, None
+
+        for key, similarity, _ in self._vectors.search(embedding, k=3, filters={"model": model}):
+            if similarity < self.similarity_threshold:
+                break
+            entry = self._live(key)
+            if entry is not None:
+                self.semantic_hits += 1
+                return self._hit(entry, "semantic", similarity), embedding
+        self.misses += 1
+        return None, embedding
+
+    def _hit(self, entry: dict, match: str, similarity: float) -> dict:
+        return {
+            "value": entry["value"],
+            "match": match,
+            "similarity": round(similarity, 4),
+            "age_s": round(time.monotonic() - entry["stored_at"], 1),
+        }
+
+    def store(self, prompt: str, tags: Optional[List[str]], value: dict, embedding: Optional[list] = None, model: str = ""):
+        key = self.key_for(prompt, tags, model)
+        self._entries[key] = {"value": value, "embedding": embedding, "stored_at": time.monotonic()}
+        self._entries.move_to_end(key)
+        if embedding is not None:
+            self._vectors.upsert(key, embedding, {"model": model})
+        while len(self._entries) > self.max_entries:
+            oldest, _ = self._entries.popitem(last=False)
+            self._vectors.remove(oldest)
+
+    def stats(self) -> dict:
+        lookups = self.exact_hits + self.semantic_hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "exact_hits": self.exact_hits,
+            "semantic_hits": self.semantic_hits,
+            "misses": self.misses,
+            "expired": self.expired,
+            "bypassed": self.bypassed,
+            "hit_rate": round((self.exact_hits + self.semantic_hits) / lookups, 3) if lookups else 0.0,
+        }
+
+
+grounding_cache = SemanticCache()
@@ -0,0 +1,100 @@
+"""
+AGENTICUM G5 — Senate Verdict Cache
+====================================
+Memoisiert Senats-Urteile über den Rewrite-Loop hinweg: Key = SHA-256 über
+normalisierten Content + Modellversion + Prompt-Version (+ Keywords/Modus).
+Tier 1 In-Memory-LRU, Tier 2 SQLite auf lokaler Disk (überlebt Restarts).
+"""
+import asyncio
+import hashlib
+import json
+import os
+import unicodedata
+from collections import OrderedDict
+from typing import Optional
+
+from engine.core.sqlite_kv import SqliteKV
+
+MEMORY_MAX_ENTRIES = int(os.getenv("SENATE_VERDICT_CACHE_MEMORY_MAX", "1024"))
+DISK_PATH = os.getenv("SENATE_VERDICT_CACHE_PATH", "/tmp/agenticum/senate_verdicts.sqlite")
+DISK_MAX_ROWS = int(os.getenv("SENATE_VERDICT_CACHE_DISK_MAX_ROWS", "50000"))
+DISK_TTL_S = float(os.getenv("SENATE_VERDICT_CACHE_TTL_S", str(7 * 24 * 3600)))
+
+
+def normalize_content(content: str) -> str:
+    """NFC, Whitespace je Zeile zusammenfassen, Leerzeilen entfernen — Zeilenstruktur (Headings) bleibt."""
+    lines = (" ".join(line.split()) for line in unicodedata.normalize("NFC", content).splitlines())
+    return "\n".join(line for line in lines if line)
+
+
+class VerdictCache:
+    def __init__(
+        self,
+        memory_max_entries: int = MEMORY_MAX_ENTRIES,
+        disk_path: Optional[str] = DISK_PATH,
+        disk_max_rows: int = DISK_MAX_ROWS,
+        disk_ttl_s: float = DISK_TTL_S,
+    ):
+        self.memory_max_entries = memory_max_entries
+        self._memory: "OrderedDict[str, dict]" = OrderedDict()
+        self._disk = SqliteKV(disk_path, ttl_s=disk_ttl_s, max_rows=disk_max_rows) if disk_path else None
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.disk_errors = 0
+
+    def key_for(self, content: str, model_version: str, prompt_version: str, **variant) -> str:
+        payload = json.dumps(
+            {"content": normalize_content(content), "model": model_version, "prompt": prompt_version, **variant},
+            sort_keys=True,
+            ensure_ascii=False,
+        )
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def _remember(self, key: str, verdict: dict):
+        self._memory[key] = verdict
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_max_entries:
+            self._memory.popitem(last=False)
+
+    async def get(self, key: str) -> Optional[dict]:
+        verdict = self._memory.get(key)
+        if verdict is not None:
+            self._memory.move_to_end(key)
+            self.memory_hits += 1
+            return verdict
+        if self._disk is not None:
+            try:
+                verdict = await asyncio.to_thread(self._disk.get_json, key)
+            except Exception as e:
+                self.disk_errors += 1
+                print(f"WARNING: Senate verdict disk cache read failed: {e}")
+            if verdict is not None:
+                self._remember(key, verdict)
+                self.disk_hits += 1
+                return verdict
+        self.misses += 1
+        return None
+
+    async def put(self, key: str, verdict: dict):
+        self._remember(key, verdict)
+        if self._disk is not None:
+            try:
+                await asyncio.to_thread(self._disk.set_json, key, verdict)
+            except Exception as e:
+                self.disk_errors += 1
+                print(f"WARNING: Senate verdict disk cache write failed: {e}")
+
+    def stats(self) -> dict:
+        lookups = self.memory_hits + self.disk_hits + self.misses
+        return {
+            "memory_entries": len(self._memory),
+            "memory_hits": self.memory_hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "disk_errors": self.disk_errors,
+            "hit_rate": round((self.memory_hits + self.disk_hits) / lookups, 3) if lookups else 0.0,
+        }
+
+
+verdict_cache = VerdictCache()
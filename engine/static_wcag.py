@@ -0,0 +1,268 @@
+"""
+AGENTICUM G5 — Static WCAG Rules
+=================================
+Ein html.parser-Durchlauf, kein Browser: findet die häufigsten WCAG-Fehler
+(alt, label, heading-order, lang, link-name, Inline-Kontrast) in
+Millisekunden, bevor der Lighthouse-Pool bemüht wird. Reine Funktionen ohne
+Firebase/FastAPI-Abhängigkeit.
+"""
+import time
+from html.parser import HTMLParser
+from typing import List, Optional
+
+_VOID_TAGS = {"area", "base", "br", "col", "embed", "hr", "img", "input", "link", "meta", "param", "source", "track", "wbr"}
+_UNLABELED_INPUT_TYPES = {"hidden", "submit", "button", "reset", "image"}
+_NAMED_COLORS = {
+    "black": (0, 0, 0), "white": (255, 255, 255), "red": (255, 0, 0), "green": (0, 128, 0),
+    "blue": (0, 0, 255), "yellow": (255, 255, 0), "gray": (128, 128, 128), "grey": (128, 128, 128),
+    "silver": (192, 192, 192), "orange": (255, 165, 0), "navy": (0, 0, 128), "maroon": (128, 0, 0),
+    "purple": (128, 0, 128), "teal": (0, 128, 128), "olive": (128, 128, 0), "lime": (0, 255, 0),
+    "aqua": (0, 255, 255), "cyan": (0, 255, 255), "fuchsia": (255, 0, 255), "magenta": (255, 0, 255),
+    "lightgray": (211, 211, 211), "lightgrey": (211, 211, 211), "darkgray": (169, 169, 169), "darkgrey": (169, 169, 169),
+}
+MIN_CONTRAST_RATIO = 4.5
+# WCAG 1.4.3: großer Text (≥ 18pt bzw. ≥ 14pt fett, d.h. 24px / 18.66px) braucht nur 3:1
+LARGE_TEXT_MIN_CONTRAST_RATIO = 3.0
+LARGE_TEXT_PX = 24.0
+LARGE_BOLD_TEXT_PX = 18.66
+_BASE_FONT_PX = 16.0
+# Browser-Defaults, solange kein Inline-Style sie überschreibt: (Faktor zur Eltern-Größe, fett)
+_DEFAULT_FONTS = {"h1": (2.0, True), "h2": (1.5, True), "h3": (1.17, True), "h4": (1.0, True),
+                  "h5": (0.83, True), "h6": (0.67, True), "b": (1.0, True), "strong": (1.0, True)}
+_FONT_SIZE_KEYWORDS = {"xx-small": 9.0, "x-small": 10.0, "small": 13.0, "medium": 16.0,
+                       "large": 18.0, "x-large": 24.0, "xx-large": 32.0, "xxx-large": 48.0}
+
+def _parse_color(value: str) -> Optional[tuple]:
+    value = value.strip().lower()
+    if value.startswith("#"):
+        digits = value[1:]
+        if len(digits) in (3, 4):
+            digits = "".join(c * 2 for c in digits[:3])
+        if len(digits) in (6, 8):
+            try:
+                return tuple(int(digits[i:i + 2], 16) for i in (0, 2, 4))
+            except ValueError:
+                return None
+        return None
+    if value.startswith(("rgb(", "rgba(")):
+        parts = value[value.index("(") + 1:value.rindex(")")].replace("/", ",").replace(" ", ",").split(",")
+        try:
+            channels = [float(p) for p in parts if p][:3]
+        except ValueError:
+            return None
+        return tuple(int(c) for c in channels) if len(channels) == 3 else None
+    return _NAMED_COLORS.get(value)
+
+def _relative_luminance(rgb: tuple) -> float:
+    def channel(c):
+        c = c / 255
+        return c / 12.92 if c <= 0.03928 else ((c + 0.055) / 1.055) ** 2.4
+    r, g, b = (channel(c) for c in rgb)
+    return 0.2126 * r + 0.7152 * g + 0.0722 * b
+
+def contrast_ratio(foreground: tuple, background: tuple) -> float:
+    lighter, darker = sorted((_relative_luminance(foreground), _relative_luminance(background)), reverse=True)
+    return (lighter + 0.05) / (darker + 0.05)
+
+def _inline_colors(style: str) -> tuple:
+    """(color, background-color, background-image gesetzt?) aus einem Inline-Style."""
+    color = background = None
+    image = False
+    for declaration in style.split(";"):
+        prop, _, value = declaration.partition(":")
+        prop = prop.strip().lower()
+        value = value.replace("!important", "").strip()
+        if prop == "color":
+            color = _parse_color(value)
+        elif prop == "background-image":
+            image = value.lower() != "none"
+        elif prop in ("background-color", "background"):
+            if prop == "background" and ("url(" in value.lower() or "gradient(" in value.lower()):
+                image = True
+            # Bei Kurzschreibweise nur eine reine Farbe auswerten (keine Verläufe/Bilder)
+            background = _parse_color(value) if prop == "background-color" or " " not in value else background
+    return color, background, image
+
+def _font_size_px(value: str, parent_px: float) -> Optional[float]:
+    value = value.strip().lower()
+    if value in _FONT_SIZE_KEYWORDS:
+        return _FONT_SIZE_KEYWORDS[value]
+    for unit, to_px in (("rem", lambda n: n * _BASE_FONT_PX), ("px", lambda n: n), ("pt", lambda n: n * 4 / 3),
+                        ("em", lambda n: n * parent_px), ("%", lambda n: n * parent_px / 100)):
+        if value.endswith(unit):
+            try:
+                return to_px(float(value[:-len(unit)]))
+            except ValueError:
+                return None
+    return None
+
+def _inline_font(style: str, tag: str, parent: dict) -> tuple:
+    """(Schriftgröße in px, fett) aus Inline-Style, sonst Tag-Default bzw. geerbt."""
+    factor, bold = _DEFAULT_FONTS.get(tag, (1.0, parent["bold"]))
+    size = parent["font_px"] * factor
+    for declaration in style.split(";"):
+        prop, _, value = declaration.partition(":")
+        prop = prop.strip().lower()
+        value = value.replace("!important", "").strip().lower()
+        if prop == "font-size":
+            size = _font_size_px(value, parent["font_px"]) or size
+        elif prop == "font-weight":
+            if value in ("bold", "bolder"):
+                bold = True
+            elif value in ("normal", "lighter"):
+                bold = False
+            elif value.isdigit():
+                bold = int(value) >= 700
+    return size, bold
+
+def _is_large_text(element: dict) -> bool:
+    return element["font_px"] >= LARGE_TEXT_PX or (element["bold"] and element["font_px"] >= LARGE_BOLD_TEXT_PX)
+
+class _StaticWCAGParser(HTMLParser):
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.violations: List[dict] = []
+        self.html_lang = None
+        self.saw_html = False
+        self.last_heading = 0
+        self.stack: List[dict] = []
+        self.links: List[dict] = []
+        self.labels: List[dict] = []
+        self.label_for = set()
+        self.fields: List[dict] = []
+        self.reported_contrast = set()
+
+    def _violation(self, rule: str, blocking: bool, detail: str):
+        self.violations.append({"rule": rule, "blocking": blocking, "detail": f"{detail} (line {self.getpos()[0]})"})
+
+    def handle_starttag(self, tag, attrs):
+        attributes = {k: (v or "") for k, v in attrs}
+        if tag == "html":
+            self.saw_html = True
+            self.html_lang = attributes.get("lang", "").strip() or None
+        elif tag == "img" or (tag == "input" and attributes.get("type", "").lower() == "image") or tag == "area":
+            if "alt" not in attributes and attributes.get("role") not in ("presentation", "none") \
+                    and not attributes.get("aria-label", "").strip():
+                self._violation("image-alt", True, f"<{tag} src=\"{attributes.get('src', '')[:80]}\"> has no alt attribute")
+        elif tag in ("h1", "h2", "h3", "h4", "h5", "h6"):
+            level = int(tag[1])
+            if self.last_heading and level > self.last_heading + 1:
+                self._violation("heading-order", False, f"<{tag}> follows <h{self.last_heading}> (skipped heading level)")
+            self.last_heading = level
+        elif tag == "a":
+            # Jedes <a> auf den Stack, damit </a> eines Ankers ohne href nicht den umgebenden Link schließt
+            self.links.append({
+                "href": attributes["href"][:80] if "href" in attributes else None,
+                "name": bool(attributes.get("aria-label", "").strip() or attributes.get("title", "").strip()
+                             or attributes.get("aria-labelledby", "").strip()),
+                "line": self.getpos()[0],
+            })
+        elif tag == "label":
+            if attributes.get("for"):
+                self.label_for.add(attributes["for"])
+        elif tag in ("input", "select", "textarea") and attributes.get("type", "").lower() not in _UNLABELED_INPUT_TYPES:
+            self.fields.append({
+                "tag": tag,
+                "id": attributes.get("id"),
+                "name": attributes.get("name", ""),
+                "labelled": any(attributes.get(a, "").strip() for a in ("aria-label", "aria-labelledby", "title"))
+                            or any(e["tag"] == "label" for e in self.stack),
+                "line": self.getpos()[0],
+            })
+
+        if tag != "a" and self.links and any(
+                attributes.get(a, "").strip() for a in ("aria-label", "aria-labelledby", "title", "alt")):
+            # Kind-Element benennt den Link (<svg aria-label>, <img alt>, ...)
+            self.links[-1]["name"] = True
+
+        color, background, image = _inline_colors(attributes.get("style", ""))
+        parent = self.stack[-1] if self.stack else {
+            "color": None, "background": None, "background_image": False, "font_px": _BASE_FONT_PX, "bold": False,
+        }
+        if tag not in _VOID_TAGS:
+            font_px, bold = _inline_font(attributes.get("style", ""), tag, parent)
+            self.stack.append({
+                "tag": tag,
+                "color": color or parent["color"],
+                "background": background or parent["background"],
+                # Eine eigene Hintergrundfarbe ohne Bild verdeckt ein Bild der Vorfahren
+                "background_image": image or (parent["background_image"] and background is None),
+                "font_px": font_px,
+                "bold": bold,
+            })
+
+    def handle_startendtag(self, tag, attrs):
+        self.handle_starttag(tag, attrs)
+        if tag not in _VOID_TAGS and self.stack and self.stack[-1]["tag"] == tag:
+            self.stack.pop()
+
+    def handle_endtag(self, tag):
+        if tag == "a" and self.links:
+            link = self.links.pop()
+            if link["href"] is not None and not link["name"]:
+                self.violations.append({
+                    "rule": "link-name", "blocking": True,
+                    "detail": f"<a href=\"{link['href']}\"> has no accessible text (line {link['line']})",
+                })
+        # Nicht geschlossene Elemente (p, li, ...) tolerant mit abräumen
+        for i in range(len(self.stack) - 1, -1, -1):
+            if self.stack[i]["tag"] == tag:
+                del self.stack[i:]
+                break
+
+    def handle_data(self, data):
+        if not data.strip():
+            return
+        if self.links:
+            self.links[-1]["name"] = True
+        if not self.stack or self.stack[-1]["tag"] in ("script", "style"):
+            return
+        element = self.stack[-1]
+        # Nur blockieren, wenn beide Farben aus Inline-Styles stammen; angenommene Farben
+        # (Stylesheet, Hintergrundbild) misst der Lighthouse-Audit am gerenderten Paar
+        if element["color"] is None or element["background"] is None or element["background_image"]:
+            return
+        foreground, background = element["color"], element["background"]
+        minimum = LARGE_TEXT_MIN_CONTRAST_RATIO if _is_large_text(element) else MIN_CONTRAST_RATIO
+        if (foreground, background, minimum) in self.reported_contrast:
+            return
+        ratio = contrast_ratio(foreground, background)
+        if ratio < minimum:
+            self.reported_contrast.add((foreground, background, minimum))
+            self._violation(
+                "color-contrast", True,
+                f"Text '{data.strip()[:40]}' in <{element['tag']}> has contrast {ratio:.2f}:1 (minimum {minimum}:1)",
+            )
+
+    def finish(self) -> List[dict]:
+        if self.html_lang is None:
+            self.violations.append({
+                "rule": "html-has-lang", "blocking": True,
+                "detail": "<html> element has no lang attribute" if self.saw_html else "Document has no <html lang> element",
+            })
+        for field in self.fields:
+            if not field["labelled"] and not (field["id"] and field["id"] in self.label_for):
+                self.violations.append({
+                    "rule": "label", "blocking": True,
+                    "detail": f"<{field['tag']} name=\"{field['name']}\"> has no associated label (line {field['line']})",
+                })
+        return self.violations
+
+def static_wcag_check(html: str) -> dict:
+    """
+    Statische WCAG-Regeln (alt, label, heading-order, lang, link-name, Inline-Kontrast)
+    in einem Parser-Durchlauf. passed=False, sobald eine blockierende Regel verletzt ist;
+    heading-order gilt nur als Warnung.
+    """
+    started = time.perf_counter()
+    parser = _StaticWCAGParser()
+    parser.feed(html)
+    parser.close()
+    violations = parser.finish()
+    failures = [f"[{v['rule']}] {v['detail']}" for v in violations if v["blocking"]]
+    return {
+        "passed": not failures,
+        "failures": failures,
+        "warnings": [f"[{v['rule']}] {v['detail']}" for v in violations if not v["blocking"]],
+        "duration_ms": round((time.perf_counter() - started) * 1000, 2),
+    }
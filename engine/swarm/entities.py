@@ -94,6 +94,7 @@ class AuditCheck(BaseModel):
     passed:      bool
     score:       float = 0.0
     details:     str = ""
+    duration_ms: float = 0.0
 
 
 class SenateVerdictEntity(BaseModel):
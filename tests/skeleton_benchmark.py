@@ -0,0 +1,135 @@
+"""
+Micro-Benchmark: Columna Skeleton Extraction
+BeautifulSoup(html.parser) Multi-Pass vs. Single-Pass SkeletonParser.
+
+Usage:
+    python tests/skeleton_benchmark.py --corpus ./saved_pages --rounds 5
+Ohne --corpus wird ein synthetischer Korpus großer Marketing-Seiten erzeugt.
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from engine.core.html_skeleton import extract_skeleton
+
+
+def extract_skeleton_bs4(html: str) -> dict:
+    """Bisherige Implementierung aus columna_decompiler (Referenz)."""
+    from bs4 import BeautifulSoup
+    soup = BeautifulSoup(html, 'html.parser')
+
+    headings = []
+    for tag in soup.find_all(['h1', 'h2', 'h3']):
+        headings.append({"level": tag.name, "text": tag.get_text(strip=True)})
+
+    for script in soup(["script", "style", "nav", "footer"]):
+        script.decompose()
+
+    main_text = soup.get_text(separator=' ', strip=True)
+    outbound_links = [a['href'] for a in soup.find_all('a', href=True) if a['href'].startswith('http')]
+
+    return {
+        "headings": headings,
+        "content_length": len(main_text),
+        "raw_text": main_text[:8000],
+        "outbound_links": list(set(outbound_links))[:10]
+    }
+
+
+def synthetic_page(seed: int, sections: int = 120) -> str:
+    rng = random.Random(seed)
+    words = ("pipeline conversion strategy enterprise cloud agent swarm growth "
+             "analytics funnel compliance brand content revenue scale automation").split()
+
+    def sentence(n):
+        return " ".join(rng.choice(words) for _ in range(n)).capitalize() + "."
+
+    parts = [
+        "<!DOCTYPE html><html lang='en'><head><title>Pillar Page</title>",
+        "<style>body{font-family:sans-serif}.hero{color:#333}</style>",
+        "<script>window.dataLayer=[];function gtag(){dataLayer.push(arguments)}</script></head><body>",
+        "<nav><ul>" + "".join(f"<li><a href='https://example.com/n{i}'>Nav {i}</a></li>" for i in range(30)) + "</ul></nav>",
+        f"<h1>{sentence(6)}</h1>",
+    ]
+    for i in range(sections):
+        parts.append(f"<section><h2>{sentence(5)}</h2>")
+        for j in range(rng.randint(2, 6)):
+            if j % 3 == 0:
+                parts.append(f"<h3>{sentence(4)}</h3>")
+            parts.append(
+                f"<p>{sentence(25)} <a href='https://partner{rng.randint(0, 40)}.com/p'>{sentence(3)}</a> "
+                f"<strong>{sentence(4)}</strong> &amp; {sentence(12)}</p>"
+            )
+        parts.append("<!-- tracking pixel --><script>track('section')</script></section>")
+    parts.append("<footer><p>" + sentence(40) + "</p></footer></body></html>")
+    return "".join(parts)
+
+
+def load_corpus(path: str) -> list:
+    pages = []
+    for name in sorted(os.listdir(path)):
+        if name.lower().endswith((".html", ".htm")):
+            with open(os.path.join(path, name), encoding="utf-8", errors="replace") as f:
+                pages.append((name, f.read()))
+    return pages
+
+
+def same_output(fast: dict, legacy: dict) -> bool:
+    # Auswahl/Reihenfolge der Links war im Original durch set() undefiniert:
+    # unter dem Limit als Menge vergleichen, darüber nur die Anzahl.
+    if len(legacy["outbound_links"]) < 10:
+        links_match = set(fast["outbound_links"]) == set(legacy["outbound_links"])
+    else:
+        links_match = len(fast["outbound_links"]) == len(legacy["outbound_links"])
+    return (
+        fast["headings"] == legacy["headings"]
+        and fast["content_length"] == legacy["content_length"]
+        and fast["raw_text"] == legacy["raw_text"]
+        and links_match
+    )
+
+
+def time_it(fn, html: str, rounds: int) -> float:
+    samples = []
+    for _ in range(rounds):
+        start = time.perf_counter()
+        fn(html)
+        samples.append((time.perf_counter() - start) * 1000)
+    return statistics.median(samples)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--corpus", help="Verzeichnis mit gespeicherten .html-Seiten")
+    parser.add_argument("--rounds", type=int, default=5)
+    parser.add_argument("--synthetic", type=int, default=8, help="Anzahl synthetischer Seiten ohne --corpus")
+    args = parser.parse_args()
+
+    if args.corpus:
+        corpus = load_corpus(args.corpus)
+    else:
+        corpus = [(f"synthetic_{i}.html", synthetic_page(i, sections=60 + 40 * i)) for i in range(args.synthetic)]
+    if not corpus:
+        print("No pages found.")
+        sys.exit(1)
+
+    print(f"{'page':<28}{'size_kb':>9}{'bs4_ms':>10}{'fast_ms':>10}{'speedup':>9}  parity")
+    speedups, mismatches = [], 0
+    for name, html in corpus:
+        legacy_ms = time_it(extract_skeleton_bs4, html, args.rounds)
+        fast_ms = time_it(extract_skeleton, html, args.rounds)
+        parity = same_output(extract_skeleton(html), extract_skeleton_bs4(html))
+        mismatches += not parity
+        speedups.append(legacy_ms / fast_ms if fast_ms else float("inf"))
+        print(f"{name[:27]:<28}{len(html) / 1024:>9.0f}{legacy_ms:>10.1f}{fast_ms:>10.1f}{speedups[-1]:>8.1f}x  {'OK' if parity else 'DIFF'}")
+
+    print(f"\nMedian speedup: {statistics.median(speedups):.1f}x over {len(corpus)} pages, {mismatches} parity mismatches")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+"""
+Compliance Transformer: Injektion + SEO-Metriken im chunkweisen Single-Pass.
+
+Usage:
+    python -m pytest tests/test_compliance_transformer.py -q
+"""
+import os
+import re
+import sys
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from engine.compliance_transformer import transform_compliance_html
+
+# Kleine Chunks, damit Tags, Entities und Keywords tatsächlich über Grenzen fallen
+CHUNK_SIZES = (1, 2, 3, 7, 64 * 1024)
+_DATE_CREATED = re.compile(r'"dateCreated": "[^"]*"')
+
+
+def test_missing_head_end_tag_closes_head_implicitly():
+    html = "<html><head><title>x</title><body><h1>AI Agents</h1><p>AI Agents bauen AI Agents.</p></body></html>"
+    for chunk_size in CHUNK_SIZES:
+        compliant_html, report = transform_compliance_html(html, "AI Agents", chunk_size)
+        assert report["passed"], chunk_size
+        assert report["metrics"]["h1_count"] == 1
+        assert report["metrics"]["keyword_hits"] == 3
+        assert report["metrics"]["ai_act_meta_injected"]
+        assert compliant_html.index('name="ai-generated"') < compliant_html.index("<body>")
+
+
+ARTICLE = (
+    "<!DOCTYPE html><html lang=\"de\"><head><title>AI Agents</title>"
+    "<style>h1 { color: red; } /* AI Agents */</style></head>"
+    "<body><h1 class=\"hero\">AI&nbsp;Agents f&uuml;r den Mittelstand</h1>"
+    "<!-- AI Agents im Kommentar zählt nicht -->"
+    "<script>const t = \"AI Agents\"; if (a < b) {}</script>"
+    "<h2>Warum <em>AI</em> Agents?</h2><p>AI&#32;Agents sparen Zeit. Kosten &lt; Nutzen.</p>"
+    "<h3>Preis &amp; Leistung</h3><p>ai agents skalieren</p></body></html>"
+)
+
+
+def test_chunk_boundaries_do_not_change_output_or_metrics():
+    expected_html, expected_report = transform_compliance_html(ARTICLE, "AI Agents", 64 * 1024)
+    for chunk_size in CHUNK_SIZES:
+        compliant_html, report = transform_compliance_html(ARTICLE, "AI Agents", chunk_size)
+        # dateCreated ist ein Zeitstempel je Aufruf
+        assert _DATE_CREATED.sub("", compliant_html) == _DATE_CREATED.sub("", expected_html), chunk_size
+        assert report == expected_report, chunk_size
+
+
+def test_keywords_only_count_in_visible_text_across_tags_and_entities():
+    _, report = transform_compliance_html(ARTICLE, "AI Agents", 3)
+    # H1 (&nbsp;), H2 (<em> trennt kein Wort), Absatz (&#32;), klein geschrieben — nicht Title/Style/Kommentar/Script
+    assert report["metrics"]["keyword_hits"] == 4
+    assert report["metrics"]["outline"] == [
+        "H1: AI Agents für den Mittelstand", "H2: Warum AI Agents?", "H3: Preis & Leistung",
+    ]
+
+
+def test_keyword_hits_do_not_overlap():
+    _, report = transform_compliance_html("<body><p>aaaa</p></body>", "aa", 1)
+    assert report["metrics"]["keyword_hits"] == 2
+
+
+def test_bare_less_than_is_text():
+    html = "<body><h1>Preis < 5 Euro</h1><p>x < y > AI Agents</p><p>a <3 b < p>AI Agents</p></body>"
+    for chunk_size in CHUNK_SIZES:
+        compliant_html, report = transform_compliance_html(html, "AI Agents", chunk_size)
+        assert report["metrics"]["outline"] == ["H1: Preis < 5 Euro"], chunk_size
+        assert report["metrics"]["keyword_hits"] == 2, chunk_size
+        assert "x < y > AI Agents" in compliant_html
+
+
+def test_injection_points():
+    compliant_html, report = transform_compliance_html(ARTICLE, None, 2)
+    assert report["metrics"]["ai_act_meta_injected"]
+    assert compliant_html.index('name="ai-generated"') < compliant_html.index("</head>")
+    assert compliant_html.index("ai-act-disclaimer") < compliant_html.index("</body>")
+    assert compliant_html.count("ai-act-disclaimer") == 1
+
+
+def test_missing_body_end_tag_still_gets_disclaimer():
+    compliant_html, _ = transform_compliance_html("<html><body><h1>AI Agents</h1>", None, 4)
+    assert compliant_html.rstrip().endswith("</footer>")
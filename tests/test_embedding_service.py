@@ -0,0 +1,66 @@
+"""
+Embedding-Service: stop() darf keinen wartenden Aufrufer hängen lassen.
+
+Usage:
+    python -m pytest tests/test_embedding_service.py -q
+"""
+import asyncio
+import os
+import sys
+import time
+from types import SimpleNamespace
+
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from engine.services.embedding_service import EmbeddingService, EmbeddingServiceStopped
+
+
+class _FakeEmbeddingModel:
+    def __init__(self, delay_s: float = 0.0):
+        self.delay_s = delay_s
+
+    def get_embeddings(self, texts):
+        time.sleep(self.delay_s)
+        return [SimpleNamespace(values=[float(len(t))]) for t in texts]
+
+
+def _service(model, **kwargs) -> EmbeddingService:
+    service = EmbeddingService(**kwargs)
+    service.get_model = lambda: model
+    return service
+
+
+def test_batches_concurrent_calls():
+    service = _service(_FakeEmbeddingModel())
+
+    async def main():
+        try:
+            return await service.embed_many(["a", "bb", "ccc"])
+        finally:
+            await service.stop()
+
+    assert asyncio.run(main()) == [[1.0], [2.0], [3.0]]
+    assert service.batches_total == 1
+
+
+@pytest.mark.parametrize("stage", ["collecting", "dispatching", "queued"])
+def test_stop_fails_every_waiting_caller(stage):
+    # collecting: Worker sammelt noch (langes max_wait); dispatching: Batch läuft im Thread;
+    # queued: Inflight-Limit erreicht, weitere Texte warten in der Queue
+    service = _service(
+        _FakeEmbeddingModel(delay_s=0.2 if stage != "collecting" else 0.0),
+        max_wait_ms=5000 if stage == "collecting" else 1,
+        max_batch=1 if stage == "queued" else 250,
+        max_inflight_batches=1,
+    )
+
+    async def main():
+        callers = [asyncio.create_task(service.embed(f"text-{i}")) for i in range(5)]
+        await asyncio.sleep(0.05)
+        await service.stop()
+        return await asyncio.wait_for(asyncio.gather(*callers, return_exceptions=True), 1)
+
+    results = asyncio.run(main())
+    assert all(isinstance(r, EmbeddingServiceStopped) for r in results), results
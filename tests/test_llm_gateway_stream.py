@@ -0,0 +1,67 @@
+"""
+LLM-Gateway: Stream-Deadline darf nur die Producer-Seite begrenzen.
+
+Usage:
+    python -m pytest tests/test_llm_gateway_stream.py -q
+"""
+import asyncio
+import os
+import sys
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from engine.services.llm_gateway import LLMDeadlineExceeded, LLMGateway
+
+
+class _FakeStreamingModel:
+    _model_name = "fake-stream-model"
+
+    def __init__(self, chunks: int, chunk_delay_s: float):
+        self.chunks = chunks
+        self.chunk_delay_s = chunk_delay_s
+
+    async def generate_content_async(self, contents, stream=False, **kwargs):
+        async def produce():
+            for i in range(self.chunks):
+                await asyncio.sleep(self.chunk_delay_s)
+                yield f"chunk-{i}"
+        return produce()
+
+
+def test_slow_consumer_gets_deadline_exceeded_not_cancelled():
+    gateway = LLMGateway(max_retries=0)
+    model = _FakeStreamingModel(chunks=10, chunk_delay_s=0.01)
+
+    async def consume():
+        received = []
+        async for chunk in gateway.stream(model, "prompt", deadline_s=0.2):
+            received.append(chunk)
+            await asyncio.sleep(0.1)  # langsamer SSE-Client
+        return received
+
+    async def main():
+        try:
+            await consume()
+        except LLMDeadlineExceeded:
+            return True
+        return False
+
+    assert asyncio.run(main()) is True
+    lane = gateway.lane("fake-stream-model")
+    assert lane.deadline_exceeded == 1
+    assert lane.failures == 0
+    assert lane.inflight == 0
+
+
+def test_stream_within_deadline_yields_all_chunks():
+    gateway = LLMGateway(max_retries=0)
+    model = _FakeStreamingModel(chunks=5, chunk_delay_s=0.001)
+
+    async def consume():
+        return [chunk async for chunk in gateway.stream(model, "prompt", deadline_s=5)]
+
+    assert asyncio.run(consume()) == [f"chunk-{i}" for i in range(5)]
+    lane = gateway.lane("fake-stream-model")
+    assert lane.calls == 1
+    assert lane.deadline_exceeded == 0
+    assert lane.inflight == 0
@@ -0,0 +1,81 @@
+"""
+Statische WCAG-Regeln: Kontrast nur bei inline bekannten Farbpaaren, Link-Namen aus Kind-Elementen.
+
+Usage:
+    python -m pytest tests/test_static_wcag.py -q
+"""
+import os
+import sys
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from engine.static_wcag import static_wcag_check
+
+
+def _check(body: str) -> dict:
+    return static_wcag_check(f'<html lang="de"><body>{body}</body></html>')
+
+
+def _rules(report: dict) -> list:
+    return [failure.split("]")[0].lstrip("[") for failure in report["failures"]]
+
+
+# ── Kontrast ──
+def test_contrast_blocks_when_both_colors_are_inline():
+    report = _check('<div style="background:#ffffff"><p style="color:#eeeeee">Kaum lesbar</p></div>')
+    assert _rules(report) == ["color-contrast"]
+
+
+def test_contrast_inherits_inline_colors_from_ancestors():
+    report = _check('<section style="color:#eee;background-color:#fff"><div><span>Geerbt</span></div></section>')
+    assert _rules(report) == ["color-contrast"]
+
+
+def test_contrast_with_unknown_background_is_left_to_lighthouse():
+    # Hintergrund kommt aus dem Stylesheet — weiß anzunehmen wäre ein falsches 1.00:1
+    assert _check('<p style="color:#fff">Hero-Headline</p>')["passed"]
+
+
+def test_contrast_with_unknown_foreground_is_left_to_lighthouse():
+    assert _check('<div style="background:#000"><p>Text in Stylesheet-Farbe</p></div>')["passed"]
+
+
+def test_contrast_over_background_image_is_left_to_lighthouse():
+    report = _check('<div style="background:url(hero.jpg) center/cover;background-color:#fff">'
+                    '<h2 style="color:#fff">Über dem Bild</h2></div>')
+    assert report["passed"]
+
+
+def test_own_background_color_hides_ancestor_image():
+    report = _check('<div style="background-image:url(hero.jpg)">'
+                    '<p style="background:#fff;color:#eee">Eigene Fläche</p></div>')
+    assert _rules(report) == ["color-contrast"]
+
+
+def test_large_text_needs_only_three_to_one():
+    # #949494 auf Weiß ≈ 3.03:1
+    assert not _check('<p style="color:#949494;background:#fff">Normal</p>')["passed"]
+    assert _check('<p style="color:#949494;background:#fff;font-size:24px">Groß</p>')["passed"]
+    assert _check('<p style="color:#949494;background:#fff;font-size:19px;font-weight:700">Fett</p>')["passed"]
+
+
+# ── Link-Namen ──
+def test_link_named_by_child_elements():
+    assert _check('<a href="/"><svg aria-label="Startseite"></svg></a>')["passed"]
+    assert _check('<a href="/"><img src="logo.png" alt="AGENTICUM"></a>')["passed"]
+    assert _check('<a href="/"><span title="Startseite"></span></a>')["passed"]
+
+
+def test_link_without_any_name_blocks():
+    assert _rules(_check('<a href="/leer"><img src="x.png" alt=""></a>')) == ["link-name"]
+
+
+def test_anchor_without_href_does_not_close_enclosing_link():
+    # </a> des inneren Ankers darf nicht den Link-Eintrag von /x abräumen
+    report = _check('<a href="/x"><a id="sprungmarke"></a></a>')
+    assert _rules(report) == ["link-name"]
+    assert '/x' in report["failures"][0]
+
+
+def test_anchor_without_href_is_not_a_link():
+    assert _check('<a id="top"></a><a name="anker"></a>')["passed"]